@@ -1,8 +1,9 @@
 from autogen import AssistantAgent
 from config.agent_config import agent_settings
 
-def get_risk_manager_agent(llm_config):
-    risk_profile = agent_settings.get("risk_profile", "Neutral")
+def get_risk_manager_agent(llm_config, risk_profile=None):
+    # The profile is part of the system message, so each profile needs its own agent
+    risk_profile = risk_profile or agent_settings.get("risk_profile", "Neutral")
 
     return AssistantAgent(
         name="risk_manager_agent",
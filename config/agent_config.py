@@ -8,5 +8,56 @@ agent_settings = {
         # "analyst_agent": ["data_collect_company_info", "data_collect_stock_price_history", "data_collect_social_sentiment"],
         "analyst_agent": ["get_stock_news_sentiment", "get_stock_price_history", "get_stock_fundamental_data"],
         # "analyst_agent": ["get_stock_price_history"],
+    },
+    # Tool calls issued in the same LLM turn run concurrently on the executor agent
+    "tool_execution": {
+        "max_workers": 16,       # threads shared by all executor agents in the process
+        "default_timeout": 60,   # seconds a tool call may run (queue time excluded); _tool_config["timeout"] overrides it
+    },
+    # Memoized tool results, keyed by (tool, as-of date, canonical args)
+    "tool_cache": {
+        "maxsize": 4096,         # max cached results (LRU)
+        "persist_path": None,    # e.g. "cache/tool_results.json" to reuse results across runs
+    },
+    # Per-ticker logs/{ticker}_usage.log, written by a background thread (see utils/log_utils.py)
+    "logging": {
+        "level": "INFO",
+        "stage_level": "INFO",   # pipeline stage messages; "WARNING" silences per-stage usage lines
+        "http_level": "WARNING", # httpx/openai request lines
+        "console": True,
+        "max_open_files": 64,
+    },
+    # Agent conversation histories between ticker-days (see utils/message_utils.reset_conversations)
+    "conversation_memory": {
+        "reset_between_runs": True,       # clear all histories before each ticker-day
+        "max_messages_per_partner": None, # when not resetting, keep only this many per conversation
+    },
+    # Rolling compaction of the bullish/bearish debate transcript (orchestrator/debate_group.py)
+    "debate_compaction": {
+        "enabled": True,
+        "keep_speakers": ["bullish_research_agent", "bearish_research_agent"],  # latest turn of each stays verbatim
+        "max_chars_per_turn": 300,  # digest length of each older turn
+        "min_messages": 6,          # shorter transcripts are sent as-is
+        "summarizer": "rules",      # "rules" or "llm" (summarize older turns with the pipeline's model)
+    },
+    # Per-date market context (index/sector moves, macro headlines) prepended to every ticker's brief
+    "market_context": {
+        "enabled": True,
+        "index_tickers": ["SPY", "QQQ", "DIA"],   # used when present in Data/hist_price_jsons
+        "news_lookback_days": 3,
+        "max_headlines": 5,
+        "macro_topics": ["Economy - Macro", "Economy - Monetary", "Economy - Fiscal", "Financial Markets"],
+    },
+    # Content-hashed stage outputs for the DAG runner (see orchestrator/stage_dag.py)
+    "stage_cache": {
+        "enabled": True,
+        "dir": "results/stage_cache",
+        "max_workers": 4,        # stages running in parallel
+    },
+    # One JSONL record per ticker-day with per-stage timings, tokens and tool calls
+    # (summarize with evaluate/telemetry_report.py)
+    "telemetry": {
+        "enabled": True,
+        "path": "logs/telemetry.jsonl",
     }
 }
\ No newline at end of file
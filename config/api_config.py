@@ -26,4 +26,78 @@ llm_config = {
             "api_version": "2025-01-01-preview",
         }
     ]
-}
\ No newline at end of file
+}
+
+# Offline stand-in for llm_config: scripted replies, no network, no cost (see utils/fake_llm.py)
+fake_llm_config = {
+    "temperature": 0.5,
+    "cache_seed": None,
+    "config_list": [
+        {
+            "model": "fake-gpt-4o",
+            "model_client_cls": "FakeModelClient",
+            "latency_s": 0.0,          # artificial latency per LLM call
+            "latency_jitter_s": 0.0,   # extra uniform random latency
+        }
+    ]
+}
+
+# Rate limiting and retries of every Alpha Vantage call (see data_collection/alvan_dc/client.py)
+alphavantage_client_config = {
+    "base_url": os.environ.get("ALPHAVANTAGE_BASE_URL", "https://www.alphavantage.co/query"),
+    "requests_per_minute": 65,   # sustained rate: keep requests_per_minute + burst within the key's plan (75/min)
+    "requests_per_day": None,    # daily quota (free keys: 25); None for unlimited
+    "burst": 10,                 # back-to-back requests before pacing; a 60 s window sees up to burst + requests_per_minute
+    "max_retries": 5,            # on 5xx/429 and "Note"/"Information" rate-limit bodies
+    "backoff_base_s": 1.0,       # doubled per retry, with +-50% jitter
+    "backoff_max_s": 60.0,
+    "timeout_s": 30.0,
+    "max_connections": 25,       # pooled TCP connections, i.e. max in-flight requests per event loop
+    "dns_cache_ttl": 300,        # seconds a resolved host is cached
+    "keepalive_timeout": 30,     # seconds an idle connection is kept open
+}
+
+# Streaming ingest of the save_* scripts (see data_collection/ingest_pipeline.py)
+alphavantage_ingest_config = {
+    "fetch_workers": None,       # concurrent fetches; None = the client's max_connections (pacing is the token bucket's job)
+    "parse_workers": 4,          # threads decoding/validating/compressing payloads
+    "queue_size": 100,           # bound of each stage queue: caps payloads held in memory
+    "write_batch_size": 50,      # payloads per disk-write batch / manifest transaction
+    "write_interval_s": 2.0,     # flush a partial batch after this long
+}
+
+# Local Alpha Vantage stand-in for offline ingest runs and benchmarks (see utils/fake_alphavantage.py).
+# Point the client at it with ALPHAVANTAGE_BASE_URL=http://127.0.0.1:8765/query
+fake_alphavantage_config = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "latency_s": 0.05,           # per response
+    "latency_jitter_s": 0.05,    # extra uniform random latency
+    "tail_rate": 0.0,            # share of responses that are slow...
+    "tail_latency_s": 2.0,       # ...and how slow
+    "error_rate": 0.0,           # share of HTTP 503 responses
+    "note_rate": 0.0,            # share of random "Note" rate-limit bodies
+    "requests_per_minute": None, # server-side quota per API key (sliding minute); None = unlimited
+    "note_style": "note",        # "note" ({"Note": ...}) or "information" ({"Information": ...}) when over quota
+    "news_days": 30,             # synthetic news exists for this many days before as_of
+    "articles_per_day": 3,       # synthetic articles per ticker per day
+    "seed": 0,
+}
+
+# Earnings-calendar-aware fundamentals refresh (see data_collection/fundamentals_planner.py)
+fundamentals_refresh_config = {
+    # OVERVIEW is refetched once a new quarter is reported; this is only the backstop for its
+    # price-driven fields (market cap, ratios). Every 30 days is ~17 calls/day for 500 tickers.
+    "overview_max_age_days": 30,
+    "report_margin_days": 3,         # start probing EARNINGS this many days before the expected report
+    "probe_interval_days": 1,        # once a report is due, re-probe EARNINGS at most this often
+    "earnings_max_age_days": 95,     # refetch EARNINGS at least this often (calendar changes, new tickers)
+    "statement_retry_hours": 20,     # min hours between refetches of a statement still missing the reported quarter
+}
+
+# SEC EDGAR filing extraction (see data_collection/fundemental.py); SEC allows ~10 requests/s per client
+sec_edgar_config = {
+    "calls_per_second": 5,       # shared by all workers; an edgartools download can be 2 requests (index + document)
+    "burst": 5,
+    "max_workers": 8,            # companies processed at the same time
+}
@@ -0,0 +1,348 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+import aiohttp
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from config.api_config import api_keys, alphavantage_client_config
+
+RATE_LIMIT_PHRASES = ("rate limit", "call frequency", "requests per", "api call volume")
+
+
+class TokenBucket:
+    def __init__(self, requests_per_minute: float, requests_per_day: float = None, burst: float = None):
+        """
+        Quota-aware limiter: a per-minute bucket and an optional per-day bucket. Thread-safe
+        and usable from any event loop, so every caller of the same API key shares one quota.
+
+        Args:
+            requests_per_minute (float): Sustained request rate.
+            requests_per_day (float, optional): Daily quota; None for unlimited.
+            burst (float, optional): Bucket capacity; None for one minute's quota. Any 60 s
+                window can see up to burst + requests_per_minute calls, so against a
+                sliding-window quota keep the sum at or below the plan's limit.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_day = requests_per_day
+        self.burst = float(burst or requests_per_minute)
+        self._minute_tokens = self.burst
+        self._day_tokens = float(requests_per_day) if requests_per_day else None
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._minute_tokens = min(self.burst, self._minute_tokens + elapsed * self.requests_per_minute / 60)
+        if self._day_tokens is not None:
+            self._day_tokens = min(self.requests_per_day, self._day_tokens + elapsed * self.requests_per_day / 86400)
+
+    def try_acquire(self) -> float:
+        """
+        Take one token if available.
+
+        Returns:
+            float: 0.0 if a token was taken, else the seconds to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            waits = []
+            if self._minute_tokens < 1:
+                waits.append((1 - self._minute_tokens) * 60 / self.requests_per_minute)
+            if self._day_tokens is not None and self._day_tokens < 1:
+                waits.append((1 - self._day_tokens) * 86400 / self.requests_per_day)
+            if waits:
+                return max(waits)
+            self._minute_tokens -= 1
+            if self._day_tokens is not None:
+                self._day_tokens -= 1
+            return 0.0
+
+    async def acquire(self) -> float:
+        """
+        Wait until a token is available and take it.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return waited
+            wait = min(wait, 60.0)
+            waited += wait
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self) -> float:
+        """
+        `acquire` for worker threads: sleeps the calling thread instead of the event loop.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return waited
+            wait = min(wait, 60.0)
+            waited += wait
+            time.sleep(wait)
+
+    def drain(self):
+        """
+        Empty the per-minute bucket, e.g. after the server reported a rate limit.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._minute_tokens = min(self._minute_tokens, 0.0)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.ok = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.latency_s = 0.0
+        self.throttle_wait_s = 0.0
+        self.first = None
+        self.last = None
+
+    def to_dict(self) -> dict:
+        span = (self.last - self.first) if self.first is not None else 0.0
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "avg_latency_s": round(self.latency_s / self.requests, 3) if self.requests else 0.0,
+            "throttle_wait_s": round(self.throttle_wait_s, 1),
+            "requests_per_min": round(self.requests / span * 60, 1) if span > 0 else float(self.requests),
+        }
+
+
+class AlphaVantageClient:
+    def __init__(
+        self,
+        api_key: str = api_keys["alphavantage"],
+        base_url: str = alphavantage_client_config["base_url"],
+        requests_per_minute: float = alphavantage_client_config["requests_per_minute"],
+        requests_per_day: float = alphavantage_client_config["requests_per_day"],
+        burst: float = alphavantage_client_config["burst"],
+        max_retries: int = alphavantage_client_config["max_retries"],
+        backoff_base_s: float = alphavantage_client_config["backoff_base_s"],
+        backoff_max_s: float = alphavantage_client_config["backoff_max_s"],
+        timeout_s: float = alphavantage_client_config["timeout_s"],
+        max_connections: int = alphavantage_client_config["max_connections"],
+        dns_cache_ttl: int = alphavantage_client_config["dns_cache_ttl"],
+        keepalive_timeout: int = alphavantage_client_config["keepalive_timeout"]
+    ):
+        """
+        Shared async Alpha Vantage client: one token-bucket quota per API key, retries with
+        jittered exponential backoff on 5xx / 429 and on "Note"/"Information" rate-limit
+        bodies, a pooled session per event loop, and per-endpoint throughput statistics.
+        The client owns the only pooled session: the data tools reach it on the session pool
+        loop (see session_pool.py), scripts on their own loop.
+
+        Args:
+            api_key (str): Alpha Vantage API key.
+            base_url (str): Query endpoint (configurable for a local stand-in server).
+            requests_per_minute (float): Per-minute quota of the key.
+            requests_per_day (float, optional): Daily quota of the key; None for unlimited.
+            burst (float, optional): Requests allowed back to back before pacing starts.
+            max_retries (int): Retries per request after the first attempt.
+            backoff_base_s (float): First backoff delay; doubles on every retry.
+            backoff_max_s (float): Backoff delay cap.
+            timeout_s (float): Total timeout of one HTTP request.
+            max_connections (int): Connection pool size of each session (bounds in-flight requests).
+            dns_cache_ttl (int): Seconds a resolved host is cached.
+            keepalive_timeout (int): Seconds an idle connection is kept open.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limiter = TokenBucket(requests_per_minute, requests_per_day, burst)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.timeout = aiohttp.ClientTimeout(total=timeout_s)
+        self.max_connections = max_connections
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions = weakref.WeakKeyDictionary()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Pooled session of the running event loop, created on first use.
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, ttl_dns_cache=self.dns_cache_ttl, keepalive_timeout=self.keepalive_timeout
+            )
+            session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """
+        Close the session of the running event loop.
+        """
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def _endpoint_stats(self, function: str) -> EndpointStats:
+        with self._stats_lock:
+            return self._stats.setdefault(function, EndpointStats())
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def is_rate_limited(data) -> bool:
+        if not isinstance(data, dict):
+            return False
+        if "Note" in data:
+            return True
+        info = str(data.get("Information", "")).lower()
+        return any(phrase in info for phrase in RATE_LIMIT_PHRASES)
+
+    @staticmethod
+    def peek_body(body: bytes):
+        """
+        Parse a raw body only if it is small enough to be a "Note"/"Information"/"Error
+        Message" reply (a few hundred bytes); real payloads are left for the caller to parse.
+        """
+        if not isinstance(body, bytes) or len(body) > 4096:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    async def query(self, function: str, datatype: str = "json", raw: bool = False, **params):
+        """
+        Call one Alpha Vantage function, waiting for quota and retrying transient failures.
+
+        Args:
+            function (str): API function, e.g. 'TIME_SERIES_DAILY_ADJUSTED'.
+            datatype (str): 'json' or 'csv'.
+            raw (bool): Return the undecoded body, so the caller can parse it off the event loop.
+            **params: Other query parameters (symbol, tickers, time_from, ...).
+
+        Returns:
+            dict | str | bytes | None: Parsed JSON (text for csv, bytes if `raw`), or None if the call failed.
+        """
+        stats = self._endpoint_stats(function)
+        query = {"function": function, **{k: v for k, v in params.items() if v is not None}, "apikey": self.api_key}
+        if datatype != "json":
+            query["datatype"] = datatype
+        session = await self.get_session()
+
+        for attempt in range(self.max_retries + 1):
+            waited = await self.limiter.acquire()
+            start = time.monotonic()
+            retry, data = False, None
+            try:
+                async with session.get(self.base_url, params=query) as response:
+                    if response.status >= 500 or response.status == 429:
+                        retry = True
+                        print(f"[Retry] {function} HTTP {response.status} ({attempt + 1}/{self.max_retries + 1})")
+                    elif response.status != 200:
+                        print(f"[Error] {function} HTTP {response.status}")
+                    elif raw:
+                        data = await response.read()
+                    else:
+                        data = await response.json(content_type=None) if datatype == "json" else await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retry = True
+                print(f"[Retry] {function} {type(e).__name__}: {e} ({attempt + 1}/{self.max_retries + 1})")
+
+            end = time.monotonic()
+            with self._stats_lock:
+                stats.requests += 1
+                stats.latency_s += end - start
+                stats.throttle_wait_s += waited
+                stats.first = start if stats.first is None else stats.first
+                stats.last = end
+                stats.retries += int(attempt > 0)
+
+            if self.is_rate_limited(self.peek_body(data) if raw else data):
+                with self._stats_lock:
+                    stats.rate_limited += 1
+                self.limiter.drain()
+                retry, data = True, None
+            elif isinstance(data, dict) and "Error Message" in data:
+                print(f"[Error] {function} API Error: {data['Error Message']}")
+                data = None
+
+            if not retry:
+                with self._stats_lock:
+                    if data is None:
+                        stats.failed += 1
+                    else:
+                        stats.ok += 1
+                return data
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt))
+
+        with self._stats_lock:
+            stats.failed += 1
+        print(f"[Error] {function} failed after {self.max_retries + 1} attempts")
+        return None
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: {function: {"requests", "ok", "failed", "retries", "rate_limited",
+                   "avg_latency_s", "throttle_wait_s", "requests_per_min"}}
+        """
+        with self._stats_lock:
+            return {function: s.to_dict() for function, s in self._stats.items()}
+
+    def format_stats(self) -> str:
+        lines = [f"{'endpoint':<30}{'req':>7}{'ok':>7}{'fail':>6}{'retry':>7}{'limited':>9}{'lat s':>8}{'req/min':>9}"]
+        for function, s in sorted(self.stats().items()):
+            lines.append(
+                f"{function:<30}{s['requests']:>7}{s['ok']:>7}{s['failed']:>6}{s['retries']:>7}"
+                f"{s['rate_limited']:>9}{s['avg_latency_s']:>8.2f}{s['requests_per_min']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+async def close_av_clients():
+    """
+    Close the sessions the shared clients opened on the running event loop.
+    """
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        await client.close()
+
+
+def get_av_client(api_key: str = None) -> AlphaVantageClient:
+    """
+    Return the process-wide client of `api_key` (default key from config), so all fetchers
+    using the same key share one quota.
+    """
+    api_key = api_key or api_keys["alphavantage"]
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = AlphaVantageClient(api_key=api_key)
+        return _clients[api_key]
@@ -1,55 +1,67 @@
 import asyncio
 import re
 from datetime import datetime
-import aiohttp
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 from config.api_config import api_keys
+from data_collection.alvan_dc.client import AlphaVantageClient, get_av_client
+from data_collection.alvan_dc.session_pool import get_session_pool
 
 class AlphaVantageNewsFetcher:
-    def __init__(self, api_key: str, time_from: str, time_to: str, sort: str = "RELEVANCE", max_concurrent_requests: int = 25):
+    def __init__(self, api_key: str, time_from: str, time_to: str, sort: str = "RELEVANCE", max_concurrent_requests: int = 25, semaphore: asyncio.Semaphore = None, client: AlphaVantageClient = None, limit: int = None):
         """
         Initialize the news fetcher.
         
         Args:
             api_key (str): Your Alpha Vantage API key.
             max_concurrent_requests (int): Maximum number of concurrent API requests.
+            semaphore (asyncio.Semaphore, optional): Shared limiter; overrides max_concurrent_requests.
+            client (AlphaVantageClient, optional): Rate-limited client; defaults to the shared one of `api_key`.
+            limit (int, optional): Max articles per call (the API allows up to 1000, default 50).
 
         """
         self.api_key = api_key
         self.time_from = time_from
         self.time_to = time_to
         self.sort = sort
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.semaphore = semaphore or asyncio.Semaphore(max_concurrent_requests)
+        self.client = client or get_av_client(api_key)
+        self.limit = limit
 
-    async def fetch_news(self, ticker: str, session=None):
+    async def fetch_news(self, ticker: str, time_to: str = None):
         """
         Fetch news sentiment for a single ticker.
 
         Args:
             ticker (str): Ticker symbol.
-            session: Existing aiohttp session.
+            time_to (str, optional): Overrides the fetcher's end time (for paging back through a window).
 
         Returns:
             dict: A dictionary mapping the ticker to its news data.
         """
-        url = f'https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers={ticker}&time_from={self.time_from}&time_to={self.time_to}&sort={self.sort}&apikey={self.api_key}'
-        if session is None:
-            async with aiohttp.ClientSession() as new_session:
-                async with self.semaphore:
-                    async with new_session.get(url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            return {ticker: data.get("feed", [])}
-                        return {ticker: None}
-        else:
-            async with self.semaphore:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return {ticker: data.get("feed", [])}
-                    return {ticker: None}
+        return {ticker: await self.fetch_feed(tickers=ticker, time_to=time_to)}
+
+    async def fetch_feed(self, tickers: str = None, topics: str = None, time_to: str = None) -> list:
+        """
+        Fetch one NEWS_SENTIMENT page. Without `tickers`/`topics` the feed covers the whole
+        market; note that several comma-separated tickers match only articles that mention
+        all of them.
+
+        Args:
+            tickers (str, optional): Ticker filter.
+            topics (str, optional): Topic filter, e.g. 'earnings,technology'.
+            time_to (str, optional): Overrides the fetcher's end time.
+
+        Returns:
+            list: Articles, or None if the request failed.
+        """
+        async with self.semaphore:
+            data = await self.client.query(
+                "NEWS_SENTIMENT", tickers=tickers, topics=topics,
+                time_from=self.time_from, time_to=time_to or self.time_to, sort=self.sort, limit=self.limit
+            )
+        return data.get("feed", []) if data is not None else None
 
 
 async def fetch_all_news(tickers, api_key: str, time_from: str, time_to: str, sort: str="RELEVANCE", max_concurrent_requests: int=25) -> dict:
@@ -70,12 +82,9 @@ async def fetch_all_news(tickers, api_key: str, time_from: str, time_to: str, so
     fetcher = AlphaVantageNewsFetcher(api_key, time_from, time_to, sort, max_concurrent_requests)
     results = {}
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetcher.fetch_news(ticker, session=session) for ticker in tickers]
-        responses = await asyncio.gather(*tasks)
-
-        for r in responses:
-            results.update(r)
+    tasks = [fetcher.fetch_news(ticker) for ticker in tickers]
+    for r in await asyncio.gather(*tasks):
+        results.update(r)
 
     return results
 
@@ -114,6 +123,6 @@ async def fetch_single_news(ticker, time_from: str, time_to: str, sort: str = "R
     # time_from = normalize_time_format(time_from)
     # time_to = normalize_time_format(time_to)
 
+    # Runs on the session pool loop, where the shared client keeps its pooled session
     fetcher = AlphaVantageNewsFetcher(api_keys["alphavantage"], time_from, time_to, sort)
-    async with aiohttp.ClientSession() as session:
-        return await fetcher.fetch_news(ticker, session=session)
\ No newline at end of file
+    return await get_session_pool().arun(fetcher.fetch_news(ticker))
\ No newline at end of file
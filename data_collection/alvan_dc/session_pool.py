@@ -0,0 +1,88 @@
+import asyncio
+import atexit
+import threading
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from data_collection.alvan_dc.client import close_av_clients
+
+
+class AlphaVantageSessionPool:
+    def __init__(self):
+        """
+        A long-lived event loop in a daemon thread for the data tools.
+
+        Tool calls submit their coroutines here instead of calling `asyncio.run`, so the
+        shared AlphaVantageClient's pooled session on this loop (connection limit, timeout)
+        is reused across calls and its connection limit applies to all of them.
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="alphavantage-session-pool", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """
+        Schedule `coro` on the pool loop from any thread.
+
+        Returns:
+            concurrent.futures.Future: Future holding the coroutine's result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        """
+        Sync bridge: run `coro` on the pool loop and block until it finishes.
+        Must not be called from the pool loop itself.
+        """
+        return self.submit(coro).result(timeout)
+
+    async def arun(self, coro):
+        """
+        Await `coro` on the pool loop from any event loop.
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self):
+        """
+        Close the shared clients' sessions on this loop and stop the loop thread.
+        """
+        if not self.loop.is_running():
+            return
+        try:
+            self.run(close_av_clients(), timeout=5)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> AlphaVantageSessionPool:
+    """
+    Return the process-wide session pool, starting it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AlphaVantageSessionPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def run_in_session_pool(coro, timeout: float = None):
+    """
+    Run `coro` on the shared pool loop and return its result (blocking).
+    """
+    return get_session_pool().run(coro, timeout)
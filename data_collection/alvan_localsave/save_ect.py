@@ -1,16 +1,19 @@
+import argparse
 import asyncio
-import aiohttp
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import pandas as pd
-import json
 import sys
 
 # Add project root
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-from alvan_dc.ec_transcript_fetcher import AlphaVantageEarningCallFetcher
+from data_collection.alvan_dc.client import get_av_client
+from data_collection.storage import DEFAULT_COMPRESSION
+from data_collection.ingest_pipeline import IngestJob, StreamingIngest
+from data_collection.ingest_manifest import IngestManifest, FAILED
 
 # Load API key
 load_dotenv()
@@ -34,48 +37,40 @@ quarters = [
 ]
 
 # Fetch logic
-async def fetch_all_ec_transcripts(tickers, quarters, output_dir):
-    fetcher = AlphaVantageEarningCallFetcher(api_key=av_api)
-
-    async def fetch_and_save(ticker, quarter, session):
-        ticker_dir = output_dir / ticker
-        ticker_dir.mkdir(exist_ok=True)
-
-        output_file = ticker_dir / f"{quarter}.json"
-        if output_file.exists():
-            print(f"[SKIP] {ticker} {quarter} already exists")
-            return
-
-        result = await fetcher.fetch_ec_transcript(ticker, quarter, session=session)
-        if result:
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"[SAVED] {ticker} {quarter}")
-        else:
-            print(f"[FAILED] {ticker} {quarter}")
-
-    batch_size = 10 # 10*7
-    wait_time = 65
-
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(tickers), batch_size):
-            batch = tickers[i:i+batch_size]
-            print(f"\n Processing batch {i // batch_size + 1}")
-
-            tasks = []
-            for ticker in batch:
-                for quarter in quarters:
-                    tasks.append(fetch_and_save(ticker, quarter, session))
-
-            await asyncio.gather(*tasks)
-
-            if i + batch_size < len(tickers):
-                print(f"Sleeping {wait_time}s to avoid rate limit...")
-                await asyncio.sleep(wait_time)
+def report(job, status, error_class):
+    if status == FAILED:
+        print(f"[FAILED] {job.ticker} {job.period}: {error_class}")
+    else:
+        print(f"[SAVED] {job.ticker} {job.period} ({status})")
+
+async def fetch_all_ec_transcripts(tickers, quarters, output_dir, manifest: IngestManifest, max_age_days: float = None):
+    client = get_av_client(av_api)
+    # Only missing, failed or stale entries are fetched (see data_collection/ingest_manifest.py);
+    # the client's token bucket paces requests at the key's quota (config/api_config.py)
+    jobs = (
+        IngestJob(ticker, "EARNINGS_CALL_TRANSCRIPT", output_dir / ticker / f"{quarter}.json", period=quarter, quarter=quarter)
+        for ticker in tickers for quarter in quarters
+    )
+    ingest = StreamingIngest(client, manifest, max_age_days=max_age_days, on_result=report)
+    await ingest.run(jobs)
+    print(client.format_stats())
+    print(ingest.format_counts())
+    print(manifest.format_summary())
+    await client.close()
 
 # Entry
-async def main():
-    await fetch_all_ec_transcripts(tickers, quarters, output_dir)
+async def main(args):
+    manifest = IngestManifest(data_path / "ingest_manifest.sqlite", compression=args.compression)
+    await fetch_all_ec_transcripts(args.tickers or tickers, args.quarters or quarters, output_dir, manifest, args.max_age_days)
+    manifest.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Resume-safe earnings call transcript ingest")
+    parser.add_argument("--tickers", nargs="+", help="Default: all S&P 500 tickers")
+    parser.add_argument("--quarters", nargs="+", help="YYYYQM; default: the quarters listed above")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default=DEFAULT_COMPRESSION,
+                        help="Storage of new payloads (readers detect the format automatically)")
+    parser.add_argument("--max_age_days", type=float, default=None, help="Also refetch entries older than this")
+    args = parser.parse_args()
+    args.compression = None if args.compression == "none" else args.compression
+    asyncio.run(main(args))
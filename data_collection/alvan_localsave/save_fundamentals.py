@@ -1,17 +1,21 @@
+import argparse
 import asyncio
-import aiohttp
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import pandas as pd
-import json
 import sys
 
 # Setup path
 target_path = str(Path(__file__).resolve().parents[1])
 sys.path.append(target_path)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-from alvan_dc.fundamental_fetcher import AlphaVantageFundamentalFetcher
+from data_collection.alvan_dc.client import get_av_client
+from data_collection.storage import DEFAULT_COMPRESSION
+from data_collection.ingest_pipeline import IngestJob, StreamingIngest
+from data_collection.ingest_manifest import IngestManifest, OK
+from data_collection.fundamentals_planner import FundamentalsRefreshPlanner
 
 # Load API key
 load_dotenv()
@@ -31,48 +35,61 @@ tickers = df_sp500_full['Symbol'].to_list()
 fundamentals = ["OVERVIEW", "INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW", "EARNINGS", "DIVIDENDS"]
 
 # Fetch Function
-async def fetch_all_fundamentals(tickers, output_dir):
-    fetcher = AlphaVantageFundamentalFetcher(api_key=av_api)
-
-    async def fetch_and_save(ticker, func_name, session):
-        output_ticker_dir = output_dir / ticker
-        output_ticker_dir.mkdir(exist_ok=True)
-        output_file = output_ticker_dir / f"{func_name}.json"
-
-        if output_file.exists():
-            print(f"[SKIP] {ticker} - {func_name} already exists")
-            return
-
-        result = await fetcher.fetch_fundamental(ticker, func_name, session=session)
-        if result:
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"[SAVED] {ticker} - {func_name}")
-        else:
-            print(f"[FAILED] {ticker} - {func_name}")
-
-    batch_size = 12 # 12*6=72
-    wait_time = 65
-
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(tickers), batch_size):
-            batch = tickers[i:i+batch_size]
-            print(f"\n Processing batch {i // batch_size + 1}")
-
-            tasks = []
-            for ticker in batch:
-                for func in fundamentals:
-                    tasks.append(fetch_and_save(ticker, func, session))
-
-            await asyncio.gather(*tasks)
-
-            if i + batch_size < len(tickers):
-                print(f"Sleeping {wait_time}s to avoid rate limit...")
-                await asyncio.sleep(wait_time)
+def report(job, status, error_class):
+    if status == OK:
+        print(f"[SAVED] {job.ticker} - {job.dataset}")
+    else:
+        print(f"[{status.upper()}] {job.ticker} - {job.dataset}: {error_class}")
+
+async def fetch_all_fundamentals(tickers, output_dir, manifest: IngestManifest, max_age_days: float = None):
+    client = get_av_client(av_api)
+    # Only missing, failed or stale entries are fetched (see data_collection/ingest_manifest.py);
+    # the client's token bucket paces requests at the key's quota (config/api_config.py)
+    jobs = (IngestJob(ticker, func, output_dir / ticker / f"{func}.json") for ticker in tickers for func in fundamentals)
+    ingest = StreamingIngest(client, manifest, max_age_days=max_age_days, on_result=report)
+    await ingest.run(jobs)
+    print(client.format_stats())
+    print(ingest.format_counts())
+    print(manifest.format_summary())
+    await client.close()
+
+async def refresh_reported_fundamentals(tickers, output_dir, manifest: IngestManifest):
+    """
+    Earnings-calendar-aware refresh (see data_collection/fundamentals_planner.py): probe
+    OVERVIEW/EARNINGS where needed, then fetch only the statements of tickers that reported.
+    """
+    client = get_av_client(av_api)
+    planner = FundamentalsRefreshPlanner(output_dir, manifest)
+    probes = planner.probes(tickers)
+    probe_ingest = StreamingIngest(client, manifest, on_result=report)
+    await probe_ingest.run(planner.jobs(probes), planned=True)
+
+    updates = planner.updates(tickers, already_planned={(ticker, dataset) for ticker, dataset, _ in probes})
+    update_ingest = StreamingIngest(client, manifest, on_result=report)
+    await update_ingest.run(planner.jobs(updates), planned=True)
+
+    print(client.format_stats())
+    print(planner.format_reasons(len(tickers)))
+    print(manifest.format_summary())
+    await client.close()
 
 # Entry
-async def main():
-    await fetch_all_fundamentals(tickers, output_dir)
+async def main(args):
+    manifest = IngestManifest(data_path / "ingest_manifest.sqlite", compression=args.compression)
+    if args.all:
+        await fetch_all_fundamentals(args.tickers or tickers, output_dir, manifest, args.max_age_days)
+    else:
+        await refresh_reported_fundamentals(args.tickers or tickers, output_dir, manifest)
+    manifest.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Resume-safe fundamentals ingest")
+    parser.add_argument("--tickers", nargs="+", help="Default: all S&P 500 tickers")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default=DEFAULT_COMPRESSION,
+                        help="Storage of new payloads (readers detect the format automatically)")
+    parser.add_argument("--all", action="store_true",
+                        help="Fetch every missing/failed/stale dataset instead of planning from the earnings calendar")
+    parser.add_argument("--max_age_days", type=float, default=None, help="With --all: also refetch entries older than this")
+    args = parser.parse_args()
+    args.compression = None if args.compression == "none" else args.compression
+    asyncio.run(main(args))
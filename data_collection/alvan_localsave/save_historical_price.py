@@ -1,61 +1,184 @@
+import argparse
 import asyncio
-import aiohttp
+from collections import Counter
+from datetime import date, datetime
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import pandas as pd
-import json
 import sys
 
 # Add project path to sys.path
 target_path = str(Path(__file__).resolve().parents[1])
 sys.path.append(target_path)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 from alvan_dc.historical_price import AlphaVantageHistPriceFetcher
+from data_collection.storage import DEFAULT_COMPRESSION, find_variant, load_json, write_logical_json
 
 # Load API key from .env file
 load_dotenv()
 av_api = os.getenv("alphavantage_api_key")
-print(av_api)
 # Define paths
 parent_path = Path(__file__).resolve().parents[2]
 data_path = parent_path / "Data"
 output_dir = data_path / "hist_price_jsons"
-output_dir.mkdir(parents=True, exist_ok=True)
-
-# Load tickers
-df_sp500_full = pd.read_csv(data_path / "sp500_list.csv", dtype={'CIK': str})
-tickers = df_sp500_full['Symbol'].to_list()
-
-# General fetch function
-async def fetch_all(tickers, output_dir):
-    fetcher = AlphaVantageHistPriceFetcher(api_key=av_api, outputsize="full")
-
-    async def fetch_and_save(ticker, session):
-        result = await fetcher.fetch_adjdaily(ticker, session=session)
-        for symbol, data in result.items():
-            output_file = output_dir / f"{symbol}_hp.json"
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"Saved {symbol}.json")
-
-    batch_size = 75
-    wait_time = 65
-
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(tickers), batch_size):
-            batch = tickers[i:i+batch_size]
-            print(f"Processing batch {i//batch_size + 1}")
-            tasks = [fetch_and_save(ticker, session) for ticker in batch]
-            await asyncio.gather(*tasks)
-
-            if i + batch_size < len(tickers):
-                print(f"Sleeping {wait_time}s before next batch...")
-                await asyncio.sleep(wait_time)
+
+
+def load_sp500_tickers() -> list:
+    # Read at run time, not import time, so the refresh helpers import without Data/
+    df_sp500_full = pd.read_csv(data_path / "sp500_list.csv", dtype={'CIK': str})
+    return df_sp500_full['Symbol'].to_list()
+
+# 'compact' returns the latest 100 trading days; below 100 calendar days of gap it always overlaps the stored history
+COMPACT_MAX_GAP_DAYS = 100
+
+
+def load_stored_series(path: Path) -> dict:
+    """
+    Returns:
+        dict: {date: bar} stored for the ticker (plain, .gz or .zst), or None if there is no
+              usable file.
+    """
+    stored = find_variant(path)
+    if stored is None:
+        return None
+    try:
+        data = load_json(stored)
+    except (OSError, ValueError, EOFError):
+        return None
+    series = next(iter(data.values()), None) if isinstance(data, dict) else None
+    return series or None
+
+
+def write_series_atomic(path: Path, ticker: str, series: dict, compression=DEFAULT_COMPRESSION) -> int:
+    """
+    Atomically write {ticker: series} as logical file `path` with `compression`, replacing
+    any other stored variant, so readers never see a half-written or outdated file.
+
+    Returns:
+        int: Bytes on disk.
+    """
+    return write_logical_json(path, {ticker: dict(sorted(series.items(), reverse=True))}, compression)
+
+
+def has_corporate_action(rows: dict) -> bool:
+    """
+    A dividend or split in `rows` changes the adjusted close of every earlier day.
+    """
+    for bar in rows.values():
+        if float(bar.get("7. dividend amount", 0) or 0) != 0:
+            return True
+        if float(bar.get("8. split coefficient", 1) or 1) != 1:
+            return True
+    return False
+
+
+def plan_refresh(stored: dict, today: date, force_full: bool = False) -> str:
+    """
+    Returns:
+        str: "full", "compact" or "skip" (already has today's bar).
+    """
+    if force_full or not stored:
+        return "full"
+    last = datetime.strptime(max(stored), "%Y-%m-%d").date()
+    gap = (today - last).days
+    if gap <= 0:
+        return "skip"
+    return "compact" if gap < COMPACT_MAX_GAP_DAYS else "full"
+
+
+def merge_compact(stored: dict, compact: dict):
+    """
+    Merge the rows of a compact fetch that are newer than the stored history.
+
+    Returns:
+        tuple: (merged series, number of new rows), or (None, 0) if the stored adjusted
+               history is stale (corporate action in the new rows, or adjusted closes that
+               no longer match on the overlap) and a full refetch is needed.
+    """
+    last = max(stored)
+    if min(compact) > last:
+        return None, 0
+    new_rows = {d: bar for d, bar in compact.items() if d > last}
+    if has_corporate_action(new_rows):
+        return None, 0
+    if last in compact and compact[last].get("5. adjusted close") != stored[last].get("5. adjusted close"):
+        return None, 0
+    return {**stored, **new_rows}, len(new_rows)
+
+
+async def refresh_all(tickers, output_dir, force_full: bool = False, compression=DEFAULT_COMPRESSION):
+    """
+    Bring every {ticker}_hp.json up to date: fetch 'compact' and append the new rows when
+    the gap allows it, re-download the full history only when there is none yet, the gap is
+    too large, or a split/dividend means the adjusted history has to be recomputed.
+
+    Args:
+        compression (str, optional): Storage of rewritten files ("gzip", "zstd" or None for
+            plain JSON); stored files are read in any format.
+    """
+    compact_fetcher = AlphaVantageHistPriceFetcher(api_key=av_api, outputsize="compact")
+    full_fetcher = AlphaVantageHistPriceFetcher(api_key=av_api, outputsize="full", client=compact_fetcher.client)
+    today = date.today()
+    counts = Counter()
+
+    async def fetch_full(ticker):
+        return (await full_fetcher.fetch_adjdaily(ticker)).get(ticker)
+
+    async def refresh(ticker):
+        output_file = output_dir / f"{ticker}_hp.json"
+        stored = load_stored_series(output_file)
+        plan = plan_refresh(stored, today, force_full)
+        if plan == "skip":
+            counts["skipped"] += 1
+            return
+
+        series, new_rows = None, 0
+        if plan == "compact":
+            compact = (await compact_fetcher.fetch_adjdaily(ticker)).get(ticker)
+            if not compact:
+                counts["failed"] += 1
+                print(f"[FAILED] {ticker} compact")
+                return
+            series, new_rows = merge_compact(stored, compact)
+            if series is None:
+                print(f"[FULL] {ticker}: adjusted history changed, refetching")
+                counts["full_after_compact"] += 1
+            elif not new_rows:
+                counts["up_to_date"] += 1
+                return
+
+        if series is None:
+            series = await fetch_full(ticker)
+            if not series:
+                counts["failed"] += 1
+                print(f"[FAILED] {ticker} full")
+                return
+            new_rows = len(series) - len(stored or {})
+            plan = "full"
+
+        counts[plan] += 1
+        counts["rows_added"] += max(new_rows, 0)
+        counts["bytes_written"] += write_series_atomic(output_file, ticker, series, compression)
+        print(f"[SAVED] {ticker} ({plan}, +{new_rows} rows)")
+
+    # The client's token bucket paces requests at the key's quota (config/api_config.py)
+    await asyncio.gather(*(refresh(ticker) for ticker in tickers))
+    print(compact_fetcher.client.format_stats())
+    print("Refresh summary: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    await compact_fetcher.client.close()
 
 # Main entry
-async def main():
-    await fetch_all(tickers, output_dir)
+async def main(args):
+    await refresh_all(args.tickers or load_sp500_tickers(), output_dir, force_full=args.full, compression=args.compression)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Incrementally refresh Data/hist_price_jsons from Alpha Vantage")
+    parser.add_argument("--tickers", nargs="+", help="Default: all S&P 500 tickers")
+    parser.add_argument("--full", action="store_true", help="Re-download the full history of every ticker")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default=DEFAULT_COMPRESSION,
+                        help="Storage of rewritten files (readers detect the format automatically)")
+    args = parser.parse_args()
+    args.compression = None if args.compression == "none" else args.compression
+    asyncio.run(main(args))
@@ -1,14 +1,13 @@
+import argparse
 import asyncio
-import aiohttp
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import pandas as pd
-import json
 import sys
-target_path = str(Path(__file__).resolve().parents[1])
-sys.path.append(target_path)
-from alvan_dc.news_fetcher import AlphaVantageNewsFetcher
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from data_collection.news_store import NewsStore, ingest_news, ingest_news_batched, import_legacy_news
+from data_collection.storage import DEFAULT_COMPRESSION
 
 # Load API key from .env file
 load_dotenv()
@@ -17,49 +16,40 @@ av_api = os.getenv("alphavantage_api_key")
 # Define paths
 parent_path = Path(__file__).resolve().parents[2]
 data_path = parent_path / "Data"
-output_dir_before2025 = data_path / "news_jsons" / "news_jsons_before2025"
-output_dir_after2025 = data_path / "news_jsons" / "news_jsons_after2025"
-output_dir_before2025.mkdir(parents=True, exist_ok=True)
-output_dir_after2025.mkdir(parents=True, exist_ok=True)
+legacy_dirs = [
+    data_path / "news_jsons" / "news_jsons_before2025",
+    data_path / "news_jsons" / "news_jsons_after2025",
+]
 
 # Load tickers
 df_sp500_full = pd.read_csv(data_path / "sp500_list.csv", dtype={'CIK': str})
 tickers = df_sp500_full['Symbol'].to_list()
 
-# General fetch function
-async def fetch_range(tickers, time_from, time_to, output_dir):
-    fetcher = AlphaVantageNewsFetcher(
-        api_key=av_api,
-        time_from=time_from,
-        time_to=time_to
-    )
-
-    async def fetch_and_save(ticker, session):
-        result = await fetcher.fetch_news(ticker, session=session)
-        for symbol, _ in result.items():
-            output_file = output_dir / f"{symbol}.json"
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"Saved {symbol}.json")
-
-    batch_size = 75
-    wait_time = 65
-
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(tickers), batch_size):
-            batch = tickers[i:i+batch_size]
-            print(f"Processing batch {i//batch_size + 1} for {time_from} to {time_to}")
-            tasks = [fetch_and_save(ticker, session) for ticker in batch]
-            await asyncio.gather(*tasks)
-
-            if i + batch_size < len(tickers):
-                print(f"Sleeping {wait_time}s before next batch...")
-                await asyncio.sleep(wait_time)
-
 # Main entry
-async def main():
-    await fetch_range(tickers, "20240101T0130", "20241231T0130", output_dir_before2025)
-    await fetch_range(tickers, "20250101T0000", "20251231T2359", output_dir_after2025)
+async def main(args):
+    compression = None if args.compression == "none" else args.compression
+    store = NewsStore(data_path / "news_jsons" / "news_store", overlap_minutes=args.overlap_minutes, compression=compression)
+    if args.import_legacy:
+        print(f"Imported {import_legacy_news(store, legacy_dirs)} articles from the calendar-window files")
+    if args.batched:
+        await ingest_news_batched(
+            args.tickers or tickers, store, api_key=av_api, default_from=args.since, topics=args.topics,
+            max_sweep_days=args.max_sweep_days, min_articles=args.min_articles, fallback=not args.no_fallback
+        )
+    else:
+        await ingest_news(args.tickers or tickers, store, api_key=av_api, default_from=args.since)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Append-only news ingest: fetch only articles newer than each ticker's watermark")
+    parser.add_argument("--tickers", nargs="+", help="Default: all S&P 500 tickers")
+    parser.add_argument("--since", default="20240101T0000", help="Start time (YYYYMMDDTHHMM) for tickers with no stored news")
+    parser.add_argument("--overlap_minutes", type=int, default=24 * 60, help="Re-query this far before the watermark for late-indexed articles")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default=DEFAULT_COMPRESSION,
+                        help="Storage of new ticker files (readers detect the format automatically)")
+    parser.add_argument("--batched", action="store_true", help="Sweep the market-wide feed once and fan out by ticker_sentiment")
+    parser.add_argument("--topics", nargs="+", help="Extra topic queries for the batched sweep, e.g. earnings technology")
+    parser.add_argument("--max_sweep_days", type=float, default=7, help="Tickers needing older news than this use per-ticker queries")
+    parser.add_argument("--min_articles", type=int, default=1, help="Per-ticker fallback when the sweep found fewer articles (0: trust the sweep)")
+    parser.add_argument("--no_fallback", action="store_true", help="Only record coverage gaps, don't query them per ticker")
+    parser.add_argument("--import_legacy", action="store_true", help="Seed the store from news_jsons_before2025/after2025 first")
+    asyncio.run(main(parser.parse_args()))
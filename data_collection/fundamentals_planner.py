@@ -0,0 +1,219 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from config.api_config import fundamentals_refresh_config
+from data_collection.ingest_manifest import EMPTY, FAILED, IngestManifest
+from data_collection.ingest_pipeline import IngestJob
+from data_collection.storage import find_variant, load_json
+
+STATEMENTS = ("INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW")
+FUNDAMENTALS = ("OVERVIEW",) + STATEMENTS + ("EARNINGS", "DIVIDENDS")
+
+
+def _parse_date(value) -> date:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def reported_quarters(earnings: dict, today: date) -> list:
+    """
+    Returns:
+        list: (fiscal_date_ending, reported_date) of the quarters in an EARNINGS payload that
+              have actually been reported by `today`, newest first.
+    """
+    quarters = []
+    for q in (earnings or {}).get("quarterlyEarnings") or []:
+        fiscal_end, reported = _parse_date(q.get("fiscalDateEnding")), _parse_date(q.get("reportedDate"))
+        if fiscal_end and reported and reported <= today and q.get("reportedEPS") not in (None, "None", ""):
+            quarters.append((fiscal_end, reported))
+    return sorted(quarters, reverse=True)
+
+
+def latest_statement_quarter(statement: dict) -> date:
+    dates = [_parse_date(r.get("fiscalDateEnding")) for r in (statement or {}).get("quarterlyReports") or []]
+    return max((d for d in dates if d), default=None)
+
+
+def expected_next_report(quarters: list) -> date:
+    """
+    Earliest plausible date of the next report: the fiscal quarter after the latest one,
+    plus the shortest filing lag of the last four quarters.
+
+    Args:
+        quarters (list): Output of `reported_quarters`.
+    """
+    if not quarters:
+        return None
+    latest_end = quarters[0][0]
+    lag = min((reported - fiscal_end).days for fiscal_end, reported in quarters[:4])
+    return latest_end + timedelta(days=91 + lag)
+
+
+class FundamentalsRefreshPlanner:
+    def __init__(
+        self,
+        output_dir,
+        manifest: IngestManifest,
+        today: date = None,
+        overview_max_age_days: float = fundamentals_refresh_config["overview_max_age_days"],
+        report_margin_days: float = fundamentals_refresh_config["report_margin_days"],
+        probe_interval_days: float = fundamentals_refresh_config["probe_interval_days"],
+        earnings_max_age_days: float = fundamentals_refresh_config["earnings_max_age_days"],
+        statement_retry_hours: float = fundamentals_refresh_config["statement_retry_hours"]
+    ):
+        """
+        Plans a fundamentals refresh from the earnings calendar instead of refetching all six
+        datasets of every ticker. Statements only change when a company reports, so a run is
+        two phases:
+
+        1. probes: EARNINGS only for tickers whose next report is due (expected from past
+           reportedDate - fiscalDateEnding lags), and OVERVIEW only past its max age;
+        2. updates: the statements and OVERVIEW whose latest quarter is older than the latest
+           reported quarter (from the refreshed EARNINGS / OVERVIEW.LatestQuarter), and DIVIDENDS
+           after a report. A dataset Alpha Vantage hasn't updated yet is retried on a later run.
+
+        Missing or failed entries are always fetched. Fetch times come from the manifest.
+
+        Args:
+            output_dir: Data/fundamental_jsons ({ticker}/{dataset}.json).
+            manifest (IngestManifest): Fetch history of every (ticker, dataset).
+            today (date, optional): Planning date; defaults to the real date.
+        """
+        self.output_dir = Path(output_dir)
+        self.manifest = manifest
+        self.today = today or date.today()
+        self.now = datetime.combine(self.today, datetime.now().time())
+        self.overview_max_age = timedelta(days=overview_max_age_days)
+        self.report_margin = timedelta(days=report_margin_days)
+        self.probe_interval = timedelta(days=probe_interval_days)
+        self.earnings_max_age = timedelta(days=earnings_max_age_days)
+        self.statement_retry = timedelta(hours=statement_retry_hours)
+        self.reasons = Counter()
+
+    def path(self, ticker: str, dataset: str) -> Path:
+        return self.output_dir / ticker / f"{dataset}.json"
+
+    def _entry(self, ticker: str, dataset: str) -> dict:
+        """
+        The manifest entry of a stored dataset, or None if it has to be fetched regardless
+        (never fetched, failed, or its file is gone).
+        """
+        stored = find_variant(self.path(ticker, dataset))
+        if stored is None:
+            return None
+        entry = self.manifest.get(ticker, dataset)
+        if entry is None:
+            entry = self.manifest.reconcile_file(ticker, dataset, "", stored)
+        if entry["status"] == FAILED:
+            return None
+        return dict(entry, fetched_at=datetime.fromisoformat(entry["fetched_at"]))
+
+    def _load(self, ticker: str, dataset: str) -> dict:
+        stored = find_variant(self.path(ticker, dataset))
+        try:
+            return load_json(stored) if stored is not None else None
+        except (OSError, ValueError, EOFError):
+            return None
+
+    def _plan(self, planned: list, ticker: str, dataset: str, reason: str):
+        planned.append((ticker, dataset, reason))
+        self.reasons[f"{dataset}:{reason}"] += 1
+
+    def probes(self, tickers) -> list:
+        """
+        Phase 1: missing datasets, OVERVIEW past its max age, EARNINGS of tickers due to report.
+
+        Returns:
+            list: (ticker, dataset, reason)
+        """
+        planned = []
+        for ticker in tickers:
+            entries = {dataset: self._entry(ticker, dataset) for dataset in FUNDAMENTALS}
+            for dataset in STATEMENTS + ("DIVIDENDS",):
+                if entries[dataset] is None:
+                    self._plan(planned, ticker, dataset, "missing")
+
+            overview = entries["OVERVIEW"]
+            if overview is None:
+                self._plan(planned, ticker, "OVERVIEW", "missing")
+            elif self.now - overview["fetched_at"] >= self.overview_max_age:
+                self._plan(planned, ticker, "OVERVIEW", "max_age")
+
+            earnings = entries["EARNINGS"]
+            if earnings is None:
+                self._plan(planned, ticker, "EARNINGS", "missing")
+                continue
+            fetched_at = earnings["fetched_at"]
+            if self.now - fetched_at >= self.earnings_max_age:
+                self._plan(planned, ticker, "EARNINGS", "max_age")
+                continue
+            expected = expected_next_report(reported_quarters(self._load(ticker, "EARNINGS"), self.today))
+            if expected is None:
+                continue
+            due_from = datetime.combine(expected - self.report_margin, datetime.min.time())
+            # Due: the report window opened after the last probe, or it's still awaited and the probe interval passed
+            if self.now >= due_from and (fetched_at < due_from or self.now - fetched_at >= self.probe_interval):
+                self._plan(planned, ticker, "EARNINGS", "report_due")
+        return planned
+
+    def _retry_due(self, entry: dict) -> bool:
+        return entry is not None and self.now - entry["fetched_at"] >= self.statement_retry
+
+    def updates(self, tickers, already_planned: set = frozenset()) -> list:
+        """
+        Phase 2 (after the probes are stored): statements and OVERVIEW behind the latest reported
+        quarter, and DIVIDENDS fetched before the latest report. A report earlier than expected
+        shows up as OVERVIEW.LatestQuarter ahead of EARNINGS, which then is refetched here too.
+
+        Args:
+            already_planned (set): (ticker, dataset) fetched in phase 1, not planned again.
+
+        Returns:
+            list: (ticker, dataset, reason)
+        """
+        planned = []
+        for ticker in tickers:
+            quarters = reported_quarters(self._load(ticker, "EARNINGS"), self.today)
+            earnings_quarter = quarters[0][0] if quarters else None
+            overview_quarter = _parse_date((self._load(ticker, "OVERVIEW") or {}).get("LatestQuarter"))
+            if overview_quarter and overview_quarter > self.today:
+                overview_quarter = None
+            latest_quarter = max(filter(None, (earnings_quarter, overview_quarter)), default=None)
+            if latest_quarter is None:
+                continue
+            earnings_behind = earnings_quarter is None or earnings_quarter < latest_quarter
+
+            if earnings_behind and (ticker, "EARNINGS") not in already_planned and self._retry_due(self._entry(ticker, "EARNINGS")):
+                self._plan(planned, ticker, "EARNINGS", "reported")
+
+            entry = self._entry(ticker, "OVERVIEW")
+            if (ticker, "OVERVIEW") not in already_planned and self._retry_due(entry):
+                if overview_quarter is not None and overview_quarter < latest_quarter:
+                    self._plan(planned, ticker, "OVERVIEW", "reported")
+
+            for dataset in STATEMENTS:
+                entry = self._entry(ticker, dataset)
+                if (ticker, dataset) in already_planned or not self._retry_due(entry) or entry["status"] == EMPTY:
+                    continue
+                stored_quarter = latest_statement_quarter(self._load(ticker, dataset))
+                if stored_quarter is None or stored_quarter < latest_quarter:
+                    self._plan(planned, ticker, dataset, "reported")
+
+            entry = self._entry(ticker, "DIVIDENDS")
+            if (ticker, "DIVIDENDS") not in already_planned and self._retry_due(entry):
+                if earnings_behind or (quarters and entry["fetched_at"].date() <= quarters[0][1]):
+                    self._plan(planned, ticker, "DIVIDENDS", "reported")
+        return planned
+
+    def jobs(self, planned: list) -> list:
+        return [IngestJob(ticker, dataset, self.path(ticker, dataset)) for ticker, dataset, _ in planned]
+
+    def format_reasons(self, n_tickers: int) -> str:
+        total = sum(self.reasons.values())
+        lines = [f"Planned {total} calls for {n_tickers} tickers (full refresh: {n_tickers * len(FUNDAMENTALS)})"]
+        lines += [f"  {reason:<34}{n:>7}" for reason, n in sorted(self.reasons.items())]
+        return "\n".join(lines)
@@ -1,132 +1,357 @@
 from pathlib import Path
-import json
-from dotenv import load_dotenv
+import argparse
+import html
 import os
-from edgar import *
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
 import pandas as pd
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from config.api_config import sec_edgar_config
+from data_collection.alvan_dc.client import TokenBucket
+from data_collection.storage import DEFAULT_COMPRESSION, find_variant, load_json, load_logical_json, open_text, write_logical_json
 
 load_dotenv()
 sec_id = os.getenv('sec_id')
 
-parent_path = Path().resolve().parent
-data_path = parent_path / "data"
+data_path = Path(__file__).resolve().parents[1] / "Data"
 output_dir = data_path / "company_sec_jsons"
-output_dir.mkdir(exist_ok=True)
+cache_dir = data_path / "sec_filings_cache"
 
-df_sp500_full = pd.read_csv(data_path / "sp500_list.csv", dtype={'CIK': str})
+# Sections kept per form as (part, item): (risk factors, MD&A, financial statements).
+# 10-Q item numbers repeat across parts (Part II Item 2 is unregistered equity sales), so the part matters.
+FORM_ITEMS = {
+    "10-K": (("PART I", "Item 1A"), ("PART II", "Item 7"), ("PART II", "Item 8")),
+    "10-Q": (("PART II", "Item 1A"), ("PART I", "Item 2"), ("PART I", "Item 1")),
+}
+NOT_AVAILABLE = "Not available"
+# Bump when section extraction changes: cached sections and company records of older
+# parsers are then re-extracted (from the raw document cache, without downloading)
+SECTION_PARSER = "part-items-1"
 
-set_identity(sec_id)
+# One EDGAR quota for every EdgarFilingSource and worker thread of the process
+edgar_limiter = TokenBucket(sec_edgar_config["calls_per_second"] * 60, burst=sec_edgar_config["burst"])
 
-for idx, row in df_sp500_full.iterrows(): 
-    cik = row['CIK']
-    ticker = row['Symbol']
-    company_name = row['Security']
-    company_sector = row['GICS Sector']
 
-    try:
-        company = Company(cik)
-        fillings = company.get_filings(form=['10-K', '10-Q']).head(4)
-    except Exception as e:
-        print(f"Failed to get filings for {ticker}: {e}")
-        continue
+def sections_from_items(form: str, get_item) -> dict:
+    """
+    Pick the risk factors / MD&A / financials sections of a filing; `get_item((part, item))`
+    returns the item text or None.
+    """
+    risk_item, mdna_item, financials_item = FORM_ITEMS.get(form, (("PART I", "Item 1A"), None, None))
+    return {
+        "risk_factors": (get_item(risk_item) if risk_item else None) or NOT_AVAILABLE,
+        "mdna": (get_item(mdna_item) if mdna_item else None) or NOT_AVAILABLE,
+        "financials": (get_item(financials_item) if financials_item else None) or NOT_AVAILABLE,
+    }
 
-    filing_data = []
 
-    for filing in fillings:
-        filing_obj = filing.obj()
-        form_type = filing_obj.form
-        filing_date = str(filing_obj.filing_date)
-
-        risk_factors = filing_obj['Item 1A'] if 'Item 1A' in filing_obj.items else "Not available"
-
-        if form_type == "10-K":
-            mdna = filing_obj['Item 7'] if 'Item 7' in filing_obj.items else "Not available"
-            financials = filing_obj['Item 8'] if 'Item 8' in filing_obj.items else "Not available"
-        elif form_type == "10-Q":
-            mdna = filing_obj['Item 2'] if 'Item 2' in filing_obj.items else "Not available"
-            financials = filing_obj['Item 1'] if 'Item 1' in filing_obj.items else "Not available"
-        else:
-            mdna = "Not available"
-            financials = "Not available"
-
-        filing_data.append({
-            "form": form_type,
-            "filing_date": filing_date,
-            "risk_factors": risk_factors,
-            "mdna": mdna,
-            "financials": financials
-        })
-
-    company_record = {
-        "cik": cik,
-        "ticker": ticker,
-        "company_name": company_name,
-        "company_sector": company_sector,
-        "filings": filing_data
-    }
+_PART_HEADING = re.compile(r"^[ \t]*part\s+(iv|i{1,3})\b", re.IGNORECASE | re.MULTILINE)
+_ITEM_HEADING = re.compile(r"^[ \t]*item\s+(\d+[a-z]?)\s*[\.:\-—]", re.IGNORECASE | re.MULTILINE)
+# Headings are title lines; longer lines starting with "Item 7." are prose or cross-references
+MAX_HEADING_CHARS = 200
 
-    filename = f"{ticker}_{cik}.json"
-    save_path = output_dir / filename
 
-    try:
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(company_record, f, indent=2, ensure_ascii=False)
-        print(f"Saved {filename}")
-    except Exception as e:
-        print(f"Failed to save {filename}: {e}")
+def _heading_lines(pattern, text: str) -> list:
+    matches = []
+    for match in pattern.finditer(text):
+        line_end = text.find("\n", match.start())
+        if (line_end if line_end != -1 else len(text)) - match.start() <= MAX_HEADING_CHARS:
+            matches.append(match)
+    return matches
+
+
+def split_items(text: str) -> dict:
+    """
+    Split a filing's plain text into {(part, "Item 1A"): text, ...} on "PART N" and "Item N."
+    heading lines; `part` is "PART I", "PART II", ... or None before the first part heading.
+    Headings also appear in the table of contents, so for each (part, item) the longest
+    section wins; an item section ends at the next item or part heading.
+    """
+    headings = sorted(
+        [(m.start(), "part", f"PART {m.group(1).upper()}") for m in _heading_lines(_PART_HEADING, text)]
+        + [(m.start(), "item", f"Item {m.group(1).upper()}") for m in _heading_lines(_ITEM_HEADING, text)]
+    )
+    items = {}
+    part = None
+    for (start, kind, name), following in zip(headings, headings[1:] + [None]):
+        if kind == "part":
+            part = name
+            continue
+        body = text[start:following[0] if following else len(text)].strip()
+        if len(body) > len(items.get((part, name), "")):
+            items[(part, name)] = body
+    return items
 
 
+def html_to_text(document: str) -> str:
+    document = re.sub(r"(?is)<(script|style).*?</\1>", " ", document)
+    document = re.sub(r"(?i)<br\s*/?>|</(p|div|tr|h\d|li)>", "\n", document)
+    document = html.unescape(re.sub(r"<[^>]+>", " ", document))
+    return "\n".join(" ".join(line.split()) for line in document.splitlines() if line.strip())
 
-        
 
-def get_company_filings(cik, n_filings=4):
+def sections_from_document(form: str, document: str, is_html: bool = True) -> dict:
+    """
+    Risk factors / MD&A / financials of one filing's primary document. Documents without
+    part headings fall back to matching the item alone.
+    """
+    text = html_to_text(document) if is_html else document
+    items = split_items(text)
+    return sections_from_items(form, lambda key: items.get(key) or items.get((None, key[1])))
+
+
+class FilingCache:
+    def __init__(self, root=cache_dir, compression=DEFAULT_COMPRESSION):
+        """
+        On-disk cache keyed by accession number: the raw primary document
+        (raw/{accession}.html.gz) and the extracted sections
+        (sections/{SECTION_PARSER}/{accession}.json). Filings never change once filed, so
+        entries never expire; when only the raw document is cached (e.g. after a
+        SECTION_PARSER change) it is re-parsed instead of downloaded again.
+        """
+        self.root = Path(root)
+        self.compression = compression
+        (self.root / "raw").mkdir(parents=True, exist_ok=True)
+        (self.root / "sections" / SECTION_PARSER).mkdir(parents=True, exist_ok=True)
+
+    def _sections_path(self, accession_no: str) -> Path:
+        return self.root / "sections" / SECTION_PARSER / f"{accession_no}.json"
+
+    def _raw_path(self, accession_no: str) -> Path:
+        return self.root / "raw" / f"{accession_no}.html.gz"
+
+    def get_sections(self, accession_no: str) -> dict:
+        try:
+            return load_logical_json(self._sections_path(accession_no))
+        except (FileNotFoundError, ValueError, EOFError):
+            return None
+
+    def put_sections(self, accession_no: str, record: dict):
+        write_logical_json(self._sections_path(accession_no), record, self.compression)
+
+    def get_raw(self, accession_no: str) -> str:
+        try:
+            with open_text(self._raw_path(accession_no)) as f:
+                return f.read() or None
+        except (OSError, EOFError):
+            return None
+
+    def put_raw(self, accession_no: str, document: str):
+        if document:
+            with open_text(self._raw_path(accession_no), "w", compression="gzip") as f:
+                f.write(document)
+
+
+class EdgarFilingSource:
+    def __init__(self, identity: str = sec_id, forms=("10-K", "10-Q"), limiter: TokenBucket = edgar_limiter):
+        """
+        Live filings from SEC EDGAR via edgartools. Every request waits on `limiter`, which
+        by default is shared by all sources and threads of the process.
+        """
+        from edgar import set_identity
+        set_identity(identity)
+        self.forms = list(forms)
+        self.limiter = limiter
+
+    def list_filings(self, cik: str, n_filings: int) -> list:
+        from edgar import Company
+        self.limiter.acquire_blocking()
+        return [
+            {"accession_no": f.accession_no, "form": f.form, "filing_date": str(f.filing_date), "filing": f}
+            for f in Company(cik).get_filings(form=self.forms).head(n_filings)
+        ]
+
+    def fetch(self, meta: dict, cache: FilingCache) -> dict:
+        """
+        Download the primary document once (or take it from the raw cache) and split the
+        sections out of it, instead of letting edgartools download it again for filing.obj().
+        """
+        document = cache.get_raw(meta["accession_no"])
+        if document is None:
+            self.limiter.acquire_blocking()
+            document = meta["filing"].html()
+            if not document:
+                self.limiter.acquire_blocking()
+                document = meta["filing"].text()
+            cache.put_raw(meta["accession_no"], document)
+        return sections_from_document(meta["form"], document)
+
+
+class LocalFilingSource:
+    def __init__(self, root):
+        """
+        Saved filings on disk, for offline runs and tests:
+        {root}/{cik}/{form}_{filing_date}_{accession_no}.html|.htm|.txt (optionally .gz/.zst).
+        """
+        self.root = Path(root)
+
+    def list_filings(self, cik: str, n_filings: int) -> list:
+        company_dir = self.root / str(cik)
+        if not company_dir.is_dir():
+            raise FileNotFoundError(f"No saved filings for CIK {cik} in {self.root}")
+        metas = []
+        for path in company_dir.iterdir():
+            name = re.sub(r"\.(gz|zst)$", "", path.name)
+            match = re.match(r"(10-[KQ])_(\d{4}-\d{2}-\d{2})_([\w-]+)\.(html?|txt)$", name)
+            if match:
+                form, filing_date, accession_no, _ = match.groups()
+                metas.append({"accession_no": accession_no, "form": form, "filing_date": filing_date, "path": path})
+        return sorted(metas, key=lambda m: m["filing_date"], reverse=True)[:n_filings]
+
+    def fetch(self, meta: dict, cache: FilingCache) -> dict:
+        with open_text(meta["path"]) as f:
+            document = f.read()
+        return sections_from_document(meta["form"], document, is_html=bool(re.search(r"\.html?", meta["path"].name)))
+
+
+def extract_filing(meta: dict, source, cache: FilingCache, stats: dict) -> dict:
+    """
+    Sections of one filing, from the cache when already extracted.
+    """
+    cached = cache.get_sections(meta["accession_no"])
+    if cached is not None:
+        stats["cached"] += 1
+        return cached
+    record = {
+        "accession_no": meta["accession_no"],
+        "form": meta["form"],
+        "filing_date": meta["filing_date"],
+        **source.fetch(meta, cache),
+    }
+    cache.put_sections(meta["accession_no"], record)
+    stats["extracted"] += 1
+    return record
+
+
+def get_company_filings(cik, n_filings=4, source=None, cache=None):
     """
     Extract recent 10-K and 10-Q filings for a given company CIK.
 
     Args:
         cik (str): The CIK of the company.
         n_filings (int): Number of recent filings to fetch (default: 4).
+        source (optional): EdgarFilingSource (default) or LocalFilingSource.
+        cache (FilingCache, optional): Accession-keyed cache; defaults to Data/sec_filings_cache.
 
     Returns:
         List[dict]: A list of filing information dictionaries.
     """
+    source = source or EdgarFilingSource()
+    cache = cache or FilingCache()
+    stats = {"cached": 0, "extracted": 0, "failed": 0}
     try:
-        company = Company(cik)
-        filings = company.get_filings(form=['10-K', '10-Q']).head(n_filings)
+        metas = source.list_filings(cik, n_filings)
     except Exception as e:
         print(f"Failed to get filings for {cik}: {e}")
         return []
 
     filing_data = []
-
-    for filing in filings:
+    for meta in metas:
         try:
-            filing_obj = filing.obj()
-            form_type = filing_obj.form
-            filing_date = str(filing_obj.filing_date)
-
-            # Extract the needed sections
-            risk_factors = filing_obj['Item 1A'] if 'Item 1A' in filing_obj.items else "Not available"
-            if form_type == "10-K":
-                mdna = filing_obj['Item 7'] if 'Item 7' in filing_obj.items else "Not available"
-                financials = filing_obj['Item 8'] if 'Item 8' in filing_obj.items else "Not available"
-            elif form_type == "10-Q":
-                mdna = filing_obj['Item 2'] if 'Item 2' in filing_obj.items else "Not available"
-                financials = filing_obj['Item 1'] if 'Item 1' in filing_obj.items else "Not available"
-            else:
-                mdna = "Not available"
-                financials = "Not available"
-
-            filing_data.append({
-                "form": form_type,
-                "filing_date": filing_date,
-                "risk_factors": risk_factors,
-                "mdna": mdna,
-                "financials": financials
-            })
+            filing_data.append(extract_filing(meta, source, cache, stats))
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"Failed to process filing {meta['accession_no']} for {cik}: {e}")
+    return filing_data
 
+
+class FilingPipeline:
+    def __init__(self, source, cache: FilingCache, output_dir=output_dir, max_workers: int = sec_edgar_config["max_workers"], n_filings: int = 4, compression=DEFAULT_COMPRESSION):
+        """
+        Concurrent per-company filing extraction. Companies are processed on a bounded thread
+        pool whose EDGAR requests share one rate limiter; filings already in the cache are not
+        downloaded or parsed again, and a company's record is only rewritten when its set of
+        recent filings changed.
+        """
+        self.source = source
+        self.cache = cache
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.n_filings = n_filings
+        self.compression = compression
+        self.stats = {"companies": 0, "written": 0, "unchanged": 0, "failed": 0, "cached": 0, "extracted": 0, "filing_failed": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+    def process_company(self, row: dict, force: bool = False) -> str:
+        cik, ticker = row["CIK"], row["Symbol"]
+        record_path = self.output_dir / f"{ticker}_{cik}.json"
+        try:
+            metas = self.source.list_filings(cik, self.n_filings)
         except Exception as e:
-            print(f"Failed to process a filing for {cik}: {e}")
-            continue
+            self._count(companies=1, failed=1)
+            print(f"Failed to get filings for {ticker}: {e}")
+            return "failed"
+
+        existing = find_variant(record_path)
+        if existing is not None and not force:
+            try:
+                stored = load_json(existing)
+                if stored.get("section_parser") == SECTION_PARSER and \
+                        [f.get("accession_no") for f in stored.get("filings", [])] == [m["accession_no"] for m in metas]:
+                    self._count(companies=1, unchanged=1)
+                    return "unchanged"
+            except (OSError, ValueError, EOFError):
+                pass
+
+        stats = {"cached": 0, "extracted": 0, "failed": 0}
+        filing_data = []
+        for meta in metas:
+            try:
+                filing_data.append(extract_filing(meta, self.source, self.cache, stats))
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"Failed to process filing {meta['accession_no']} for {ticker}: {e}")
+
+        company_record = {
+            "cik": cik,
+            "ticker": ticker,
+            "company_name": row.get("Security"),
+            "company_sector": row.get("GICS Sector"),
+            "section_parser": SECTION_PARSER,
+            "filings": filing_data
+        }
+        write_logical_json(record_path, company_record, self.compression)
+        self._count(companies=1, written=1, cached=stats["cached"], extracted=stats["extracted"], filing_failed=stats["failed"])
+        print(f"Saved {record_path.name} ({stats['extracted']} extracted, {stats['cached']} cached)")
+        return "written"
+
+    def run(self, rows: list, force: bool = False) -> dict:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.process_company, row, force) for row in rows]
+            for future in as_completed(futures):
+                future.result()
+        self.stats["elapsed_s"] = round(time.perf_counter() - start, 1)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract risk factors / MD&A / financials from recent 10-K and 10-Q filings")
+    parser.add_argument("--tickers", nargs="+", help="Default: all S&P 500 companies")
+    parser.add_argument("--local_dir", help="Read saved filings from this directory instead of EDGAR")
+    parser.add_argument("--workers", type=int, default=sec_edgar_config["max_workers"])
+    parser.add_argument("--n_filings", type=int, default=4)
+    parser.add_argument("--force", action="store_true", help="Rewrite company records even if their filings didn't change")
+    args = parser.parse_args()
+
+    df_sp500_full = pd.read_csv(data_path / "sp500_list.csv", dtype={'CIK': str})
+    if args.tickers:
+        df_sp500_full = df_sp500_full[df_sp500_full["Symbol"].isin(args.tickers)]
+
+    source = LocalFilingSource(args.local_dir) if args.local_dir else EdgarFilingSource()
+    pipeline = FilingPipeline(source, FilingCache(), max_workers=args.workers, n_filings=args.n_filings)
+    print(pipeline.run(df_sp500_full.to_dict("records"), force=args.force))
+
 
-    return filing_data
\ No newline at end of file
+if __name__ == "__main__":
+    main()
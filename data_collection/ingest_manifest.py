@@ -0,0 +1,222 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from data_collection.alvan_dc.client import AlphaVantageClient
+from data_collection.storage import find_variant, load_json, write_logical_json
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "Data"
+DEFAULT_MANIFEST_PATH = DATA_DIR / "ingest_manifest.sqlite"
+
+# Top-level keys a valid payload must have (any one of them)
+REQUIRED_KEYS = {
+    "OVERVIEW": ("Symbol",),
+    "INCOME_STATEMENT": ("annualReports", "quarterlyReports"),
+    "BALANCE_SHEET": ("annualReports", "quarterlyReports"),
+    "CASH_FLOW": ("annualReports", "quarterlyReports"),
+    "EARNINGS": ("annualEarnings", "quarterlyEarnings"),
+    "DIVIDENDS": ("data",),
+    "EARNINGS_CALL_TRANSCRIPT": ("transcript",),
+}
+
+OK, EMPTY, FAILED = "ok", "empty", "failed"
+
+
+def validate_payload(dataset: str, payload):
+    """
+    Classify an Alpha Vantage payload before it is committed to disk.
+
+    Returns:
+        tuple: (status, error_class) — status is "ok", "empty" (valid but no data, e.g. no
+               transcript for the quarter) or "failed"; error_class is None when ok.
+    """
+    if payload is None:
+        return FAILED, "fetch_failed"
+    if not isinstance(payload, dict):
+        return FAILED, "invalid_type"
+    if not payload:
+        return EMPTY, "empty"
+    if AlphaVantageClient.is_rate_limited(payload):
+        return FAILED, "rate_limited"
+    if "Information" in payload:
+        return FAILED, "information"
+    if "Error Message" in payload:
+        return FAILED, "api_error"
+    if all(value is None for value in payload.values()):
+        # Fetchers return {ticker: None} when the request failed
+        return FAILED, "fetch_failed"
+    required = REQUIRED_KEYS.get(dataset)
+    if required and not any(key in payload for key in required):
+        return FAILED, "unexpected_schema"
+    if required and not any(payload.get(key) for key in required):
+        return EMPTY, "empty"
+    return OK, None
+
+
+def failure_detail(payload) -> str:
+    """
+    The API's own message of a failed payload (Note / Information / Error Message), truncated.
+    """
+    if not isinstance(payload, dict):
+        return None
+    return str(payload.get("Note") or payload.get("Information") or payload.get("Error Message") or "")[:500] or None
+
+
+def content_hash(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class IngestManifest:
+    def __init__(self, path=DEFAULT_MANIFEST_PATH, compression=None):
+        """
+        SQLite record of every (ticker, dataset, period) the ingest scripts fetch: status,
+        content hash, fetch time, error class and attempt count. Resume only retries entries
+        that failed, went stale or lost their file, instead of trusting "file exists".
+
+        Paths passed in are logical ('A/OVERVIEW.json'); the payload is stored compact, with
+        `compression`, and any existing plain/.gz/.zst variant counts as present.
+
+        Args:
+            path: SQLite database file.
+            compression (str, optional): "gzip", "zstd" or None for payloads written by `commit`.
+        """
+        self.path = Path(path)
+        self.compression = compression
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    ticker TEXT NOT NULL,
+                    dataset TEXT NOT NULL,
+                    period TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL,
+                    content_hash TEXT,
+                    fetched_at TEXT NOT NULL,
+                    error_class TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (ticker, dataset, period)
+                )"""
+            )
+
+    def get(self, ticker: str, dataset: str, period: str = "") -> dict:
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM entries WHERE ticker = ? AND dataset = ? AND period = ?", (ticker, dataset, period)
+            )
+            row = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    _UPSERT = """INSERT INTO entries (ticker, dataset, period, status, content_hash, fetched_at, error_class, error, attempts)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+                 ON CONFLICT (ticker, dataset, period) DO UPDATE SET
+                     status = excluded.status,
+                     content_hash = COALESCE(excluded.content_hash, entries.content_hash),
+                     fetched_at = excluded.fetched_at,
+                     error_class = excluded.error_class,
+                     error = excluded.error,
+                     attempts = entries.attempts + 1"""
+
+    def record(self, ticker: str, dataset: str, period: str, status: str, payload_hash: str = None, error_class: str = None, error: str = None, fetched_at: str = None):
+        self.record_many([(ticker, dataset, period, status, payload_hash, error_class, error, fetched_at)])
+
+    def record_many(self, rows: list):
+        """
+        Record several outcomes in one transaction.
+
+        Args:
+            rows (list): (ticker, dataset, period, status, payload_hash, error_class, error, fetched_at) tuples;
+                         fetched_at None means now.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                self._UPSERT,
+                [(ticker, dataset, period, status, payload_hash, fetched_at or now, error_class, error)
+                 for ticker, dataset, period, status, payload_hash, error_class, error, fetched_at in rows]
+            )
+
+    def reconcile_file(self, ticker: str, dataset: str, period: str, path: Path) -> dict:
+        """
+        Register a file saved before the manifest existed, validating its content the same way
+        a fresh payload is, so rate-limit messages saved as data are found and refetched.
+        """
+        try:
+            payload = load_json(path)
+        except (OSError, ValueError, EOFError) as e:
+            payload, error = None, f"{type(e).__name__}: {e}"
+        else:
+            error = None
+        status, error_class = validate_payload(dataset, payload)
+        if error:
+            error_class = "unreadable_file"
+        fetched_at = datetime.fromtimestamp(Path(path).stat().st_mtime).isoformat(timespec="seconds")
+        self.record(
+            ticker, dataset, period, status,
+            payload_hash=content_hash(payload) if status != FAILED else None,
+            error_class=error_class, error=error, fetched_at=fetched_at
+        )
+        return self.get(ticker, dataset, period)
+
+    def needs_fetch(self, ticker: str, dataset: str, period: str, path: Path, max_age_days: float = None) -> bool:
+        """
+        True if the entry is missing, failed, stale (older than `max_age_days`) or its file is gone.
+        """
+        stored = find_variant(path)
+        entry = self.get(ticker, dataset, period)
+        if entry is None:
+            if stored is None:
+                return True
+            entry = self.reconcile_file(ticker, dataset, period, stored)
+        if entry["status"] == FAILED:
+            return True
+        if stored is None:
+            return True
+        if max_age_days is not None:
+            fetched_at = datetime.fromisoformat(entry["fetched_at"])
+            return datetime.now() - fetched_at > timedelta(days=max_age_days)
+        return False
+
+    def commit(self, ticker: str, dataset: str, period: str, payload, path: Path) -> str:
+        """
+        Validate `payload`; write it atomically to `path` unless it failed, and record the outcome.
+        Invalid payloads (rate-limit notes, API errors, failed fetches) never reach the disk.
+
+        Returns:
+            str: The recorded status.
+        """
+        status, error_class = validate_payload(dataset, payload)
+        if status == FAILED:
+            self.record(ticker, dataset, period, status, error_class=error_class, error=failure_detail(payload))
+            return status
+        write_logical_json(path, payload, self.compression)
+        self.record(ticker, dataset, period, status, payload_hash=content_hash(payload), error_class=error_class)
+        return status
+
+    def summary(self) -> Counter:
+        """
+        Returns:
+            Counter: Entries per (dataset, status, error_class).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dataset, status, error_class, COUNT(*) FROM entries GROUP BY dataset, status, error_class"
+            ).fetchall()
+        return Counter({(dataset, status, error_class): n for dataset, status, error_class, n in rows})
+
+    def format_summary(self) -> str:
+        return "\n".join(
+            f"{dataset:<26}{status:<8}{error_class or '':<20}{n:>7}"
+            for (dataset, status, error_class), n in sorted(self.summary().items(), key=lambda kv: tuple(str(x) for x in kv[0]))
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
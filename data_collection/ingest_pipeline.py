@@ -0,0 +1,224 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from config.api_config import alphavantage_ingest_config
+from data_collection.alvan_dc.client import AlphaVantageClient
+from data_collection.ingest_manifest import FAILED, IngestManifest, content_hash, failure_detail, validate_payload
+from data_collection.storage import write_logical_json
+
+_STOP = object()
+
+
+class IngestJob:
+    def __init__(self, ticker: str, dataset: str, path: Path, period: str = "", function: str = None, **params):
+        """
+        One Alpha Vantage payload to fetch and store.
+
+        Args:
+            ticker (str): Ticker symbol (also the `symbol` query parameter).
+            dataset (str): Manifest dataset, e.g. 'OVERVIEW' or 'EARNINGS_CALL_TRANSCRIPT'.
+            path (Path): Logical output path, e.g. Data/fundamental_jsons/A/OVERVIEW.json.
+            period (str): Manifest period, e.g. '2024Q1'; '' for undated datasets.
+            function (str, optional): API function; defaults to `dataset`.
+            **params: Extra query parameters (quarter, ...).
+        """
+        self.ticker = ticker
+        self.dataset = dataset
+        self.path = Path(path)
+        self.period = period
+        self.function = function or dataset
+        self.params = params
+
+    def __repr__(self):
+        return f"IngestJob({self.ticker}, {self.dataset}, {self.period!r})"
+
+
+def parse_payload(job: IngestJob, body: bytes) -> tuple:
+    """
+    Decode and validate a raw response (runs in the parse thread pool).
+
+    Returns:
+        tuple: (job, payload, status, error_class)
+    """
+    payload = None
+    if body is not None:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return job, None, FAILED, "invalid_json"
+    status, error_class = validate_payload(job.dataset, payload)
+    return job, payload, status, error_class
+
+
+def write_batch(manifest: IngestManifest, batch: list) -> int:
+    """
+    Write the valid payloads of `batch` and record every outcome in one manifest transaction
+    (runs in the parse thread pool).
+
+    Returns:
+        int: Bytes written.
+    """
+    written, rows = 0, []
+    for job, payload, status, error_class in batch:
+        if status == FAILED:
+            rows.append((job.ticker, job.dataset, job.period, status, None, error_class, failure_detail(payload), None))
+            continue
+        written += write_logical_json(job.path, payload, manifest.compression)
+        rows.append((job.ticker, job.dataset, job.period, status, content_hash(payload), error_class, None, None))
+    manifest.record_many(rows)
+    return written
+
+
+class StreamingIngest:
+    def __init__(
+        self,
+        client: AlphaVantageClient,
+        manifest: IngestManifest,
+        fetch_workers: int = alphavantage_ingest_config["fetch_workers"],
+        parse_workers: int = alphavantage_ingest_config["parse_workers"],
+        queue_size: int = alphavantage_ingest_config["queue_size"],
+        write_batch_size: int = alphavantage_ingest_config["write_batch_size"],
+        write_interval_s: float = alphavantage_ingest_config["write_interval_s"],
+        max_age_days: float = None,
+        on_result=None
+    ):
+        """
+        Three-stage ingest connected by bounded queues:
+
+            jobs -> [fetch workers] -> raw bodies -> [parse pool] -> payloads -> [writer] -> disk + manifest
+
+        Fetch workers only wait on the client's token bucket, so one slow ticker holds one
+        worker instead of a whole batch. JSON decoding, validation and compressed writes run
+        in a thread pool off the event loop, and the writer commits payloads in batches with
+        one manifest transaction each. Jobs are pulled lazily and every queue is bounded, so
+        memory stays flat however large the universe is.
+
+        Args:
+            client (AlphaVantageClient): Rate-limited client used for every fetch.
+            manifest (IngestManifest): Decides what needs fetching and records outcomes.
+            fetch_workers (int, optional): Concurrent fetches; None = client.max_connections.
+            parse_workers (int): Threads for decoding, validation and writes.
+            queue_size (int): Bound of each stage queue.
+            write_batch_size (int): Payloads per write batch.
+            write_interval_s (float): Max seconds a partial batch waits before it is written.
+            max_age_days (float, optional): Also refetch manifest entries older than this.
+            on_result (callable, optional): Called with (job, status, error_class) per committed job.
+        """
+        self.client = client
+        self.manifest = manifest
+        self.fetch_workers = fetch_workers or client.max_connections
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.write_batch_size = write_batch_size
+        self.write_interval_s = write_interval_s
+        self.max_age_days = max_age_days
+        self.on_result = on_result
+        self.counts = Counter()
+
+    async def _produce(self, jobs, job_queue: asyncio.Queue, executor, planned: bool):
+        loop = asyncio.get_running_loop()
+        for job in jobs:
+            needed = planned or await loop.run_in_executor(
+                executor, self.manifest.needs_fetch, job.ticker, job.dataset, job.period, job.path, self.max_age_days
+            )
+            if not needed:
+                self.counts["skipped"] += 1
+                continue
+            await job_queue.put(job)
+
+    async def _fetch(self, job_queue: asyncio.Queue, parse_queue: asyncio.Queue):
+        while (job := await job_queue.get()) is not _STOP:
+            try:
+                body = await self.client.query(job.function, raw=True, symbol=job.ticker, **job.params)
+            except Exception as e:
+                print(f"[Error] {job}: {type(e).__name__}: {e}")
+                body = None
+            self.counts["fetched"] += 1
+            await parse_queue.put((job, body))
+
+    async def _parse(self, parse_queue: asyncio.Queue, write_queue: asyncio.Queue, executor):
+        loop = asyncio.get_running_loop()
+        while (item := await parse_queue.get()) is not _STOP:
+            await write_queue.put(await loop.run_in_executor(executor, parse_payload, *item))
+
+    async def _write(self, write_queue: asyncio.Queue, executor):
+        loop = asyncio.get_running_loop()
+        batch, done = [], False
+        while not done:
+            deadline = time.monotonic() + self.write_interval_s
+            while len(batch) < self.write_batch_size:
+                try:
+                    item = await asyncio.wait_for(write_queue.get(), max(deadline - time.monotonic(), 0.001))
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    done = True
+                    break
+                batch.append(item)
+            if not batch:
+                continue
+            try:
+                self.counts["bytes_written"] += await loop.run_in_executor(executor, write_batch, self.manifest, batch)
+            except Exception as e:
+                # Keep draining the queue: a dead writer would block every upstream stage
+                print(f"[Error] Write batch of {len(batch)} failed: {type(e).__name__}: {e}")
+                self.counts["write_errors"] += len(batch)
+                batch = []
+                continue
+            self.counts["write_batches"] += 1
+            for job, _, status, error_class in batch:
+                self.counts[status] += 1
+                if self.on_result:
+                    self.on_result(job, status, error_class)
+            batch = []
+
+    async def run(self, jobs, planned: bool = False) -> Counter:
+        """
+        Fetch, validate and store every job that the manifest says needs fetching.
+
+        Args:
+            jobs: Iterable of IngestJob, consumed lazily.
+            planned (bool): Fetch every job without asking the manifest (the caller already
+                decided, e.g. FundamentalsRefreshPlanner).
+
+        Returns:
+            Counter: skipped / fetched / ok / empty / failed / bytes_written / write_batches, elapsed_s.
+        """
+        start = time.perf_counter()
+        job_queue = asyncio.Queue(self.queue_size)
+        parse_queue = asyncio.Queue(self.queue_size)
+        write_queue = asyncio.Queue(self.queue_size)
+
+        with ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix="ingest-parse") as executor:
+            fetchers = [asyncio.create_task(self._fetch(job_queue, parse_queue)) for _ in range(self.fetch_workers)]
+            parsers = [asyncio.create_task(self._parse(parse_queue, write_queue, executor)) for _ in range(self.parse_workers)]
+            writer = asyncio.create_task(self._write(write_queue, executor))
+            tasks = fetchers + parsers + [writer]
+            try:
+                # Shut the stages down in order so nothing in flight is dropped
+                await self._produce(jobs, job_queue, executor, planned)
+                for _ in fetchers:
+                    await job_queue.put(_STOP)
+                await asyncio.gather(*fetchers)
+                for _ in parsers:
+                    await parse_queue.put(_STOP)
+                await asyncio.gather(*parsers)
+                await write_queue.put(_STOP)
+                await writer
+            finally:
+                # On failure (e.g. the job iterable or the manifest raised) no stage would
+                # ever get its _STOP; cancel them instead of leaving them blocked on a queue
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.counts["elapsed_s"] = round(time.perf_counter() - start, 1)
+        return self.counts
+
+    def format_counts(self) -> str:
+        return "Ingest summary: " + ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items()))
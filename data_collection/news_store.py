@@ -0,0 +1,383 @@
+import asyncio
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from data_collection.alvan_dc.news_fetcher import AlphaVantageNewsFetcher
+from data_collection.alvan_dc.client import AlphaVantageClient, get_av_client
+from data_collection.storage import (
+    DEFAULT_COMPRESSION, append_jsonl, find_variant, open_text, storage_path, strip_storage_suffix, write_jsonl
+)
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "Data"
+DEFAULT_STORE_DIR = DATA_DIR / "news_jsons" / "news_store"
+TIME_FORMAT = "%Y%m%dT%H%M%S"
+
+
+def shift_time(time_published: str, minutes: int) -> str:
+    """
+    Shift an Alpha Vantage timestamp ('YYYYMMDDTHHMM' or 'YYYYMMDDTHHMMSS') by `minutes`.
+    """
+    ts = datetime.strptime(time_published.ljust(15, "0")[:15], TIME_FORMAT)
+    return (ts + timedelta(minutes=minutes)).strftime(TIME_FORMAT)
+
+
+def article_key(article: dict) -> str:
+    return article.get("url") or article.get("title")
+
+
+def iter_news_file(path) -> iter:
+    """
+    Yield (ticker, article) from a news file: either a per-ticker JSON-lines store file
+    ({ticker}.jsonl[.gz|.zst], one article per line) or a legacy {ticker: [articles]} JSON
+    file. Compression is detected from the content and decompressed as a stream.
+    """
+    path = Path(path)
+    with open_text(path) as f:
+        if ".jsonl" in path.name:
+            ticker = strip_storage_suffix(path.name)
+            for line in f:
+                if line.strip():
+                    yield ticker, json.loads(line)
+            return
+        for ticker, articles in json.load(f).items():
+            for article in articles or []:
+                yield ticker, article
+
+
+class NewsStore:
+    def __init__(self, root=DEFAULT_STORE_DIR, overlap_minutes: int = 24 * 60, compression=DEFAULT_COMPRESSION):
+        """
+        Append-only, per-ticker news store: {root}/{ticker}.jsonl holds one article per line
+        in time_published order. A small per-ticker state file keeps the watermark (latest
+        time_published) and the URLs inside the overlap window, so every fetch only asks for
+        articles after `watermark - overlap` and re-delivered articles are dropped by URL.
+
+        The data file is the source of truth: if its size doesn't match the state (e.g. a
+        crash between the two writes) the state is rebuilt from it.
+
+        Args:
+            root: Store directory.
+            overlap_minutes (int): How far before the watermark each fetch starts again, to
+                pick up articles the API indexed late.
+            compression (str, optional): "gzip", "zstd" or None for new ticker files; existing
+                files keep the format they were created with.
+        """
+        self.root = Path(root)
+        self.state_dir = self.root / "_state"
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.overlap_minutes = overlap_minutes
+        self.compression = compression
+        self._state = {}
+
+    def path(self, ticker: str) -> Path:
+        logical = self.root / f"{ticker}.jsonl"
+        return find_variant(logical) or storage_path(logical, self.compression)
+
+    def _state_path(self, ticker: str) -> Path:
+        return self.state_dir / f"{ticker}.json"
+
+    def _file_size(self, ticker: str) -> int:
+        path = self.path(ticker)
+        return path.stat().st_size if path.exists() else 0
+
+    def _rebuild_state(self, ticker: str) -> dict:
+        state = {"watermark": None, "recent_urls": {}, "count": 0, "bytes": self._file_size(ticker)}
+        if state["bytes"]:
+            articles = [a for _, a in iter_news_file(self.path(ticker))]
+            state["count"] = len(articles)
+            state["watermark"] = max((a["time_published"] for a in articles), default=None)
+            self._remember(state, articles)
+        return state
+
+    def state(self, ticker: str) -> dict:
+        if ticker not in self._state:
+            state = None
+            try:
+                with open(self._state_path(ticker), "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                pass
+            if state is None or state.get("bytes") != self._file_size(ticker):
+                state = self._rebuild_state(ticker)
+            self._state[ticker] = state
+        return self._state[ticker]
+
+    def _remember(self, state: dict, articles: list):
+        recent = state["recent_urls"]
+        for article in articles:
+            recent[article_key(article)] = article["time_published"]
+        if state["watermark"]:
+            cutoff = shift_time(state["watermark"], -self.overlap_minutes)
+            state["recent_urls"] = {url: ts for url, ts in recent.items() if ts >= cutoff}
+
+    def _save_state(self, ticker: str):
+        path = self._state_path(ticker)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state[ticker], f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def watermark(self, ticker: str) -> str:
+        return self.state(ticker)["watermark"]
+
+    def next_time_from(self, ticker: str, default_from: str) -> str:
+        """
+        Returns:
+            str: 'YYYYMMDDTHHMM' to fetch from: the watermark minus the overlap, or `default_from`
+                 for a ticker with no stored news.
+        """
+        watermark = self.watermark(ticker)
+        if watermark is None:
+            return default_from
+        return shift_time(watermark, -self.overlap_minutes)[:13]
+
+    def append(self, ticker: str, articles: list) -> int:
+        """
+        Add the articles not stored yet. Articles older than the overlap window were covered
+        by an earlier fetch and are ignored.
+
+        Returns:
+            int: Number of articles added.
+        """
+        state = self.state(ticker)
+        cutoff = shift_time(state["watermark"], -self.overlap_minutes) if state["watermark"] else None
+        fresh = {}
+        for article in articles:
+            key, ts = article_key(article), article.get("time_published")
+            if not key or not ts or key in state["recent_urls"] or key in fresh:
+                continue
+            if cutoff and ts < cutoff:
+                continue
+            fresh[key] = article
+        if not fresh:
+            return 0
+
+        new = sorted(fresh.values(), key=lambda a: a["time_published"])
+        if state["watermark"] and new[0]["time_published"] < state["watermark"]:
+            # Late-indexed articles inside the overlap window: re-sort the file once
+            self._rewrite_sorted(ticker, new)
+        else:
+            append_jsonl(self.path(ticker), new)
+
+        state["watermark"] = max(state["watermark"] or "", new[-1]["time_published"])
+        state["count"] += len(new)
+        state["bytes"] = self._file_size(ticker)
+        self._remember(state, new)
+        self._save_state(ticker)
+        return len(new)
+
+    def _rewrite_sorted(self, ticker: str, new: list):
+        path = self.path(ticker)
+        articles = [a for _, a in iter_news_file(path)] if path.exists() else []
+        write_jsonl(path, sorted(articles + new, key=lambda a: a["time_published"]))
+
+    def load(self, ticker: str) -> list:
+        """
+        Returns:
+            list: The ticker's stored articles, oldest first.
+        """
+        path = self.path(ticker)
+        return [a for _, a in iter_news_file(path)] if path.exists() else []
+
+
+async def fetch_feed_since(fetcher: AlphaVantageNewsFetcher, max_pages: int = 10, **filters) -> tuple:
+    """
+    Fetch every article after `fetcher.time_from` matching `filters` (tickers/topics). With
+    sort=LATEST a full page means older articles may be missing, so page back from the
+    oldest one returned. Pages overlap at the boundary minute, so articles are deduped by URL;
+    if a full page is all from the minute already asked for, paging steps back one minute.
+
+    Returns:
+        tuple: (articles or None if a request failed, pages fetched, covered_from) —
+               covered_from is the start of the window actually covered: `fetcher.time_from`,
+               or the oldest article fetched if `max_pages` ran out first.
+    """
+    articles, seen, time_to = [], set(), None
+    for pages in range(1, max_pages + 1):
+        page = await fetcher.fetch_feed(time_to=time_to, **filters)
+        if page is None:
+            return None, pages, None
+        for article in page:
+            key = article_key(article)
+            if key not in seen:
+                seen.add(key)
+                articles.append(article)
+        if not page or len(page) < (fetcher.limit or 50):
+            return articles, pages, fetcher.time_from
+        oldest = min(a["time_published"] for a in page)[:13]
+        if time_to is not None and oldest >= time_to:
+            # The same time_to would return the same page forever
+            print(f"[WARN] {filters or 'market feed'}: more than a page of news in minute {time_to}, skipping the rest of it")
+            oldest = shift_time(time_to, -1)[:13]
+        time_to = oldest
+        if time_to <= fetcher.time_from:
+            return articles, pages, fetcher.time_from
+    print(f"[WARN] {filters or 'market feed'}: news window still truncated after {max_pages} pages")
+    return articles, max_pages, time_to
+
+
+async def fetch_news_since(fetcher: AlphaVantageNewsFetcher, ticker: str, max_pages: int = 10) -> list:
+    """
+    Returns:
+        list: Every article of `ticker` after `fetcher.time_from`, or None if a request failed.
+    """
+    return (await fetch_feed_since(fetcher, max_pages, tickers=ticker))[0]
+
+
+async def _ingest_ticker(store: NewsStore, client, semaphore, ticker: str, time_from: str, limit: int, counts: Counter) -> int:
+    fetcher = AlphaVantageNewsFetcher(client.api_key, time_from, None, sort="LATEST", semaphore=semaphore, client=client, limit=limit)
+    articles = await fetch_news_since(fetcher, ticker)
+    counts["tickers"] += 1
+    if articles is None:
+        counts["failed"] += 1
+        print(f"[FAILED] {ticker}")
+        return None
+    added = store.append(ticker, articles)
+    counts["articles_added"] += added
+    counts["unchanged"] += int(added == 0)
+    print(f"[SAVED] {ticker} +{added} articles (watermark {store.watermark(ticker)})")
+    return added
+
+
+async def ingest_news(tickers, store: NewsStore, api_key: str = None, default_from: str = "20240101T0000", limit: int = 1000, max_concurrent_requests: int = 25, client: AlphaVantageClient = None) -> Counter:
+    """
+    Incrementally ingest NEWS_SENTIMENT for `tickers` into `store`: each ticker only asks for
+    articles after its watermark (minus the overlap) and appends the ones it doesn't have.
+
+    Returns:
+        Counter: {"tickers", "articles_added", "failed", "unchanged"}
+    """
+    client = client or get_av_client(api_key)
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+    counts = Counter()
+
+    # The client's token bucket paces requests at the key's quota (config/api_config.py)
+    await asyncio.gather(*(
+        _ingest_ticker(store, client, semaphore, ticker, store.next_time_from(ticker, default_from), limit, counts)
+        for ticker in tickers
+    ))
+    print(client.format_stats())
+    print("News ingest summary: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    await client.close()
+    return counts
+
+
+def fan_out_by_ticker(articles, universe: set) -> dict:
+    """
+    Split a market-wide feed into per-ticker lists using each article's `ticker_sentiment`.
+
+    Returns:
+        dict: {ticker: [articles]} for the tickers of `universe` that are mentioned.
+    """
+    by_ticker = {}
+    for article in articles:
+        for entry in article.get("ticker_sentiment") or []:
+            ticker = entry.get("ticker")
+            if ticker in universe:
+                by_ticker.setdefault(ticker, {})[article_key(article)] = article
+    return {ticker: list(articles.values()) for ticker, articles in by_ticker.items()}
+
+
+async def ingest_news_batched(tickers, store: NewsStore, api_key: str = None, default_from: str = "20240101T0000", limit: int = 1000, topics: list = None, max_sweep_days: float = 7, max_pages: int = 50, min_articles: int = 1, fallback: bool = True, max_concurrent_requests: int = 25, client: AlphaVantageClient = None) -> Counter:
+    """
+    Batched news ingest. NEWS_SENTIMENT's `tickers=A,B` matches only articles that mention
+    every listed ticker, so grouping symbols into one query would lose coverage. Instead this
+    sweeps the market-wide feed (no ticker filter, plus optional `topics` queries) once for
+    the whole window and fans each article out to every universe ticker named in its
+    `ticker_sentiment`. Articles are deduplicated by URL across pages and queries.
+
+    Coverage gaps fall back to the per-ticker query:
+    - "window": the ticker needs articles older than the sweep covered (new tickers,
+      watermarks older than `max_sweep_days`, or a sweep truncated by `max_pages`);
+    - "sparse": the sweep found fewer than `min_articles` for it (set 0 to trust the sweep).
+    Each run's sweep and gaps are logged to {store}/_state/coverage.jsonl.
+
+    Returns:
+        Counter: {"sweep_calls", "sweep_articles", "tickers", "articles_added", "gaps", "failed", ...}
+    """
+    client = client or get_av_client(api_key)
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+    counts = Counter()
+    universe = set(tickers)
+    time_froms = {ticker: store.next_time_from(ticker, default_from) for ticker in tickers}
+    floor = (datetime.now() - timedelta(days=max_sweep_days)).strftime("%Y%m%dT%H%M")
+    sweep_from = max(min(time_froms.values()), floor)
+
+    fetcher = AlphaVantageNewsFetcher(client.api_key, sweep_from, None, sort="LATEST", semaphore=semaphore, client=client, limit=limit)
+    queries = [{}] + [{"topics": topic} for topic in topics or []]
+    results = await asyncio.gather(*(fetch_feed_since(fetcher, max_pages, **query) for query in queries))
+
+    by_url = {}
+    for articles, pages, _ in results:
+        counts["sweep_calls"] += pages
+        for article in articles or []:
+            by_url.setdefault(article_key(article), article)
+    # Only the unfiltered feed defines which window is fully covered
+    covered_from = results[0][2]
+    counts["sweep_articles"] = len(by_url)
+    fanned = fan_out_by_ticker(by_url.values(), universe)
+
+    gaps = {}
+    for ticker in tickers:
+        articles = fanned.get(ticker, [])
+        if covered_from is None or time_froms[ticker] < covered_from:
+            gaps[ticker] = "window"
+        elif len(articles) < min_articles:
+            gaps[ticker] = "sparse"
+        else:
+            added = store.append(ticker, articles)
+            counts["tickers"] += 1
+            counts["articles_added"] += added
+            counts["unchanged"] += int(added == 0)
+    counts["gaps"] = len(gaps)
+
+    fallback_added = {}
+    if fallback and gaps:
+        print(f"Per-ticker fallback for {len(gaps)} coverage gaps")
+        added = await asyncio.gather(*(
+            _ingest_ticker(store, client, semaphore, ticker, time_froms[ticker], limit, counts) for ticker in gaps
+        ))
+        fallback_added = dict(zip(gaps, added))
+
+    with open(store.state_dir / "coverage.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "run_at": datetime.now().isoformat(timespec="seconds"),
+            "sweep_from": sweep_from,
+            "covered_from": covered_from,
+            "sweep_calls": counts["sweep_calls"],
+            "sweep_articles": counts["sweep_articles"],
+            "gaps": gaps,
+            "fallback_added": fallback_added,
+        }) + "\n")
+
+    print(client.format_stats())
+    print(
+        f"Batched news ingest: {sum(s['requests'] for s in client.stats().values())} API calls for "
+        f"{len(tickers)} tickers (per-ticker mode: at least {len(tickers)})"
+    )
+    print("News ingest summary: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    await client.close()
+    return counts
+
+
+def import_legacy_news(store: NewsStore, legacy_dirs: list) -> int:
+    """
+    Seed the store from the old calendar-window files ({ticker}.json per directory).
+    Run it before the first incremental ingest; articles are deduplicated by URL.
+
+    Returns:
+        int: Number of articles imported.
+    """
+    by_ticker = {}
+    for legacy_dir in legacy_dirs:
+        legacy_dir = Path(legacy_dir)
+        if not legacy_dir.is_dir():
+            continue
+        for path in sorted(legacy_dir.glob("*.json")):
+            for ticker, article in iter_news_file(path):
+                by_ticker.setdefault(ticker, []).append(article)
+    return sum(store.append(ticker, articles) for ticker, articles in by_ticker.items())
@@ -0,0 +1,200 @@
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", None: ""}
+DATA_SUFFIXES = (".jsonl", ".json")
+
+# zstd when the optional `zstandard` package is installed, gzip otherwise
+DEFAULT_COMPRESSION = "zstd" if zstandard is not None else "gzip"
+
+
+def effective_compression(compression):
+    if compression == "zstd" and zstandard is None:
+        print("[WARN] zstandard is not installed; using gzip")
+        return "gzip"
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression}")
+    return compression
+
+
+def detect_compression(path) -> str:
+    """
+    Returns:
+        str: "gzip", "zstd" or None, from the file's magic bytes (not its name).
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def compression_from_name(path):
+    name = str(path)
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if suffix and name.endswith(suffix):
+            return compression
+    return None
+
+
+def storage_path(path, compression) -> Path:
+    """
+    Physical path of logical file `path` (e.g. 'A/2024Q1.json') stored with `compression`.
+    """
+    return Path(str(path) + COMPRESSION_SUFFIXES[effective_compression(compression)])
+
+
+def find_variant(path) -> Path:
+    """
+    Returns:
+        Path: The existing plain/.gz/.zst file of logical path `path`, or None.
+    """
+    for suffix in ("", ".gz", ".zst"):
+        candidate = Path(str(path) + suffix)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def strip_storage_suffix(name: str) -> str:
+    """
+    'BRK.B.jsonl.gz' -> 'BRK.B'
+    """
+    for suffix in (".gz", ".zst"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    for suffix in DATA_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def is_data_file(name: str) -> bool:
+    return strip_storage_suffix(name) != name
+
+
+def open_text(path, mode: str = "r", compression=None):
+    """
+    Open a (possibly compressed) UTF-8 text file. Reading detects the compression from the
+    magic bytes and decompresses as a stream; writing/appending uses `compression`, or the
+    one implied by the file name. Appends add a new gzip member / zstd frame, which readers
+    see as one continuous stream.
+    """
+    if mode.startswith("r"):
+        compression = detect_compression(path)
+    elif compression is None:
+        compression = compression_from_name(path)
+    compression = effective_compression(compression)
+
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if compression == "zstd":
+        raw = open(path, mode + "b")
+        if mode.startswith("r"):
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_jsonl(path):
+    """
+    Stream records from a (possibly compressed) JSON-lines file.
+    """
+    with open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _atomic_write(path: Path, write, compression):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open_text(tmp_path, "w", compression=compression) as f:
+        write(f)
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+def write_jsonl(path, records, compression=None) -> int:
+    """
+    Atomically write `records` as compact JSON lines.
+
+    Returns:
+        int: Bytes on disk.
+    """
+    return _atomic_write(
+        path, lambda f: f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records),
+        compression if compression is not None else compression_from_name(path)
+    )
+
+
+def append_jsonl(path, records, compression=None):
+    with open_text(path, "a", compression=compression if compression is not None else compression_from_name(path)) as f:
+        f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+
+def write_json(path, payload, compression=None) -> int:
+    """
+    Atomically write one compact JSON document.
+
+    Returns:
+        int: Bytes on disk.
+    """
+    return _atomic_write(
+        path, lambda f: json.dump(payload, f, ensure_ascii=False, separators=(",", ":")),
+        compression if compression is not None else compression_from_name(path)
+    )
+
+
+def write_logical_json(path, payload, compression=None) -> int:
+    """
+    Write logical file `path` with `compression` and remove its other variants, so readers
+    using `find_variant` never pick up an outdated copy.
+    """
+    target = storage_path(path, compression)
+    size = write_json(target, payload, compression)
+    for suffix in ("", ".gz", ".zst"):
+        variant = Path(str(path) + suffix)
+        if variant != target and variant.is_file():
+            variant.unlink()
+    return size
+
+
+def load_json(path):
+    """
+    Load a JSON document or a JSON-lines file (returned as a list), plain or compressed.
+    """
+    with open_text(path) as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def load_logical_json(path):
+    """
+    Load logical file `path` from whichever variant exists.
+
+    Raises:
+        FileNotFoundError: No variant of `path` exists.
+    """
+    variant = find_variant(path)
+    if variant is None:
+        raise FileNotFoundError(str(path))
+    return load_json(variant)
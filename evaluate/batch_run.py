@@ -1,7 +1,104 @@
-import subprocess
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.api_config import llm_config
+from orchestrator.pipeline_factory import build_pipeline
+from evaluate.decision_journal import DecisionJournal
+from evaluate.generate_decision_series import DATES, JOURNAL_PATH, run_ticker_day, save_position_series
 
 stock_list = ['TSLA', 'AAPL']
 
-for stock in stock_list:
-    print(f"Running {stock}...")
-    subprocess.run(["python", "generate_decision_series.py", "--stock_name", stock])
+
+class PipelineWorkerPool:
+    def __init__(self, max_workers: int = 4, llm_config: dict = llm_config):
+        """
+        Bounded pool of in-process pipeline workers.
+
+        Each worker thread builds its own agent set on its first job of a risk profile and
+        reuses it for every later job of that profile, so the agent/tool setup cost is paid
+        once per worker and profile. Tool result
+        caches and the data session pool are process-wide and shared by all workers.
+
+        Args:
+            max_workers (int): Number of pipelines running at the same time.
+            llm_config (dict): LLM config for the worker pipelines.
+        """
+        self.max_workers = max_workers
+        self.llm_config = llm_config
+        self._local = threading.local()
+
+    def _pipeline(self, risk_profile: str):
+        # The risk manager's system message depends on the profile, so pipelines are per (thread, profile)
+        if not hasattr(self._local, "pipelines"):
+            self._local.pipelines = {}
+        if risk_profile not in self._local.pipelines:
+            self._local.pipelines[risk_profile] = build_pipeline(self.llm_config, risk_profile=risk_profile)
+        return self._local.pipelines[risk_profile]
+
+    def _run_job(self, stock_name, date, journal, risk_profile):
+        agents, user_proxy, debate_mgr = self._pipeline(risk_profile)
+        return run_ticker_day(stock_name, date, agents, user_proxy, debate_mgr, journal, risk_profile)
+
+    def run(self, jobs, journal, risk_profile="Neutral") -> list:
+        """
+        Run (stock_name, date) jobs not yet in the journal, printing progress as they finish.
+
+        Returns:
+            list: (stock_name, date, exception) for jobs that failed; they stay out of the
+                journal and are retried by the next run.
+        """
+        pending = [(s, d) for s, d in jobs if not journal.is_done(s, d, risk_profile)]
+        print(f"[INFO] {len(jobs) - len(pending)} of {len(jobs)} ticker-days already in journal, {len(pending)} to run on {self.max_workers} workers")
+
+        failures = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            futures = {
+                executor.submit(self._run_job, stock_name, date, journal, risk_profile): (stock_name, date)
+                for stock_name, date in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                stock_name, date = futures[future]
+                try:
+                    future.result()
+                    status = "OK"
+                except Exception as e:
+                    failures.append((stock_name, date, e))
+                    status = f"FAILED ({e})"
+                elapsed = time.perf_counter() - start
+                eta = elapsed / done * (len(pending) - done)
+                print(f"[{done}/{len(pending)}] {stock_name} {date} {status} | elapsed {elapsed:.0f}s, eta {eta:.0f}s")
+        return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stocks", nargs="+", default=stock_list)
+    parser.add_argument("--dates", nargs="+", default=DATES)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--risk_profile", type=str, default="Neutral")
+    parser.add_argument("--journal", type=str, default=JOURNAL_PATH)
+    args = parser.parse_args()
+
+    journal = DecisionJournal(args.journal)
+    jobs = [(stock, date) for stock in args.stocks for date in args.dates]
+    failures = PipelineWorkerPool(args.workers).run(jobs, journal, risk_profile=args.risk_profile)
+
+    for stock in args.stocks:
+        records = [journal.get(stock, date, args.risk_profile) for date in args.dates]
+        if any(r is None for r in records):
+            print(f"[WARN] {stock}: {sum(r is None for r in records)} day(s) missing, position series not written")
+            continue
+        position_list = save_position_series(stock, [r["decisions"] for r in records])
+        manager_fail_times = sum(1 for r in records if r["manager_fail"])
+        print(f"{stock}: {position_list}")
+        print(f"{stock}: manager_fail_times {manager_fail_times}")
+
+    if failures:
+        print(f"[WARN] {len(failures)} ticker-day(s) failed; rerun to retry them")
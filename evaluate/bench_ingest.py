@@ -0,0 +1,151 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from data_collection.alvan_dc.client import AlphaVantageClient
+from data_collection.ingest_manifest import IngestManifest
+from data_collection.ingest_pipeline import IngestJob, StreamingIngest
+from data_collection.news_store import NewsStore, ingest_news
+from data_collection.storage import find_variant, load_json
+from utils.fake_alphavantage import FUNDAMENTAL_FUNCTIONS, FakeAlphaVantageServer
+
+AS_OF = date(2025, 3, 14)
+
+
+def make_jobs(tickers: list, quarters: list, workdir: Path) -> list:
+    jobs = [IngestJob(t, f, workdir / "fundamental_jsons" / t / f"{f}.json") for t in tickers for f in FUNDAMENTAL_FUNCTIONS]
+    jobs += [
+        IngestJob(t, "EARNINGS_CALL_TRANSCRIPT", workdir / "ec_transcripts_jsons" / t / f"{q}.json", period=q, quarter=q)
+        for t in tickers for q in quarters
+    ]
+    return jobs
+
+
+def check_jobs(server: FakeAlphaVantageServer, jobs: list) -> dict:
+    """
+    Compare every stored payload with the stand-in's fault-free response.
+    """
+    missing = mismatched = 0
+    for job in jobs:
+        path = find_variant(job.path)
+        if path is None:
+            missing += 1
+        elif load_json(path) != server.payload(job.function, {"symbol": job.ticker, **job.params}):
+            mismatched += 1
+    return {"missing": missing, "mismatched": mismatched}
+
+
+def check_news(server: FakeAlphaVantageServer, store: NewsStore, tickers: list, time_from: str) -> dict:
+    missing = extra = 0
+    for ticker in tickers:
+        expected = {a["url"] for a in server.synthetic.news(server.news_universe, ticker, time_from=time_from, limit=10 ** 9)["feed"]}
+        stored = {a["url"] for a in store.load(ticker)}
+        missing += len(expected - stored)
+        extra += len(stored - expected)
+    return {"news_missing": missing, "news_extra": extra}
+
+
+async def run_scenario(args, client_rpm: float, burst: float, workers: int, workdir: Path) -> dict:
+    """
+    One ingest run against a fresh stand-in: fundamentals + transcripts through
+    StreamingIngest, optionally news through ingest_news.
+
+    Returns:
+        dict: Throughput, client/server counters and correctness of what was stored.
+    """
+    tickers = [f"T{i:03d}" for i in range(args.tickers)]
+    server = FakeAlphaVantageServer(
+        port=0, latency_s=args.latency, latency_jitter_s=args.jitter, tail_rate=args.tail_rate,
+        tail_latency_s=args.tail_latency, error_rate=args.error_rate, note_rate=args.note_rate,
+        requests_per_minute=args.server_rpm, news_universe=tickers, as_of=AS_OF, news_days=args.news_days
+    )
+    async with server:
+        client = AlphaVantageClient(
+            api_key="bench", base_url=server.base_url, requests_per_minute=client_rpm, requests_per_day=None, burst=burst,
+            max_retries=args.max_retries, backoff_base_s=args.backoff, backoff_max_s=args.backoff * 16,
+            timeout_s=30.0, max_connections=workers
+        )
+        manifest = IngestManifest(workdir / "manifest.sqlite", compression="gzip")
+        jobs = make_jobs(tickers, args.quarters, workdir)
+
+        start = time.perf_counter()
+        ingest = StreamingIngest(client, manifest, fetch_workers=workers, write_interval_s=0.5)
+        counts = await ingest.run(iter(jobs))
+        ingest_s = time.perf_counter() - start
+
+        news = {}
+        if args.news:
+            store = NewsStore(workdir / "news_store", compression="gzip")
+            time_from = (AS_OF - timedelta(days=args.news_days)).strftime("%Y%m%dT0000")
+            start = time.perf_counter()
+            news_counts = await ingest_news(tickers, store, default_from=time_from, client=client, max_concurrent_requests=workers)
+            news = {"news_s": round(time.perf_counter() - start, 2), "news_failed": news_counts["failed"], **check_news(server, store, tickers, time_from)}
+        else:
+            await client.close()
+        manifest.close()
+
+    stats = client.stats()
+    return {
+        "client_rpm": client_rpm,
+        "burst": client.limiter.burst,
+        "workers": workers,
+        "jobs": len(jobs),
+        "ingest_s": round(ingest_s, 2),
+        "jobs_per_s": round(len(jobs) / ingest_s, 1),
+        "requests": sum(s["requests"] for s in stats.values()),
+        "retries": sum(s["retries"] for s in stats.values()),
+        "limited": sum(s["rate_limited"] for s in stats.values()),
+        "server_notes": server.stats["notes"],
+        "server_503": server.stats["http_503"],
+        "failed": counts["failed"],
+        **check_jobs(server, jobs),
+        **news,
+    }
+
+
+def print_results(results: list):
+    columns = ["client_rpm", "burst", "workers", "jobs", "ingest_s", "jobs_per_s", "requests", "retries", "limited",
+               "server_notes", "server_503", "failed", "missing", "mismatched"]
+    if any("news_s" in r for r in results):
+        columns += ["news_s", "news_failed", "news_missing", "news_extra"]
+    print("".join(f"{c:>13}" for c in columns))
+    for r in results:
+        print("".join(f"{r.get(c, ''):>13}" for c in columns))
+
+
+async def main(args):
+    results = []
+    for client_rpm in args.client_rpm:
+        for burst in args.burst:
+            for workers in args.workers:
+                with tempfile.TemporaryDirectory() as workdir:
+                    results.append(await run_scenario(args, client_rpm, burst or None, workers, Path(workdir)))
+    print_results(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest throughput and correctness against the local Alpha Vantage stand-in")
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--quarters", nargs="+", default=["2024Q3", "2024Q4"])
+    parser.add_argument("--client_rpm", nargs="+", type=float, default=[300, 900], help="Client token bucket rates to compare")
+    parser.add_argument("--burst", nargs="+", type=float, default=[10], help="Client bucket capacities to compare (0 = one minute's quota)")
+    parser.add_argument("--workers", nargs="+", type=int, default=[5, 25], help="Fetch worker counts to compare")
+    parser.add_argument("--server_rpm", type=float, default=600, help="Stand-in quota per key (0 for unlimited)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--tail_rate", type=float, default=0.02, help="Share of very slow responses")
+    parser.add_argument("--tail_latency", type=float, default=2.0)
+    parser.add_argument("--error_rate", type=float, default=0.02, help="Share of HTTP 503 responses")
+    parser.add_argument("--note_rate", type=float, default=0.01, help="Share of random 'Note' responses")
+    parser.add_argument("--max_retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=0.2, help="Client backoff base (s)")
+    parser.add_argument("--news", action="store_true", help="Also ingest NEWS_SENTIMENT for every ticker")
+    parser.add_argument("--news_days", type=int, default=14)
+    asyncio.run(main(parser.parse_args()))
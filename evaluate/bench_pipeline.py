@@ -0,0 +1,122 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import asyncio
+import copy
+import functools
+import tempfile
+import time
+
+from config.agent_config import agent_settings
+from config.api_config import fake_llm_config
+from functions.stock_data import tool_cache
+from orchestrator.pipeline_factory import build_pipeline
+from orchestrator.stock_recommendation_workflow import arun_stock_recommendations
+from evaluate.batch_run import PipelineWorkerPool
+from evaluate.decision_journal import DecisionJournal
+from evaluate.telemetry_report import load_telemetry, summarize_stages
+
+
+def make_llm_config(latency_s: float, latency_jitter_s: float, latency_per_1k_prompt_tokens_s: float) -> dict:
+    config = copy.deepcopy(fake_llm_config)
+    config["config_list"][0].update({
+        "latency_s": latency_s,
+        "latency_jitter_s": latency_jitter_s,
+        "latency_per_1k_prompt_tokens_s": latency_per_1k_prompt_tokens_s,
+    })
+    return config
+
+
+def run_scenario(name: str, mode: str, workers: int, jobs: list, llm_config: dict, use_cache: bool, workdir: str) -> dict:
+    """
+    Run `jobs` once with the fake LLM backend and measure throughput.
+
+    Args:
+        mode (str): "thread" (PipelineWorkerPool) or "async" (arun_stock_recommendations).
+        workers (int): Worker threads / max in-flight async pipelines.
+        use_cache (bool): False disables the tool result cache for the run.
+
+    Returns:
+        dict: Scenario results (ticker-days/sec, failures, prompt tokens per ticker-day, ...).
+    """
+    telemetry_path = os.path.join(workdir, f"{name}_telemetry.jsonl")
+    agent_settings["telemetry"]["path"] = telemetry_path
+
+    tool_cache.clear()
+    saved_maxsize = tool_cache.maxsize
+    if not use_cache:
+        tool_cache.maxsize = 0
+    hits_before = tool_cache.hits
+
+    start = time.perf_counter()
+    try:
+        if mode == "thread":
+            journal = DecisionJournal(os.path.join(workdir, f"{name}_journal.jsonl"))
+            failures = len(PipelineWorkerPool(workers, llm_config=llm_config).run(jobs, journal))
+        else:
+            factory = functools.partial(build_pipeline, llm_config, use_async_tools=True)
+            results = asyncio.run(arun_stock_recommendations(jobs, factory, max_concurrency=workers))
+            failures = sum(isinstance(r, Exception) for r in results)
+    finally:
+        elapsed = time.perf_counter() - start
+        tool_cache.maxsize = saved_maxsize
+
+    records = load_telemetry(telemetry_path) if os.path.exists(telemetry_path) else []
+    stages = summarize_stages(records)
+    prompt_tokens = sum(
+        s.get("tokens", {}).get("prompt_tokens", 0)
+        for record in records for s in record.get("stages", [])
+    )
+    cached_tokens = sum(s.get("cached_tokens", 0) for record in records for s in record.get("stages", []))
+    return {
+        "scenario": name,
+        "ticker_days": len(jobs),
+        "failures": failures,
+        "elapsed_s": elapsed,
+        "throughput": len(jobs) / elapsed if elapsed else 0.0,
+        "prompt_tokens_per_day": prompt_tokens / len(records) if records else 0.0,
+        "prompt_cache_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+        "llm_calls_per_day": sum(s["llm_calls"] for s in stages.values()) / len(records) if records else 0.0,
+        "cache_hits": tool_cache.hits - hits_before,
+    }
+
+
+def print_results(results: list):
+    header = f"{'scenario':<28}{'days':>6}{'fail':>6}{'time s':>9}{'days/s':>9}{'prompt tok/day':>16}{'pcache%':>9}{'llm#/day':>10}{'cache hits':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<28}{r['ticker_days']:>6}{r['failures']:>6}{r['elapsed_s']:>9.2f}{r['throughput']:>9.2f}"
+            f"{r['prompt_tokens_per_day']:>16.0f}{r['prompt_cache_ratio'] * 100:>8.0f}%{r['llm_calls_per_day']:>10.1f}{r['cache_hits']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline pipeline throughput benchmark using the fake LLM backend")
+    parser.add_argument("--stocks", nargs="+", default=["TSLA", "AAPL"])
+    parser.add_argument("--dates", nargs="+", default=["2024-12-02", "2024-12-03", "2024-12-04", "2024-12-05"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=["thread", "async"], default=["thread", "async"])
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM latency per call (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra uniform random latency per call (s)")
+    parser.add_argument("--latency_per_1k_tokens", type=float, default=0.01, help="Extra latency per 1k uncached prompt tokens (s)")
+    parser.add_argument("--no_cache_run", action="store_true", help="Also run every scenario with the tool cache disabled")
+    args = parser.parse_args()
+
+    agent_settings["logging"]["console"] = False
+    llm_config = make_llm_config(args.latency, args.jitter, args.latency_per_1k_tokens)
+    jobs = [(stock, date) for stock in args.stocks for date in args.dates]
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.modes:
+            for workers in args.workers:
+                for use_cache in ([True, False] if args.no_cache_run else [True]):
+                    name = f"{mode}-w{workers}{'' if use_cache else '-nocache'}"
+                    print(f"[BENCH] {name}: {len(jobs)} ticker-days")
+                    results.append(run_scenario(name, mode, workers, jobs, llm_config, use_cache, workdir))
+
+    print_results(results)
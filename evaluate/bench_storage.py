@@ -0,0 +1,160 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from data_collection.storage import load_json, iter_jsonl, write_json, write_jsonl, zstandard
+from functions.local_data_loader import load_news_locally
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "Data"
+
+
+def synthetic_news(n: int) -> list:
+    rng = random.Random(0)
+    words = "revenue growth margin guidance demand supply chip cloud rate inflation outlook quarter beat miss".split()
+    return [
+        {
+            "title": " ".join(rng.choices(words, k=10)),
+            "url": f"https://example.com/news/{i}",
+            "time_published": f"2024{1 + i % 12:02d}{1 + i % 28:02d}T{i % 24:02d}0000",
+            "summary": " ".join(rng.choices(words, k=60)),
+            "source": rng.choice(["Reuters", "Benzinga", "Motley Fool"]),
+            "topics": [{"topic": "Earnings", "relevance_score": "0.5"}],
+            "overall_sentiment_score": rng.uniform(-1, 1),
+            "overall_sentiment_label": rng.choice(["Bullish", "Neutral", "Bearish"]),
+            "ticker_sentiment": [{"ticker": "TSLA", "relevance_score": "0.8", "ticker_sentiment_score": "0.1"}],
+        }
+        for i in range(n)
+    ]
+
+
+def synthetic_transcript(n_turns: int) -> dict:
+    rng = random.Random(1)
+    words = "we delivered strong results this quarter and expect continued momentum in demand margins".split()
+    return {
+        "symbol": "TSLA",
+        "quarter": "2024Q4",
+        "transcript": [
+            {"speaker": f"Speaker {i % 5}", "title": "CFO", "content": " ".join(rng.choices(words, k=120)), "sentiment": "0.4"}
+            for i in range(n_turns)
+        ],
+    }
+
+
+def load_sources(ticker: str, n_articles: int, n_turns: int):
+    """
+    The ticker's stored news and transcripts, or synthetic data of similar shape if there are none.
+    """
+    news = load_news_locally(ticker)
+    transcripts = []
+    transcript_dir = DATA_DIR / "ec_transcripts_jsons" / ticker
+    if transcript_dir.is_dir():
+        transcripts = [load_json(p) for p in sorted(transcript_dir.iterdir()) if p.is_file()]
+    if not news:
+        news = synthetic_news(n_articles)
+    if not transcripts:
+        transcripts = [synthetic_transcript(n_turns) for _ in range(8)]
+    return news, transcripts
+
+
+def write_variant(workdir: Path, fmt: str, news: list, transcripts: list) -> list:
+    """
+    Write news and transcripts in format `fmt`.
+
+    Returns:
+        list: Written file paths.
+    """
+    out = workdir / fmt
+    out.mkdir()
+    if fmt == "json-indent2":
+        paths = [out / "news.json"] + [out / f"t{i}.json" for i in range(len(transcripts))]
+        for path, payload in zip(paths, [{"news": news}] + transcripts):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2, ensure_ascii=False)
+        return paths
+    compression = {"jsonl": None, "jsonl-gzip": "gzip", "jsonl-zstd": "zstd"}[fmt]
+    suffix = {None: "", "gzip": ".gz", "zstd": ".zst"}[compression]
+    news_path = out / f"news.jsonl{suffix}"
+    write_jsonl(news_path, news, compression)
+    paths = [news_path]
+    for i, transcript in enumerate(transcripts):
+        path = out / f"t{i}.json{suffix}"
+        write_json(path, transcript, compression)
+        paths.append(path)
+    return paths
+
+
+def load_all(paths: list) -> int:
+    count = 0
+    for path in paths:
+        if ".jsonl" in path.name:
+            count += sum(1 for _ in iter_jsonl(path))
+        else:
+            payload = load_json(path)
+            count += len(payload.get("news") or payload.get("transcript") or [])
+    return count
+
+
+def cold_load_s(paths: list) -> float:
+    """
+    Load time in a fresh interpreter (no parsed state or imports reused). The OS page cache
+    is not dropped, so disk reads are only truly cold on the first run after a reboot.
+    """
+    code = (
+        "import sys, time; sys.path.insert(0, %r)\n"
+        "from evaluate.bench_storage import load_all\n"
+        "from pathlib import Path\n"
+        "start = time.perf_counter(); load_all([Path(p) for p in %r]); print(time.perf_counter() - start)"
+    ) % (str(Path(__file__).resolve().parents[1]), [str(p) for p in paths])
+    return float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+
+
+def run(ticker: str, n_articles: int, n_turns: int, repeats: int) -> list:
+    news, transcripts = load_sources(ticker, n_articles, n_turns)
+    formats = ["json-indent2", "jsonl", "jsonl-gzip"] + (["jsonl-zstd"] if zstandard is not None else [])
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for fmt in formats:
+            paths = write_variant(Path(workdir), fmt, news, transcripts)
+            warm = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                records = load_all(paths)
+                warm.append(time.perf_counter() - start)
+            results.append({
+                "format": fmt,
+                "bytes": sum(p.stat().st_size for p in paths),
+                "cold_load_s": cold_load_s(paths),
+                "warm_load_s": min(warm),
+                "records": records,
+            })
+    return results
+
+
+def print_results(results: list):
+    base = results[0]
+    header = f"{'format':<16}{'bytes':>12}{'vs base':>9}{'cold load s':>13}{'warm load s':>13}{'records':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['format']:<16}{r['bytes']:>12}{r['bytes'] / base['bytes']:>8.0%} "
+            f"{r['cold_load_s']:>12.4f}{r['warm_load_s']:>13.4f}{r['records']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes on disk and load time of news/transcript storage formats")
+    parser.add_argument("--ticker", default="TSLA")
+    parser.add_argument("--articles", type=int, default=2000, help="Synthetic articles if the ticker has no stored news")
+    parser.add_argument("--turns", type=int, default=80, help="Synthetic transcript turns if there are no stored transcripts")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    print_results(run(args.ticker, args.articles, args.turns, args.repeats))
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+
+class DecisionJournal:
+    def __init__(self, path: str):
+        """
+        Append-only JSONL journal of finished ticker-days, used to checkpoint and resume
+        decision-series runs. Each line is written and fsync'ed as soon as a ticker-day
+        finishes, so a crash loses at most the day that was in flight.
+
+        Args:
+            path (str): Journal file, created on first append.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = {}
+        self._torn_tail = False
+        self._load()
+
+    @staticmethod
+    def make_key(stock_name: str, date: str, risk_profile: str = "Neutral") -> str:
+        return f"{stock_name}|{date}|{risk_profile}"
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                self._torn_tail = f.read(1) != b"\n"
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line from an interrupted write; that day is simply redone
+                    print(f"[WARN] Skipping unreadable journal line {line_no} in {self.path}")
+                    continue
+                self._records[record["key"]] = record
+
+    def is_done(self, stock_name: str, date: str, risk_profile: str = "Neutral") -> bool:
+        return self.make_key(stock_name, date, risk_profile) in self._records
+
+    def get(self, stock_name: str, date: str, risk_profile: str = "Neutral") -> dict:
+        return self._records.get(self.make_key(stock_name, date, risk_profile))
+
+    def append(self, stock_name: str, date: str, risk_profile: str, record: dict) -> dict:
+        """
+        Persist one finished ticker-day.
+
+        Args:
+            stock_name (str): Ticker.
+            date (str): Trading day, 'YYYY-MM-DD'.
+            risk_profile (str): Risk profile the day was run with.
+            record (dict): Payload, e.g. decisions, stage texts, usage, latency.
+
+        Returns:
+            dict: The stored record, including its key and finish time.
+        """
+        entry = {
+            "key": self.make_key(stock_name, date, risk_profile),
+            "stock": stock_name,
+            "date": date,
+            "risk_profile": risk_profile,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            **record
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._torn_tail:
+                    # Terminate the torn line so the new record starts on its own line
+                    f.write("\n")
+                    self._torn_tail = False
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._records[entry["key"]] = entry
+        return entry
+
+    def __len__(self):
+        return len(self._records)
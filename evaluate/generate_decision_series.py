@@ -3,74 +3,13 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.fin_utils import get_position_list
-from autogen import UserProxyAgent
 from config.api_config import llm_config
-from orchestrator.stock_recommendation_workflow import run_stock_recommendation
-from orchestrator.debate_group import create_debate_group
-
-from agents.analyst_agent import get_analyst_agent
-from agents.bullish_agent import get_bullish_agent
-from agents.bearish_agent import get_bearish_agent
-from agents.trader_agent import get_trader_agent
-from agents.spokesperson_agent import get_spokesperson_agent
-from agents.recommender_agent import get_recommender_agent
-from agents.risk_manager_agent import get_risk_manager_agent
-from agents.manager_agent import get_manager_agent
-from agents.completeness_checker import get_completeness_check_agent
-from agents.calculator_agent import get_calculator_agent
-from agents.summary_agent import get_summary_agent
-from agents.user_proxy import get_user_proxy
-
-
-from functions.tool_registration import register_tool
-from functions.stock_data import *
+from orchestrator.stock_recommendation_workflow import run_stock_recommendation, run_multi_profile_recommendation
+from orchestrator.pipeline_factory import build_pipeline, build_profile_agents
+from evaluate.decision_journal import DecisionJournal
 import argparse
 
 
-# === Parse Argument ===
-parser = argparse.ArgumentParser()
-parser.add_argument("--stock_name", type=str, required=True)
-args = parser.parse_args()
-stock_name = args.stock_name
-
-
-# === Set up UserProxyAgent ===
-user_proxy = get_user_proxy()
-
-# === Initialize Agents ===
-analyst = get_analyst_agent(llm_config)
-bullish = get_bullish_agent(llm_config)
-bearish = get_bearish_agent(llm_config)
-trader = get_trader_agent(llm_config)
-spokesperson = get_spokesperson_agent(llm_config)
-recommender = get_recommender_agent(llm_config)
-risk_manager = get_risk_manager_agent(llm_config)
-manager = get_manager_agent(llm_config)
-completeness_checker = get_completeness_check_agent(llm_config)
-calculator_agent = get_calculator_agent(llm_config)
-summary_agent = get_summary_agent(llm_config)
-
-# === Tool registration ===
-register_tool(user_proxy, analyst)
-register_tool(calculator_agent, bullish)
-register_tool(calculator_agent, bearish)
-
-# === Setup Debate Group ===
-debate_mgr = create_debate_group(bullish, bearish, calculator_agent, summary_agent)
-
-# === Assemble Agent Dict ===
-agents = {
-    "analyst_agent": analyst,
-    "bullish_agent": bullish,
-    "bearish_agent": bearish,
-    "trader_agent": trader,
-    "spokesperson_agent": spokesperson,
-    "trade_recommender_agent": recommender,
-    "risk_manager_agent": risk_manager,
-    "manager_agent": manager,
-    "completeness_checker": completeness_checker
-}
-
 DATES = ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05',
                '2024-01-08', '2024-01-09', '2024-01-10', '2024-01-11',
                '2024-01-12', '2024-01-16', '2024-01-17', '2024-01-18',
@@ -90,32 +29,127 @@ DATES = ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05',
 
 # DATES = ['2024-01-04', '2024-01-05']
 
-# === Run ===
+OUT_DIR = "results"
+JOURNAL_PATH = os.path.join(OUT_DIR, "decision_journal.jsonl")
+
 
-agents_outputs = []
-manager_fail_times = 0
-fail_contents = []
+def run_ticker_day(stock_name, date, agents, user_proxy, debate_mgr, journal, risk_profile="Neutral") -> dict:
+    """
+    Run one ticker-day and persist it to the journal the moment it finishes.
 
-for date in DATES:
-    agents_output, manager_fail, fail_content = run_stock_recommendation(
-        stock_name, agents, user_proxy, debate_mgr, 
-        risk_profile="Neutral", today_date=date
+    Returns:
+        dict: The journal record.
+    """
+    run_record = {}
+    decisions, manager_fail, fail_content = run_stock_recommendation(
+        stock_name, agents, user_proxy, debate_mgr,
+        risk_profile=risk_profile, today_date=date, run_record=run_record
+    )
+    print("agents_output: ", decisions)
+    return journal.append(stock_name, date, risk_profile, {
+        "decisions": decisions,
+        "manager_fail": manager_fail,
+        "fail_content": fail_content,
+        **run_record
+    })
+
+
+def run_ticker_day_profiles(stock_name, date, agents, user_proxy, debate_mgr, profile_agents, journal) -> dict:
+    """
+    Run one ticker-day for several risk profiles, sharing the data/debate/trader stages,
+    and journal each profile that isn't done yet under its own key.
+
+    Returns:
+        dict: {risk_profile: journal record}
+    """
+    pending = {p: a for p, a in profile_agents.items() if not journal.is_done(stock_name, date, p)}
+    if not pending:
+        return {p: journal.get(stock_name, date, p) for p in profile_agents}
+
+    run_records = {}
+    results = run_multi_profile_recommendation(
+        stock_name, agents, user_proxy, debate_mgr, pending, today_date=date, run_records=run_records
     )
-    print("agents_output: ", agents_output)
-    agents_outputs.append(agents_output)
-    
-    if manager_fail:
-        manager_fail_times += 1
-        fail_contents.append(fail_content)
-
-
-position_list = get_position_list(agents_outputs)
-print(position_list)
-# === Save Results ===
-out_dir = "results"
-os.makedirs(out_dir, exist_ok=True)
-out_path = os.path.join(out_dir, f"{stock_name}.txt")
-with open(out_path, "w") as f:
-    f.write(",".join(map(str, position_list)) + "\n")
-
-print("manager_fail_times", manager_fail_times)
\ No newline at end of file
+    for risk_profile, result in results.items():
+        if isinstance(result, Exception):
+            print(f"[WARN] {stock_name} {date} {risk_profile} failed: {result}")
+            continue
+        decisions, manager_fail, fail_content = result
+        print(f"agents_output ({risk_profile}): ", decisions)
+        journal.append(stock_name, date, risk_profile, {
+            "decisions": decisions,
+            "manager_fail": manager_fail,
+            "fail_content": fail_content,
+            **run_records.get(risk_profile, {})
+        })
+    return {p: journal.get(stock_name, date, p) for p in profile_agents}
+
+
+def generate_decision_series(stock_name, dates, agents, user_proxy, debate_mgr, journal, risk_profile="Neutral"):
+    """
+    Run the pipeline for every date of `stock_name`, skipping days already in the journal.
+
+    Returns:
+        tuple: (agents_outputs, manager_fail_times, fail_contents) over all `dates`, in order.
+    """
+    for date in dates:
+        if journal.is_done(stock_name, date, risk_profile):
+            print(f"[SKIP] {stock_name} {date} already in journal")
+            continue
+        run_ticker_day(stock_name, date, agents, user_proxy, debate_mgr, journal, risk_profile)
+
+    records = [journal.get(stock_name, date, risk_profile) for date in dates]
+    agents_outputs = [r["decisions"] for r in records]
+    fail_contents = [r["fail_content"] for r in records if r["manager_fail"]]
+    return agents_outputs, len(fail_contents), fail_contents
+
+
+def save_position_series(stock_name, agents_outputs, out_dir=OUT_DIR) -> list:
+    position_list = get_position_list(agents_outputs)
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, f"{stock_name}.txt")
+    with open(out_path, "w") as f:
+        f.write(",".join(map(str, position_list)) + "\n")
+    return position_list
+
+
+if __name__ == "__main__":
+    # === Parse Argument ===
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stock_name", type=str, required=True)
+    parser.add_argument("--risk_profile", type=str, default="Neutral")
+    parser.add_argument("--risk_profiles", nargs="+", default=None,
+                        help="Run several profiles at once, sharing the data/debate/trader stages (e.g. Conservative Neutral Aggressive)")
+    parser.add_argument("--journal", type=str, default=JOURNAL_PATH, help="Append-only checkpoint journal; completed days are skipped")
+    args = parser.parse_args()
+    stock_name = args.stock_name
+
+    # === Build agents and tools ===
+    agents, user_proxy, debate_mgr = build_pipeline(llm_config, risk_profile=args.risk_profile)
+    journal = DecisionJournal(args.journal)
+
+    if args.risk_profiles:
+        # === Run: shared upstream stages, risk/manager fanned out per profile ===
+        profile_agents = {p: build_profile_agents(llm_config, p) for p in args.risk_profiles}
+        for date in DATES:
+            run_ticker_day_profiles(stock_name, date, agents, user_proxy, debate_mgr, profile_agents, journal)
+
+        for risk_profile in args.risk_profiles:
+            records = [journal.get(stock_name, date, risk_profile) for date in DATES]
+            if any(r is None for r in records):
+                print(f"[WARN] {risk_profile}: {sum(r is None for r in records)} day(s) missing, position series not written")
+                continue
+            position_list = save_position_series(stock_name, [r["decisions"] for r in records], os.path.join(OUT_DIR, risk_profile))
+            print(risk_profile, position_list)
+            print(risk_profile, "manager_fail_times", sum(1 for r in records if r["manager_fail"]))
+        sys.exit(0)
+
+    # === Run ===
+    agents_outputs, manager_fail_times, fail_contents = generate_decision_series(
+        stock_name, DATES, agents, user_proxy, debate_mgr, journal, risk_profile=args.risk_profile
+    )
+
+    # === Save Results ===
+    position_list = save_position_series(stock_name, agents_outputs)
+    print(position_list)
+    print("manager_fail_times", manager_fail_times)
@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+from collections import defaultdict
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Linear-interpolated percentile, q in [0, 100].
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def load_telemetry(path: str) -> list:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def summarize_stages(records: list) -> dict:
+    """
+    Aggregate per-stage telemetry over all ticker-days.
+
+    Returns:
+        dict: {stage: {"runs", "p50_s", "p95_s", "llm_s", "tool_s", "llm_calls", "tool_calls",
+                       "cache_hit_rate", "prompt_cache_ratio", "retries", "avg_tokens", "total_tokens", "total_cost"}}
+    """
+    by_stage = defaultdict(list)
+    for record in records:
+        for stage in record.get("stages", []):
+            by_stage[stage["stage"]].append(stage)
+
+    summary = {}
+    for name, stages in by_stage.items():
+        tool_calls = sum(s.get("tool_calls", 0) for s in stages)
+        total_tokens = sum(s.get("tokens", {}).get("total_tokens", 0) for s in stages)
+        prompt_tokens = sum(s.get("tokens", {}).get("prompt_tokens", 0) for s in stages)
+        summary[name] = {
+            "runs": len(stages),
+            "p50_s": percentile([s["duration_s"] for s in stages], 50),
+            "p95_s": percentile([s["duration_s"] for s in stages], 95),
+            "llm_s": sum(s.get("llm_s", 0.0) for s in stages),
+            "tool_s": sum(s.get("tool_s", 0.0) for s in stages),
+            "llm_calls": sum(s.get("llm_calls", 0) for s in stages),
+            "tool_calls": tool_calls,
+            "cache_hit_rate": sum(s.get("tool_cache_hits", 0) for s in stages) / tool_calls if tool_calls else 0.0,
+            "prompt_cache_ratio": sum(s.get("cached_tokens", 0) for s in stages) / prompt_tokens if prompt_tokens else 0.0,
+            "retries": sum(s.get("retries", 0) for s in stages),
+            "avg_tokens": total_tokens / len(stages),
+            "total_tokens": total_tokens,
+            "total_cost": sum(s.get("tokens", {}).get("cost", 0.0) for s in stages),
+        }
+    return summary
+
+
+def print_report(records: list):
+    summary = summarize_stages(records)
+    totals = [r["total_s"] for r in records if "total_s" in r]
+    print(f"Ticker-days: {len(records)} | end-to-end p50 {percentile(totals, 50):.1f}s, p95 {percentile(totals, 95):.1f}s")
+    rss = [r["rss_mb"] for r in records if "rss_mb" in r]
+    if rss:
+        # Steady growth across ticker-days points at state kept between runs
+        print(f"RSS: first {rss[0]:.0f} MB, last {rss[-1]:.0f} MB, max {max(rss):.0f} MB")
+    header = f"{'stage':<10}{'runs':>6}{'p50 s':>9}{'p95 s':>9}{'llm s':>10}{'tool s':>9}{'llm#':>7}{'tool#':>7}{'hit%':>7}{'pcache%':>9}{'retry':>7}{'avg tok':>10}{'cost $':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, s in summary.items():
+        print(
+            f"{name:<10}{s['runs']:>6}{s['p50_s']:>9.2f}{s['p95_s']:>9.2f}{s['llm_s']:>10.1f}{s['tool_s']:>9.1f}"
+            f"{s['llm_calls']:>7}{s['tool_calls']:>7}{s['cache_hit_rate'] * 100:>6.0f}%{s['prompt_cache_ratio'] * 100:>8.0f}%{s['retries']:>7}"
+            f"{s['avg_tokens']:>10.0f}{s['total_cost']:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency and token cost report from telemetry JSONL")
+    parser.add_argument("--path", type=str, default=os.path.join("logs", "telemetry.jsonl"))
+    args = parser.parse_args()
+    print_report(load_telemetry(args.path))
@@ -1,5 +1,7 @@
 import os
-import json
+
+from data_collection.news_store import iter_news_file
+from data_collection.storage import find_variant, load_json as load_stored_json
 
 from datetime import datetime
 from typing import Dict, Any
@@ -29,11 +31,11 @@ def fetch_single_adjdaily_locally(ticker: str) -> dict:
     base_dir = os.path.abspath(os.path.join(current_dir, "..", "Data", "hist_price_jsons"))
     file_path = os.path.join(base_dir, f"{ticker}_hp.json")
 
-    if not os.path.isfile(file_path):
+    stored = find_variant(file_path)  # plain, .gz or .zst
+    if stored is None:
         raise FileNotFoundError(f"Local data file not found for ticker: {ticker}")
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_stored_json(stored)
 
     if ticker not in data:
         raise ValueError(f"Ticker {ticker} not found in the JSON file: {file_path}")
@@ -41,6 +43,35 @@ def fetch_single_adjdaily_locally(ticker: str) -> dict:
     return {ticker: data[ticker]}
 
 
+def load_news_locally(ticker: str) -> list:
+    """
+    All locally stored articles of a ticker (news store and legacy window files, any
+    compression), deduplicated by URL, oldest first.
+    """
+    news_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Data", "news_jsons"))
+    if not os.path.isdir(news_dir):
+        return []
+    by_url = {}
+    for sub in sorted(os.listdir(news_dir)):
+        for name in (f"{ticker}.jsonl", f"{ticker}.json"):
+            stored = find_variant(os.path.join(news_dir, sub, name))
+            if stored is not None:
+                for _, article in iter_news_file(stored):
+                    by_url.setdefault(article.get("url") or article.get("title"), article)
+    return sorted(by_url.values(), key=lambda a: a.get("time_published", ""))
+
+
+def fetch_ec_transcript_locally(ticker: str, quarter: str) -> dict:
+    """
+    Earnings call transcript saved by data_collection/alvan_localsave/save_ect.py (any compression).
+    """
+    path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Data", "ec_transcripts_jsons", ticker, f"{quarter}.json"))
+    stored = find_variant(path)
+    if stored is None:
+        raise FileNotFoundError(f"Local transcript not found: {ticker} {quarter}")
+    return load_stored_json(stored)
+
+
 def get_latest_report_before(reports: list, today: str) -> dict:
     filtered = [
         r for r in reports
@@ -58,11 +89,8 @@ def fetch_fundamental_summary(ticker: str, today: str) -> Dict[str, Any]:
     base_dir = os.path.abspath(os.path.join(current_dir, "..", "Data", "fundamental_jsons", ticker))
 
     def load_json(filename: str) -> dict:
-        path = os.path.join(base_dir, filename)
-        if not os.path.isfile(path):
-            return {}
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        stored = find_variant(os.path.join(base_dir, filename))
+        return load_stored_json(stored) if stored is not None else {}
 
     overview = load_json("OVERVIEW.json")
     income = load_json("INCOME_STATEMENT.json").get("annualReports", [])
@@ -0,0 +1,273 @@
+import bisect
+import csv
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from config.agent_config import agent_settings
+from functions.stock_data import normalize_time_string, tool_cache
+from data_collection.news_store import iter_news_file
+from data_collection.storage import find_variant, is_data_file, load_json as load_stored_json
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Data"))
+
+_price_series = {}
+_price_lock = threading.Lock()
+_headline_index = None
+_headline_lock = threading.Lock()
+_date_locks = defaultdict(threading.Lock)
+_date_locks_guard = threading.Lock()
+
+
+def _settings() -> dict:
+    return agent_settings.get("market_context", {})
+
+
+def load_sector_map(path: str = None) -> dict:
+    """
+    Returns:
+        dict: {ticker: GICS sector} from Data/sp500_list.csv (see data_collection/sp500.py).
+    """
+    path = path or os.path.join(DATA_DIR, "sp500_list.csv")
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {row["Symbol"]: row.get("GICS Sector") or "Unknown" for row in csv.DictReader(f)}
+
+
+def _load_price_series(ticker: str):
+    """
+    Sorted (dates, closes) of a ticker from Data/hist_price_jsons, loaded once per process.
+    Only the close column is kept so all S&P 500 series fit comfortably in memory.
+    """
+    with _price_lock:
+        if ticker in _price_series:
+            return _price_series[ticker]
+
+    series = None
+    path = find_variant(os.path.join(DATA_DIR, "hist_price_jsons", f"{ticker}_hp.json"))
+    if path is not None:
+        raw = load_stored_json(path).get(ticker) or {}
+        dates, closes = [], []
+        for date_str in sorted(raw):
+            bar = raw[date_str]
+            close = bar.get("5. adjusted close", bar.get("4. close"))
+            try:
+                closes.append(float(close))
+                dates.append(date_str)
+            except (TypeError, ValueError):
+                continue
+        series = (dates, closes)
+
+    with _price_lock:
+        _price_series[ticker] = series
+    return series
+
+
+def _returns_before(ticker: str, today_date: str, windows=(1, 5)):
+    """
+    Returns over the last completed sessions strictly before `today_date` (no look-ahead).
+
+    Returns:
+        tuple: (last_close_date, {window: return}) or None if there isn't enough history.
+    """
+    series = _load_price_series(ticker)
+    if not series:
+        return None
+    dates, closes = series
+    end = bisect.bisect_left(dates, today_date) - 1
+    if end < max(windows):
+        return None
+    return dates[end], {w: closes[end] / closes[end - w] - 1 for w in windows}
+
+
+def _index_returns(today_date: str, tickers: list) -> tuple:
+    indexes, as_of_close = {}, None
+    for ticker in _settings().get("index_tickers", ["SPY", "QQQ", "DIA"]):
+        result = _returns_before(ticker, today_date)
+        if result:
+            as_of_close, indexes[ticker] = result[0], result[1]
+
+    if not indexes:
+        # No index ETF in the local store: use the equal-weighted constituents instead
+        per_ticker = [r for r in (_returns_before(t, today_date) for t in tickers) if r]
+        if per_ticker:
+            as_of_close = max(r[0] for r in per_ticker)
+            indexes["S&P 500 (equal-weight)"] = {
+                w: sum(r[1][w] for r in per_ticker) / len(per_ticker) for w in (1, 5)
+            }
+    return indexes, as_of_close
+
+
+def _sector_moves(today_date: str, sector_map: dict) -> dict:
+    by_sector = defaultdict(list)
+    for ticker, sector in sector_map.items():
+        result = _returns_before(ticker, today_date)
+        if result:
+            by_sector[sector].append(result[1])
+    return {
+        sector: {
+            "count": len(moves),
+            1: sum(m[1] for m in moves) / len(moves),
+            5: sum(m[5] for m in moves) / len(moves),
+        }
+        for sector, moves in by_sector.items()
+    }
+
+
+def _news_dirs() -> list:
+    base = os.path.join(DATA_DIR, "news_jsons")
+    if not os.path.isdir(base):
+        return []
+    return [os.path.join(base, d) for d in sorted(os.listdir(base)) if os.path.isdir(os.path.join(base, d))]
+
+
+def _build_headline_index() -> tuple:
+    """
+    Macro headlines from all local news files (legacy JSON and the JSON-lines news store),
+    deduplicated by URL and sorted by publish time. Built once per process.
+
+    Returns:
+        tuple: (times, headlines) — parallel lists for bisecting on 'YYYYMMDDTHHMMSS'.
+    """
+    macro_topics = set(_settings().get("macro_topics", []))
+    by_url = {}
+    for news_dir in _news_dirs():
+        for filename in os.listdir(news_dir):
+            if not is_data_file(filename):
+                continue
+            try:
+                for ticker, article in iter_news_file(os.path.join(news_dir, filename)):
+                    relevance = max(
+                        (float(t.get("relevance_score", 0)) for t in article.get("topics", []) if t.get("topic") in macro_topics),
+                        default=0.0
+                    )
+                    if relevance <= 0 or not article.get("time_published"):
+                        continue
+                    url = article.get("url") or article.get("title")
+                    entry = by_url.get(url)
+                    if entry is None:
+                        by_url[url] = {
+                            "time_published": article["time_published"],
+                            "title": article.get("title"),
+                            "source": article.get("source"),
+                            "sentiment": article.get("overall_sentiment_label"),
+                            "relevance": relevance,
+                            "tickers": {ticker},
+                        }
+                    else:
+                        # The same ticker's article can sit in both a legacy file and the store
+                        entry["tickers"].add(ticker)
+            except (OSError, ValueError):
+                continue
+
+    for entry in by_url.values():
+        entry["mentions"] = len(entry.pop("tickers"))
+    headlines = sorted(by_url.values(), key=lambda h: h["time_published"])
+    return [h["time_published"] for h in headlines], headlines
+
+
+def _macro_headlines(today_date: str) -> list:
+    global _headline_index
+    with _headline_lock:
+        if _headline_index is None:
+            _headline_index = _build_headline_index()
+    times, headlines = _headline_index
+
+    settings = _settings()
+    day = datetime.strptime(today_date, "%Y-%m-%d")
+    window_start = (day - timedelta(days=settings.get("news_lookback_days", 3))).strftime("%Y%m%dT000000")
+    window_end = day.strftime("%Y%m%dT000000")
+    window = headlines[bisect.bisect_left(times, window_start):bisect.bisect_left(times, window_end)]
+
+    # Stories carried by many tickers' feeds and tagged strongly as macro come first
+    ranked = sorted(window, key=lambda h: (h["mentions"], h["relevance"], h["time_published"]), reverse=True)
+    return [
+        {k: h[k] for k in ("time_published", "title", "source", "sentiment")}
+        for h in ranked[:settings.get("max_headlines", 5)]
+    ]
+
+
+def _string_keys(moves: dict) -> dict:
+    # JSON round-trips dict keys as strings; use the same keys up front so cached and fresh results match
+    return {str(k): v for k, v in moves.items()}
+
+
+def _pct(x: float) -> str:
+    return f"{x * 100:+.2f}%"
+
+
+def market_context(today_date: str) -> dict:
+    """
+    Market-wide context for one trading day, built only from data published before it.
+
+    Returns:
+        dict: {"date", "as_of_close", "indexes": {name: {1, 5}}, "sectors": {sector: {"count", 1, 5}},
+               "headlines": [{"time_published", "title", "source", "sentiment"}]}
+    """
+    sector_map = load_sector_map()
+    indexes, as_of_close = _index_returns(today_date, list(sector_map))
+    return {
+        "date": today_date,
+        "as_of_close": as_of_close,
+        "indexes": {name: _string_keys(r) for name, r in indexes.items()},
+        "sectors": {sector: _string_keys(r) for sector, r in _sector_moves(today_date, sector_map).items()},
+        "headlines": _macro_headlines(today_date),
+    }
+
+
+def get_market_context(today_date: str) -> dict:
+    """
+    Per-date market context, computed once per date and shared by every ticker's pipeline.
+    Concurrent pipelines asking for the same date wait for the first one instead of
+    recomputing it; results live in the tool cache (agent_settings["tool_cache"]).
+
+    It isn't an agent tool, so unlike `memoize_tool` this doesn't report to the telemetry.
+    """
+    day = normalize_time_string(today_date)[:8]
+    key = json.dumps(["market_context", day])
+    with _date_locks_guard:
+        lock = _date_locks[day]
+    with lock:
+        found, context = tool_cache.get(key)
+        if not found:
+            context = market_context(today_date)
+            tool_cache.put(key, context)
+        return context
+
+
+def format_market_context(context: dict) -> str:
+    """
+    Compact text block for the analyst brief.
+    """
+    if not context or not (context.get("indexes") or context.get("sectors") or context.get("headlines")):
+        return ""
+    lines = [f"Market context (closes up to {context.get('as_of_close')}):"]
+    if context.get("indexes"):
+        lines.append("Indexes 1d/5d: " + "; ".join(
+            f"{name} {_pct(r['1'])}/{_pct(r['5'])}" for name, r in context["indexes"].items()
+        ))
+    if context.get("sectors"):
+        sectors = sorted(context["sectors"].items(), key=lambda kv: kv[1]["1"], reverse=True)
+        lines.append("Sectors 1d/5d: " + "; ".join(
+            f"{sector} {_pct(r['1'])}/{_pct(r['5'])}" for sector, r in sectors
+        ))
+    if context.get("headlines"):
+        lines.append("Macro headlines:")
+        lines += [f"- {h['title']} ({h['source']}, {h['sentiment']})" for h in context["headlines"]]
+    return "\n".join(lines) + "\n"
+
+
+def market_context_brief(today_date: str) -> str:
+    """
+    Formatted market context for `today_date`, or "" when disabled or unavailable.
+    """
+    if not _settings().get("enabled", True):
+        return ""
+    try:
+        return format_market_context(get_market_context(today_date))
+    except Exception as e:
+        print(f"[WARN] Market context for {today_date} unavailable: {e}")
+        return ""
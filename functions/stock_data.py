@@ -1,9 +1,22 @@
 import asyncio
+import atexit
+import contextvars
+import copy
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
 from data_collection.alvan_dc.news_fetcher import fetch_single_news
 from data_collection.alvan_dc.historical_price import fetch_single_adjdaily
 from data_collection.alvan_dc.fundamental_fetcher import fetch_single_fundamental
 from data_collection.alvan_dc.ec_transcript_fetcher import fetch_single_ec_transcript
+from data_collection.alvan_dc.session_pool import run_in_session_pool
 from config.api_config import MAX_articles
+from config.agent_config import agent_settings
+from utils.telemetry import record_tool_call
 from datetime import datetime
 from functions.local_data_loader import fetch_single_adjdaily_locally, fetch_fundamental_summary
 import re
@@ -61,6 +74,211 @@ def normalize_time_string(t: str) -> str:
 
 
 
+# === Tool result memoization ===
+# Tool results are cached per (tool, as-of date, canonical arguments). The as-of date is the
+# trading day of the pipeline currently running (set by run_stock_recommendation), so a result
+# computed for one day is never served to another and point-in-time correctness is kept.
+
+current_as_of_date = contextvars.ContextVar("current_as_of_date", default=None)
+
+
+def set_as_of_date(today_date: str):
+    """
+    Set the as-of date for tool calls made in the current context.
+
+    Returns:
+        contextvars.Token: Pass to `reset_as_of_date` when the pipeline finishes.
+    """
+    return current_as_of_date.set(_canonical_date(today_date))
+
+
+def reset_as_of_date(token):
+    current_as_of_date.reset(token)
+
+
+class ToolResultCache:
+    def __init__(self, maxsize: int = 4096, persist_path: str = None):
+        """
+        Bounded LRU store for tool results, optionally persisted as a JSON file.
+
+        Args:
+            maxsize (int): Max number of cached results; least recently used ones are evicted.
+            persist_path (str, optional): JSON file loaded on start and written by `save()`.
+        """
+        self.maxsize = maxsize
+        self.persist_path = persist_path
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if persist_path:
+            self.load()
+
+    def get(self, key: str):
+        """
+        Returns:
+            tuple: (found, value). `value` is a copy, so callers may mutate it.
+        """
+        with self._lock:
+            if key in self._store:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(self._store[key])
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._store[key] = copy.deepcopy(value)
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._store),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def load(self):
+        if not self.persist_path or not os.path.isfile(self.persist_path):
+            return
+        with open(self.persist_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        with self._lock:
+            for key, value in entries:
+                self._store[key] = value
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def save(self):
+        """
+        Write the cache to `persist_path` atomically (no-op when persistence is off).
+        """
+        if not self.persist_path:
+            return
+        with self._lock:
+            entries = list(self._store.items())
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.persist_path)
+
+
+_tool_cache_settings = agent_settings.get("tool_cache", {})
+tool_cache = ToolResultCache(
+    maxsize=_tool_cache_settings.get("maxsize", 4096),
+    persist_path=_tool_cache_settings.get("persist_path")
+)
+if tool_cache.persist_path:
+    atexit.register(tool_cache.save)
+
+
+def get_tool_cache_stats() -> dict:
+    return tool_cache.stats()
+
+
+def _canonical_date(d: str) -> str:
+    # '2024-01-08', '20240108', '2024/01/08T0000' -> '2024-01-08'
+    day = normalize_time_string(str(d))[:8]
+    return f"{day[:4]}-{day[4:6]}-{day[6:]}"
+
+
+_ARG_CANONICALIZERS = {
+    "ticker": lambda v: str(v).strip().upper(),
+    "time_from": normalize_time_string,
+    "time_to": normalize_time_string,
+    "sort": lambda v: str(v).strip().upper(),
+    "today_date": _canonical_date,
+    "today": _canonical_date,
+    "quarter": lambda v: str(v).strip().upper(),
+}
+
+
+def _is_cacheable(result) -> bool:
+    # Failed fetches come back as {ticker: None}; don't pin them in the cache
+    if not result:
+        return False
+    if isinstance(result, dict) and all(v is None for v in result.values()):
+        return False
+    return True
+
+
+def memoize_tool(func):
+    """
+    Cache a tool's results in `tool_cache`, keyed by tool name, the current as-of date and
+    the canonicalized arguments, so '2024-01-08' and '20240108T0000' share one entry.
+    Works for both sync and async tools. Arguments that fail to canonicalize bypass the cache.
+    Every call is also reported to the pipeline telemetry (duration, cache hit).
+    """
+    signature = inspect.signature(func)
+    # Sync and async variants of a tool share entries
+    tool_name = func.__name__.removeprefix("a_")
+
+    def make_key(args, kwargs):
+        try:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            canonical = {
+                name: _ARG_CANONICALIZERS.get(name, lambda v: v)(value)
+                for name, value in bound.arguments.items()
+            }
+            return json.dumps([tool_name, current_as_of_date.get(), canonical], sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            key = make_key(args, kwargs)
+            if key is not None:
+                found, value = tool_cache.get(key)
+                if found:
+                    record_tool_call(tool_name, time.perf_counter() - start, cache_hit=True)
+                    return value
+            try:
+                result = await func(*args, **kwargs)
+            finally:
+                record_tool_call(tool_name, time.perf_counter() - start, cache_hit=False)
+            if key is not None and _is_cacheable(result):
+                tool_cache.put(key, result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        key = make_key(args, kwargs)
+        if key is not None:
+            found, value = tool_cache.get(key)
+            if found:
+                record_tool_call(tool_name, time.perf_counter() - start, cache_hit=True)
+                return value
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            record_tool_call(tool_name, time.perf_counter() - start, cache_hit=False)
+        if key is not None and _is_cacheable(result):
+            tool_cache.put(key, result)
+        return result
+    return wrapper
+
+
+
 
 # === Tool 1: Company Info ===
 def data_collect_company_info(stock_name: str) -> str:
@@ -135,16 +353,25 @@ get_moving_average._tool_config = {
 
 
 
+@memoize_tool
 def get_stock_news_sentiment(ticker: str, time_from: str, time_to: str, sort: str = "RELEVANCE") -> dict:
     """
     Synchronously fetch news for a single stock ticker.
-    Internally calls the async `fetch_single_news` function.
+    Internally runs the async `fetch_single_news` function on the shared session pool loop.
     """
     time_from = normalize_time_string(time_from)
     time_to = normalize_time_string(time_to)
     # print(time_from, "*********", time_to)
 
-    full_result = asyncio.run(fetch_single_news(ticker, time_from, time_to, sort))
+    full_result = run_in_session_pool(fetch_single_news(ticker, time_from, time_to, sort))
+    return simplify_news_result(full_result)
+
+
+def simplify_news_result(full_result: dict) -> dict:
+    """
+    Keep only the fields the analyst needs from a raw NEWS_SENTIMENT result,
+    capped at MAX_articles per ticker.
+    """
     simplified = {}
     
     for ticker, articles in full_result.items():
@@ -198,6 +425,7 @@ get_stock_news_sentiment._tool_config = {
 }
 
 
+@memoize_tool
 def get_stock_price_history(ticker: str, today_date: str) -> dict:
     """
     Fetch historical adjusted daily stock price data for a stock ticker,
@@ -269,6 +497,7 @@ get_stock_price_history._tool_config = {
     }
 }
 
+@memoize_tool
 def get_stock_fundamental_data(ticker: str, today: str) -> dict:
     """
     Synchronously fetch fundamental data (e.g., OVERVIEW, INCOME_STATEMENT) for a single stock ticker.
@@ -307,10 +536,11 @@ get_stock_fundamental_data._tool_config = {
 }
 
 
+@memoize_tool
 def get_earning_call_transcript(ticker: str, quarter: str) -> dict:
     """
     Synchronously fetch earnings call transcript for a single stock ticker and fiscal quarter.
-    Internally calls the async `fetch_single_ec_transcript` function.
+    Internally runs the async `fetch_single_ec_transcript` function on the shared session pool loop.
 
     Args:
         ticker (str): The stock ticker symbol, e.g., 'AAPL'.
@@ -319,7 +549,7 @@ def get_earning_call_transcript(ticker: str, quarter: str) -> dict:
     Returns:
         dict: A dictionary containing the earnings call transcript for the specified ticker and quarter.
     """
-    return asyncio.run(fetch_single_ec_transcript(ticker, quarter))
+    return run_in_session_pool(fetch_single_ec_transcript(ticker, quarter))
 
 get_earning_call_transcript._tool_config = {
     "name": "fetch_earning_call_transcript",
@@ -339,4 +569,50 @@ get_earning_call_transcript._tool_config = {
             "description": "Fiscal quarter in format 'YYYYQM', e.g., '2023Q4'."
         }
     }
-}
\ No newline at end of file
+}
+
+
+# === Async tool variants ===
+# Registered by `register_tool(..., use_async=True)` for pipelines driven through
+# `a_initiate_chat`, so many pipelines can share one event loop.
+
+def _as_async_tool(func):
+    """
+    Wrap a blocking tool into a coroutine that runs it in the default thread pool,
+    keeping the signature and `_tool_config` of the original tool.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    wrapper._tool_config = func._tool_config
+    return wrapper
+
+
+@memoize_tool
+async def a_get_stock_news_sentiment(ticker: str, time_from: str, time_to: str, sort: str = "RELEVANCE") -> dict:
+    """
+    Async version of `get_stock_news_sentiment`; the request itself runs on the shared session pool loop.
+    """
+    time_from = normalize_time_string(time_from)
+    time_to = normalize_time_string(time_to)
+
+    full_result = await fetch_single_news(ticker, time_from, time_to, sort)
+    return simplify_news_result(full_result)
+
+a_get_stock_news_sentiment._tool_config = get_stock_news_sentiment._tool_config
+
+
+@memoize_tool
+async def a_get_earning_call_transcript(ticker: str, quarter: str) -> dict:
+    """
+    Async version of `get_earning_call_transcript`; the request itself runs on the shared session pool loop.
+    """
+    return await fetch_single_ec_transcript(ticker, quarter)
+
+a_get_earning_call_transcript._tool_config = get_earning_call_transcript._tool_config
+
+
+# Local-file tools: disk reads go to a worker thread so they don't stall the loop
+a_get_stock_price_history = _as_async_tool(get_stock_price_history)
+a_get_stock_fundamental_data = _as_async_tool(get_stock_fundamental_data)
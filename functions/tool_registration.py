@@ -1,18 +1,27 @@
 from config.agent_config import agent_settings
 from autogen import register_function
-from autogen import UserProxyAgent, AssistantAgent
+from autogen import Agent, UserProxyAgent, AssistantAgent
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import Any
+import asyncio
+import contextvars
 import inspect
+import threading
+import time
 import functions.stock_data as stock_data_module
 
 
-def register_tool(user_proxy: UserProxyAgent, agent: AssistantAgent):
+def register_tool(user_proxy: UserProxyAgent, agent: AssistantAgent, use_async: bool = False):
     """
     Registers all tools listed for the agent in agent_config, if the function exists in stock_data.py
     and contains _tool_config.
+
+    With `use_async=True` the coroutine variant `a_<tool_name>` is registered instead (when
+    stock_data.py provides one), so tools run on the event loop driving `a_initiate_chat`.
     """
     agent_name = agent.name
     enabled_tool_names = agent_settings.get("enabled_tools", {}).get(agent_name, [])
+    enable_concurrent_tool_calls(user_proxy)
 
     for tool_name in enabled_tool_names:
         func = getattr(stock_data_module, tool_name, None)
@@ -22,6 +31,8 @@ def register_tool(user_proxy: UserProxyAgent, agent: AssistantAgent):
         if not hasattr(func, "_tool_config"):
             print(f"[WARN] Function '{tool_name}' lacks '_tool_config' metadata.")
             continue
+        if use_async:
+            func = getattr(stock_data_module, f"a_{tool_name}", func)
 
         meta = func._tool_config
         register_function(
@@ -31,4 +42,150 @@ def register_tool(user_proxy: UserProxyAgent, agent: AssistantAgent):
             name=meta["name"],
             description=meta["description"]
         )
+        if "timeout" in meta:
+            user_proxy._tool_timeouts[meta["name"]] = meta["timeout"]
         print(f"[INFO] Registered '{tool_name}' for agent '{agent_name}'.")
+
+
+def enable_concurrent_tool_calls(executor: UserProxyAgent):
+    """
+    Make `executor` run all tool calls of one assistant message concurrently instead of
+    one after another. Results keep the order of the tool calls and every call gets a
+    timeout (`_tool_config["timeout"]`, else `tool_execution.default_timeout`).
+
+    Sync chats run the calls on one thread pool shared by all executors in the process;
+    the timeout counts from when a call starts running, so waiting for a free thread
+    does not use it up. Async chats run sync tools via `asyncio.to_thread`, whose
+    timeout also covers waiting for the loop's default executor.
+
+    Idempotent; `register_tool` calls it for every executor it registers tools on.
+    """
+    if getattr(executor, "_concurrent_tool_calls_enabled", False):
+        return
+
+    settings = agent_settings.get("tool_execution", {})
+    executor._tool_timeouts = {}
+    executor._tool_default_timeout = settings.get("default_timeout", 60)
+
+    # register_reply inserts at the front, so the async reply ends up first in the list;
+    # autogen skips it in sync chats and the sync one then handles the message.
+    executor.register_reply([Agent, None], _concurrent_tool_calls_reply)
+    executor.register_reply([Agent, None], _a_concurrent_tool_calls_reply, ignore_async_in_sync_chat=True)
+    executor._concurrent_tool_calls_enabled = True
+
+
+_tool_thread_pool = None
+_tool_thread_pool_lock = threading.Lock()
+
+
+def _get_tool_thread_pool() -> ThreadPoolExecutor:
+    """
+    Return the process-wide tool call thread pool, creating it on first use.
+    Its threads are joined at interpreter exit like any ThreadPoolExecutor's.
+    """
+    global _tool_thread_pool
+    with _tool_thread_pool_lock:
+        if _tool_thread_pool is None:
+            settings = agent_settings.get("tool_execution", {})
+            _tool_thread_pool = ThreadPoolExecutor(
+                max_workers=settings.get("max_workers", 16),
+                thread_name_prefix="tool-calls"
+            )
+        return _tool_thread_pool
+
+
+def _tool_call_timeout(executor, tool_call: dict) -> float:
+    name = tool_call.get("function", {}).get("name")
+    return executor._tool_timeouts.get(name, executor._tool_default_timeout)
+
+
+def _timeout_message(tool_call: dict, timeout: float) -> str:
+    name = tool_call.get("function", {}).get("name")
+    return f"Error: Tool '{name}' timed out after {timeout}s."
+
+
+def _execute_tool_call(executor, tool_call: dict) -> str:
+    function_call = tool_call.get("function", {})
+    func = executor._function_map.get(function_call.get("name", None), None)
+    if inspect.iscoroutinefunction(func):
+        _, func_return = asyncio.run(executor.a_execute_function(function_call))
+    else:
+        _, func_return = executor.execute_function(function_call)
+    return func_return.get("content", "") or ""
+
+
+def _execute_tool_call_started(started: threading.Event, started_at: list, executor, tool_call: dict) -> str:
+    started_at.append(time.monotonic())
+    started.set()
+    return _execute_tool_call(executor, tool_call)
+
+
+def _tool_responses_reply(tool_calls: list, contents: list):
+    tool_returns = []
+    for tool_call, content in zip(tool_calls, contents):
+        tool_call_response = {"role": "tool", "content": content}
+        if tool_call.get("id") is not None:
+            tool_call_response["tool_call_id"] = tool_call["id"]
+        tool_returns.append(tool_call_response)
+    return True, {
+        "role": "tool",
+        "tool_responses": tool_returns,
+        "content": "\n\n".join(str(r["content"]) for r in tool_returns)
+    }
+
+
+def _concurrent_tool_calls_reply(recipient, messages=None, sender=None, config=None):
+    if messages is None:
+        messages = recipient._oai_messages[sender]
+    tool_calls = messages[-1].get("tool_calls") or []
+    if not tool_calls:
+        return False, None
+
+    # copy_context keeps per-pipeline context (e.g. the as-of date) visible inside the tool threads
+    pool = _get_tool_thread_pool()
+    runs = []
+    for tool_call in tool_calls:
+        started, started_at = threading.Event(), []
+        future = pool.submit(
+            contextvars.copy_context().run, _execute_tool_call_started, started, started_at, recipient, tool_call
+        )
+        runs.append((started, started_at, future))
+
+    contents = []
+    for tool_call, (started, started_at, future) in zip(tool_calls, runs):
+        timeout = _tool_call_timeout(recipient, tool_call)
+        # Queue time doesn't count: the timeout runs from when a pool thread picks the call up
+        started.wait()
+        remaining = max(0.0, started_at[0] + timeout - time.monotonic())
+        try:
+            contents.append(future.result(timeout=remaining))
+        except FuturesTimeoutError:
+            # The worker thread can't be interrupted; it finishes in the background and its result is dropped
+            contents.append(_timeout_message(tool_call, timeout))
+    return _tool_responses_reply(tool_calls, contents)
+
+
+async def _a_concurrent_tool_calls_reply(recipient, messages=None, sender=None, config=None):
+    if messages is None:
+        messages = recipient._oai_messages[sender]
+    tool_calls = messages[-1].get("tool_calls") or []
+    if not tool_calls:
+        return False, None
+
+    async def run_one(tool_call):
+        function_call = tool_call.get("function", {})
+        func = recipient._function_map.get(function_call.get("name", None), None)
+        if inspect.iscoroutinefunction(func):
+            call = recipient.a_execute_function(function_call)
+        else:
+            call = asyncio.to_thread(recipient.execute_function, function_call)
+
+        timeout = _tool_call_timeout(recipient, tool_call)
+        try:
+            _, func_return = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            return _timeout_message(tool_call, timeout)
+        return func_return.get("content", "") or ""
+
+    contents = await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls))
+    return _tool_responses_reply(tool_calls, list(contents))
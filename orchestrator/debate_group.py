@@ -1,10 +1,166 @@
+import copy
+import hashlib
+import re
+
 from autogen import GroupChat, GroupChatManager
+from autogen.agentchat.contrib.capabilities.transform_messages import TransformMessages
+
+from config.agent_config import agent_settings
+
+
+def _count_tokens(messages: list) -> int:
+    try:
+        from autogen.token_count_utils import count_token
+        return count_token(messages)
+    except Exception:
+        return sum(len(str(m.get("content") or "")) for m in messages) // 4
+
+
+def rule_based_turn_summary(message: dict, max_chars: int = 300) -> str:
+    """
+    One-line digest of a debate turn: the leading sentences up to `max_chars`, or the tool
+    call / tool result it carried.
+    """
+    if message.get("tool_calls"):
+        calls = [call.get("function", {}).get("name", "?") for call in message["tool_calls"]]
+        return f"requested {', '.join(calls)}"
+    text = message.get("content") or ""
+    if not isinstance(text, str):
+        text = str(text)
+    text = " ".join(re.sub(r"[*#`>|]+", "", text).split())
+    if message.get("role") == "tool" or message.get("tool_responses"):
+        return f"tool result: {text[:120]}"
+    digest = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if len(digest) + len(sentence) > max_chars:
+            break
+        digest += sentence + " "
+    return digest.strip() or text[:max_chars]
+
+
+def llm_turn_summarizer(llm_config: dict):
+    """
+    Summarizer backed by a (cheap) model, for `DebateTranscriptCompaction(summarizer=...)`.
+    """
+    from autogen import OpenAIWrapper
+    from utils.fake_llm import FakeModelClient, uses_fake_llm
+    client = OpenAIWrapper(**{k: v for k, v in llm_config.items() if k not in ("tools", "functions")})
+    if uses_fake_llm(llm_config):
+        client.register_model_client(model_client_cls=FakeModelClient, agent_name="summary_agent")
+
+    def summarize(message: dict, max_chars: int = 300) -> str:
+        response = client.create(messages=[
+            {"role": "system", "content": f"Summarize this debate turn in at most {max_chars} characters. Keep numbers and the main claim."},
+            {"role": "user", "content": f"{message.get('name', '')}: {message.get('content') or ''}"}
+        ])
+        return client.extract_text_or_completion_object(response)[0]
+    return summarize
+
+
+class DebateTranscriptCompaction:
+    def __init__(self, keep_speakers: list, max_chars_per_turn: int = 300, min_messages: int = 6, summarizer=None):
+        """
+        Message transform (autogen TransformMessages protocol) that caps what each debate
+        speaker sends to the LLM. The opening message (the analyst brief) and everything
+        from the latest turn of each `keep_speakers` side onward stay verbatim; older turns
+        are folded into one compact summary message. Prompt size per turn stays roughly
+        flat instead of growing with every round.
+
+        Args:
+            keep_speakers (list): Agent names whose latest turn must stay verbatim.
+            max_chars_per_turn (int): Length budget of each older turn's digest.
+            min_messages (int): Don't compact shorter transcripts.
+            summarizer (callable, optional): (message, max_chars) -> str; rule-based by default.
+        """
+        self.keep_speakers = set(keep_speakers)
+        self.max_chars_per_turn = max_chars_per_turn
+        self.min_messages = min_messages
+        self.summarizer = summarizer or rule_based_turn_summary
+        self.turn_log = []
+        self._digests = {}
 
-def create_debate_group(bullish_agent, bearish_agent, calculator_agent, summary_agent):
+    def _digest(self, message: dict) -> str:
+        key = hashlib.sha256(repr((message.get("name"), message.get("content"), message.get("tool_calls"))).encode("utf-8")).hexdigest()
+        if key not in self._digests:
+            self._digests[key] = self.summarizer(message, self.max_chars_per_turn)
+        return self._digests[key]
+
+    def _verbatim_start(self, messages: list) -> int:
+        latest = {}
+        for i, message in enumerate(messages[1:], 1):
+            if message.get("name") in self.keep_speakers:
+                latest[message["name"]] = i
+        start = min(latest.values()) if latest else len(messages)
+        # Never split a tool call from its results
+        while start > 1 and (messages[start].get("role") == "tool" or messages[start].get("tool_responses")):
+            start -= 1
+        return start
+
+    def apply_transform(self, messages: list) -> list:
+        tokens_before = _count_tokens(messages)
+        start = self._verbatim_start(messages) if len(messages) >= self.min_messages else 1
+        older = messages[1:start]
+        if older:
+            digest = "\n".join(f"- {m.get('name', m.get('role'))}: {self._digest(m)}" for m in older)
+            summary = {"role": "user", "name": "debate_summary", "content": f"[Earlier debate turns, compacted]\n{digest}"}
+            messages = [copy.deepcopy(messages[0]), summary] + copy.deepcopy(messages[start:])
+        self.turn_log.append({
+            "messages": len(messages),
+            "compacted": len(older),
+            "tokens_before": tokens_before,
+            "tokens_after": _count_tokens(messages) if older else tokens_before,
+        })
+        return messages
+
+    def get_logs(self, pre_transform_messages: list, post_transform_messages: list):
+        if len(pre_transform_messages) == len(post_transform_messages):
+            return "No debate turns compacted.", False
+        entry = self.turn_log[-1] if self.turn_log else {}
+        return (
+            f"Compacted {entry.get('compacted')} debate turns: "
+            f"{entry.get('tokens_before')} -> {entry.get('tokens_after')} tokens.",
+            True
+        )
+
+    def reset(self):
+        self.turn_log = []
+        self._digests = {}
+
+
+def create_debate_group(bullish_agent, bearish_agent, calculator_agent, summary_agent, summary_llm_config: dict = None):
     group = GroupChat(
         agents=[bullish_agent, bearish_agent, calculator_agent, summary_agent],
         messages=[],
         max_round=10,
         speaker_selection_method="round_robin"
     )
-    return GroupChatManager(groupchat=group)
+    manager = GroupChatManager(groupchat=group)
+
+    settings = agent_settings.get("debate_compaction", {})
+    manager._debate_compaction = None
+    if settings.get("enabled", True):
+        compaction = DebateTranscriptCompaction(
+            keep_speakers=settings.get("keep_speakers", [bullish_agent.name, bearish_agent.name]),
+            max_chars_per_turn=settings.get("max_chars_per_turn", 300),
+            min_messages=settings.get("min_messages", 6),
+            summarizer=llm_turn_summarizer(summary_llm_config) if summary_llm_config else None
+        )
+        capability = TransformMessages(transforms=[compaction], verbose=False)
+        for agent in group.agents:
+            capability.add_to_agent(agent)
+        manager._debate_compaction = compaction
+    return manager
+
+
+def debate_turn_tokens(debate_manager) -> list:
+    """
+    Per-turn prompt tokens of the current debate, before and after compaction.
+    """
+    compaction = getattr(debate_manager, "_debate_compaction", None)
+    return list(compaction.turn_log) if compaction is not None else []
+
+
+def reset_debate_compaction(debate_manager):
+    compaction = getattr(debate_manager, "_debate_compaction", None)
+    if compaction is not None:
+        compaction.reset()
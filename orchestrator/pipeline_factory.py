@@ -0,0 +1,102 @@
+from orchestrator.debate_group import create_debate_group
+
+from agents.analyst_agent import get_analyst_agent
+from agents.bullish_agent import get_bullish_agent
+from agents.bearish_agent import get_bearish_agent
+from agents.trader_agent import get_trader_agent
+from agents.spokesperson_agent import get_spokesperson_agent
+from agents.recommender_agent import get_recommender_agent
+from agents.risk_manager_agent import get_risk_manager_agent
+from agents.manager_agent import get_manager_agent
+from agents.completeness_checker import get_completeness_check_agent
+from agents.calculator_agent import get_calculator_agent
+from agents.summary_agent import get_summary_agent
+from agents.user_proxy import get_user_proxy
+
+from functions.tool_registration import register_tool
+from utils.fake_llm import register_fake_llm
+from utils.message_utils import track_last_replies
+from config.agent_config import agent_settings
+
+
+def build_pipeline(llm_config, use_async_tools: bool = False, risk_profile: str = None):
+    """
+    Build a fresh, isolated set of agents for one recommendation pipeline.
+
+    autogen keeps conversation state on the agent objects, so pipelines that
+    run at the same time must not share agents.
+
+    Args:
+        llm_config (dict): autogen LLM config shared by all assistant agents.
+        use_async_tools (bool): Register the coroutine variants of the tools,
+            for pipelines driven through `a_initiate_chat`.
+        risk_profile (str, optional): Risk profile of the risk manager; defaults to agent_settings.
+
+    Returns:
+        tuple: (agents, user_proxy, debate_mgr)
+    """
+    user_proxy = get_user_proxy()
+
+    analyst = get_analyst_agent(llm_config)
+    bullish = get_bullish_agent(llm_config)
+    bearish = get_bearish_agent(llm_config)
+    trader = get_trader_agent(llm_config)
+    spokesperson = get_spokesperson_agent(llm_config)
+    recommender = get_recommender_agent(llm_config)
+    risk_manager = get_risk_manager_agent(llm_config, risk_profile)
+    manager = get_manager_agent(llm_config)
+    completeness_checker = get_completeness_check_agent(llm_config)
+    calculator_agent = get_calculator_agent(llm_config)
+    summary_agent = get_summary_agent(llm_config)
+
+    register_tool(user_proxy, analyst, use_async=use_async_tools)
+    register_tool(calculator_agent, bullish, use_async=use_async_tools)
+    register_tool(calculator_agent, bearish, use_async=use_async_tools)
+
+    compaction = agent_settings.get("debate_compaction", {})
+    debate_mgr = create_debate_group(
+        bullish, bearish, calculator_agent, summary_agent,
+        summary_llm_config=llm_config if compaction.get("summarizer") == "llm" else None
+    )
+
+    llm_agents = [
+        analyst, bullish, bearish, trader, spokesperson, recommender, risk_manager,
+        manager, completeness_checker, calculator_agent, summary_agent
+    ]
+    # Offline backend (config/api_config.py: fake_llm_config) needs its client attached per agent
+    register_fake_llm(llm_agents)
+    track_last_replies(llm_agents)
+
+    agents = {
+        "analyst_agent": analyst,
+        "bullish_agent": bullish,
+        "bearish_agent": bearish,
+        "trader_agent": trader,
+        "spokesperson_agent": spokesperson,
+        "trade_recommender_agent": recommender,
+        "risk_manager_agent": risk_manager,
+        "manager_agent": manager,
+        "completeness_checker": completeness_checker
+    }
+    return agents, user_proxy, debate_mgr
+
+
+def build_profile_agents(llm_config, risk_profile: str) -> dict:
+    """
+    Build the risk-review and final-decision agents for one risk profile.
+
+    Used by the multi-profile workflow: the data, debate and trader stages run once on a
+    regular pipeline, then each profile runs its risk and manager stages on its own agents.
+
+    Returns:
+        dict: {"trade_recommender_agent", "risk_manager_agent", "completeness_checker", "manager_agent"}
+    """
+    profile_agents = {
+        "trade_recommender_agent": get_recommender_agent(llm_config),
+        "risk_manager_agent": get_risk_manager_agent(llm_config, risk_profile),
+        "completeness_checker": get_completeness_check_agent(llm_config),
+        "manager_agent": get_manager_agent(llm_config)
+    }
+    register_fake_llm(profile_agents.values())
+    track_last_replies(profile_agents.values())
+    return profile_agents
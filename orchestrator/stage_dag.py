@@ -0,0 +1,360 @@
+import contextvars
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config.agent_config import agent_settings
+from functions.stock_data import set_as_of_date, reset_as_of_date
+from functions.market_context import market_context_brief, format_market_context
+from utils.log_utils import pipeline_logger as logger
+from utils.telemetry import PipelineTelemetry, current_telemetry
+from utils.message_utils import reset_conversations
+from orchestrator import stock_recommendation_workflow as workflow
+
+
+def content_hash(value) -> str:
+    """
+    Stable sha256 of a JSON-serializable value (dict key order doesn't matter).
+    """
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def agent_fingerprint(agent) -> dict:
+    """
+    What an agent contributes to a stage's output: system message, model settings and tools.
+    API keys and endpoints are left out so rotating credentials doesn't invalidate the cache.
+    """
+    llm_config = getattr(agent, "llm_config", None) or {}
+    return {
+        "name": agent.name,
+        "system_message": getattr(agent, "system_message", ""),
+        "temperature": llm_config.get("temperature"),
+        "models": [
+            (c.get("model"), c.get("model_client_cls"))
+            for c in llm_config.get("config_list", [])
+        ],
+        "tools": sorted(t["function"]["name"] for t in llm_config.get("tools", [])),
+    }
+
+
+def code_fingerprint(*funcs) -> list:
+    """
+    Source of the prompt builders a stage uses, so editing a prompt re-runs that stage.
+    """
+    return [inspect.getsource(func) for func in funcs]
+
+
+class Stage:
+    def __init__(self, name: str, func, inputs: list, fingerprint=None):
+        """
+        One node of a StageDAG.
+
+        Args:
+            name (str): Stage name; its output is available to other stages under this name.
+            func (callable): Called as func(**{input: value}) and returns a JSON-serializable output.
+            inputs (list): Names of upstream stages or run parameters the stage reads.
+            fingerprint: JSON-serializable description of everything besides the inputs
+                that affects the output (agents, prompt code); part of the cache key.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.fingerprint = content_hash(fingerprint)
+
+    def cache_key(self, input_hashes: dict) -> str:
+        return content_hash({
+            "stage": self.name,
+            "fingerprint": self.fingerprint,
+            "inputs": {name: input_hashes[name] for name in self.inputs}
+        })
+
+
+class StageCache:
+    def __init__(self, cache_dir: str):
+        """
+        Content-addressed store of stage outputs: {cache_dir}/{stage}/{key}.json.
+        Entries are immutable, so concurrent runs can share a directory.
+        """
+        self.cache_dir = cache_dir
+
+    def _path(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage_name, f"{key}.json")
+
+    def get(self, stage_name: str, key: str):
+        """
+        Returns:
+            tuple: (found, output)
+        """
+        try:
+            with open(self._path(stage_name, key), "r", encoding="utf-8") as f:
+                return True, json.load(f)["output"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return False, None
+
+    def put(self, stage_name: str, key: str, output):
+        path = self._path(stage_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage_name, "created": time.time(), "output": output}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class StageDAG:
+    def __init__(self, stages: list, cache: StageCache = None, max_workers: int = 4):
+        """
+        Executor for a DAG of memoized stages.
+
+        A stage's cache key hashes its fingerprint and the content of its inputs, so a
+        stage re-runs only if its own code/agents changed or an upstream output changed.
+        Stages whose inputs are all available run in parallel. Parallel stages share the
+        pipeline telemetry, so their per-stage token attribution can overlap.
+
+        Args:
+            stages (list): Stage objects; inputs not produced by a stage are run parameters.
+            cache (StageCache, optional): Where outputs are memoized; None disables caching.
+            max_workers (int): Max stages running at the same time.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names in DAG")
+        self.cache = cache
+        self.max_workers = max_workers
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in stage DAG: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for upstream in self.stages[name].inputs:
+                if upstream in self.stages:
+                    visit(upstream, path + [name])
+            state[name] = "done"
+
+        for name in self.stages:
+            visit(name, [])
+
+    def _execute(self, stage: Stage, inputs: dict, key: str, force: bool):
+        if self.cache is not None and not force:
+            found, output = self.cache.get(stage.name, key)
+            if found:
+                telemetry = current_telemetry.get()
+                if telemetry is not None:
+                    with telemetry.stage(stage.name) as record:
+                        record["cached"] = True
+                return output, True
+        output = stage.func(**inputs)
+        if self.cache is not None:
+            self.cache.put(stage.name, key, output)
+        return output, False
+
+    def run(self, params: dict, force: set = None):
+        """
+        Run every stage, reusing cached outputs where the key matches.
+
+        Args:
+            params (dict): Run parameters (e.g. stock_name, today_date, risk_profile).
+            force (set, optional): Stage names to re-run even if cached.
+
+        Returns:
+            tuple: ({stage: output}, {stage: "cached" or "ran"})
+        """
+        missing = {i for s in self.stages.values() for i in s.inputs} - set(self.stages) - set(params)
+        if missing:
+            raise ValueError(f"Missing DAG parameters: {sorted(missing)}")
+
+        force = force or set()
+        values = dict(params)
+        hashes = {name: content_hash(value) for name, value in params.items()}
+        status = {}
+        pending = set(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                for name in sorted(pending):
+                    stage = self.stages[name]
+                    if all(i in values for i in stage.inputs):
+                        pending.discard(name)
+                        inputs = {i: values[i] for i in stage.inputs}
+                        key = stage.cache_key(hashes)
+                        # Stages run in a copy of the caller's context (as-of date, ticker, telemetry)
+                        future = executor.submit(
+                            contextvars.copy_context().run, self._execute, stage, inputs, key, name in force
+                        )
+                        running[future] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    output, cached = future.result()
+                    values[name] = output
+                    hashes[name] = content_hash(output)
+                    status[name] = "cached" if cached else "ran"
+                    logger.info(f"[stage] {name} {status[name]}")
+        return {name: values[name] for name in self.stages}, status
+
+
+def build_recommendation_dag(agents: dict, user_proxy, debate_manager, profile_agents: dict = None, cache: StageCache = None) -> StageDAG:
+    """
+    The recommendation pipeline as a StageDAG:
+
+        data ---+
+                +-> brief -> debate -> trader -> risk[profile] -> manager[profile]
+        market -+
+
+    `market` depends only on the date, so every ticker of a day reuses one cached result,
+    and it runs in parallel with the analyst. The risk/manager stages of different profiles
+    are independent and run in parallel too.
+
+    Args:
+        agents (dict): Agents of the pipeline (see `build_pipeline`).
+        profile_agents (dict, optional): {risk_profile: agents} from `build_profile_agents`.
+            Defaults to one profile, "risk_profile", served by `agents`.
+        cache (StageCache, optional): Stage output cache.
+    """
+    debate_agents = list(debate_manager.groupchat.agents)
+
+    def data(stock_name, today_date):
+        with current_telemetry.get().stage("data"):
+            return workflow._run_analyst(stock_name, agents, user_proxy, today_date, {})
+
+    def market(today_date):
+        return market_context_brief(today_date)
+
+    def brief(data, market):
+        return workflow.build_debate_prompt(data, market)
+
+    def debate(brief):
+        return workflow._run_debate_stage(agents, user_proxy, debate_manager, brief, {}, current_telemetry.get())
+
+    def trader(brief, debate):
+        return workflow._run_trader_stage(agents, brief, debate, {}, current_telemetry.get())
+
+    stages = [
+        Stage("data", data, ["stock_name", "today_date"],
+              [agent_fingerprint(agents["analyst_agent"]), code_fingerprint(workflow._run_analyst, workflow.build_analyst_prompt)]),
+        Stage("market", market, ["today_date"],
+              [agent_settings.get("market_context", {}), code_fingerprint(format_market_context)]),
+        Stage("brief", brief, ["data", "market"], [workflow.DEBATE_INSTRUCTIONS, code_fingerprint(workflow.build_debate_prompt)]),
+        Stage("debate", debate, ["brief"],
+              [[agent_fingerprint(a) for a in debate_agents], code_fingerprint(workflow.collect_debate_summary)]),
+        Stage("trader", trader, ["brief", "debate"],
+              [agent_fingerprint(agents["trader_agent"]), agent_fingerprint(agents["spokesperson_agent"]),
+               workflow.TRADER_INSTRUCTIONS, code_fingerprint(workflow.build_trader_prompt)]),
+    ]
+
+    for risk_profile, own_agents in (profile_agents or {"risk_profile": agents}).items():
+        profile_param = "risk_profile" if profile_agents is None else None
+        stages += _profile_stages(risk_profile, own_agents, profile_param)
+
+    return StageDAG(stages, cache=cache, max_workers=agent_settings.get("stage_cache", {}).get("max_workers", 4))
+
+
+def _profile_stages(risk_profile: str, own_agents: dict, profile_param: str = None) -> list:
+    """
+    Risk and manager stages for one profile. With `profile_param`, the profile comes from
+    that run parameter instead of being fixed.
+    """
+    suffix = "" if profile_param else f"[{risk_profile}]"
+    risk_name, manager_name = f"risk{suffix}", f"manager{suffix}"
+
+    def risk(brief, debate, trader, **params):
+        profile = params.get(profile_param, risk_profile)
+        return workflow._run_risk_stage(own_agents, profile, brief, debate, trader, {}, current_telemetry.get())
+
+    def manager(trader, **upstream):
+        risk_decision = upstream[risk_name]
+        decision, manager_fail, fail_content = workflow._run_manager_stage(own_agents, trader, risk_decision, {}, current_telemetry.get())
+        return {"manager": decision, "manager_fail": manager_fail, "fail_content": fail_content}
+
+    risk_inputs = ["brief", "debate", "trader"] + ([profile_param] if profile_param else [])
+    return [
+        Stage(risk_name, risk, risk_inputs,
+              [agent_fingerprint(own_agents["risk_manager_agent"]), agent_fingerprint(own_agents["trade_recommender_agent"]),
+               risk_profile if not profile_param else None,
+               workflow.RISK_INSTRUCTIONS, code_fingerprint(workflow.build_risk_prompt)]),
+        Stage(manager_name, manager, ["trader", risk_name],
+              [agent_fingerprint(own_agents["manager_agent"]), agent_fingerprint(own_agents["completeness_checker"]),
+               workflow.MANAGER_HINTS, workflow.MANAGER_MAX_RETRIES,
+               workflow.MANAGER_INSTRUCTIONS, code_fingerprint(workflow.build_manager_prompt)]),
+    ]
+
+
+def get_stage_cache() -> StageCache:
+    """
+    Stage cache configured in agent_settings["stage_cache"], or None when disabled.
+    """
+    settings = agent_settings.get("stage_cache", {})
+    if not settings.get("enabled", True):
+        return None
+    return StageCache(settings.get("dir", os.path.join("results", "stage_cache")))
+
+
+def run_stock_recommendation_dag(
+    stock_name: str,
+    agents: dict,
+    user_proxy,
+    debate_manager,
+    risk_profile: str,
+    today_date: str,
+    profile_agents: dict = None,
+    force: set = None,
+    run_record: dict = None
+):
+    """
+    `run_stock_recommendation` on the memoized stage DAG. Only stages whose agents, prompt
+    code or upstream outputs changed are executed; the rest come from the stage cache, so
+    prompt experiments on downstream stages reuse stored data/debate results.
+
+    Args:
+        profile_agents (dict, optional): {risk_profile: agents}; fans the risk and manager
+            stages out over several profiles (`risk_profile` is then ignored).
+        force (set, optional): Stage names to re-run even if cached.
+        run_record (dict, optional): Filled with the stage "outputs", "stage_status" and "telemetry".
+
+    Returns:
+        tuple or dict: (decisions, manager_fail, fail_content), or {risk_profile: that tuple}
+            when `profile_agents` is given.
+    """
+    log_token = workflow.setup_agent_logger(stock_name)
+    as_of_token = set_as_of_date(today_date)
+    all_agents = workflow.pipeline_agents(agents, debate_manager)
+    for profile, own_agents in (profile_agents or {}).items():
+        all_agents.update({f"{agent.name}[{profile}]": agent for agent in own_agents.values()})
+    reset_conversations([user_proxy, *all_agents.values()], debate_manager)
+    telemetry = PipelineTelemetry(stock_name, today_date, risk_profile, all_agents)
+    telemetry_token = current_telemetry.set(telemetry)
+    try:
+        dag = build_recommendation_dag(agents, user_proxy, debate_manager, profile_agents, cache=get_stage_cache())
+        outputs, status = dag.run(
+            {"stock_name": stock_name, "today_date": today_date, "risk_profile": risk_profile},
+            force=force
+        )
+    finally:
+        reset_as_of_date(as_of_token)
+        current_telemetry.reset(telemetry_token)
+        telemetry_record = telemetry.write()
+        workflow.log_memory_usage(telemetry_record, [user_proxy, *all_agents.values()])
+        workflow.reset_log_ticker(log_token)
+
+    if run_record is not None:
+        run_record["outputs"] = outputs
+        run_record["stage_status"] = status
+        run_record["telemetry"] = telemetry_record["stages"]
+
+    results = {}
+    for profile in (profile_agents or {risk_profile: agents}):
+        suffix = "" if profile_agents is None else f"[{profile}]"
+        risk_decision = outputs[f"risk{suffix}"]
+        manager = outputs[f"manager{suffix}"]
+        decisions = workflow.finalize_decisions(outputs["trader"], risk_decision, manager["manager"], today_date)
+        results[profile] = (decisions, manager["manager_fail"], manager["fail_content"])
+    return results if profile_agents is not None else results[risk_profile]
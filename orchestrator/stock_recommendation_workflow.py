@@ -1,31 +1,158 @@
-from utils.message_utils import get_last_reply_from
-from functions.stock_data import data_collect
+from utils.message_utils import get_last_reply_from, reset_conversations, retained_message_count
+from functions.stock_data import data_collect, set_as_of_date, reset_as_of_date, get_tool_cache_stats
+from functions.market_context import market_context_brief
+from orchestrator.debate_group import debate_turn_tokens, reset_debate_compaction
 import re
 from utils.fin_utils import extract_trade_decisions
-import logging
-import os
+from utils.log_utils import configure_logging, pipeline_logger as logger, set_log_ticker, reset_log_ticker
+from utils.telemetry import PipelineTelemetry, current_telemetry, snapshot_usage, diff_usage
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 def setup_agent_logger(stock_name: str):
-    log_filename = f"{stock_name}_usage.log"
-    log_path = os.path.join("logs", log_filename)
-
-    os.makedirs("logs", exist_ok=True)
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(message)s",
-        handlers=[
-            logging.FileHandler(log_path),
-            logging.StreamHandler()
-        ],
-        force=True  # 强制重设 handler，防止多次调用 basicConfig 无效
-    )
+    """
+    Configure logging once per process and route this context's records to logs/{stock_name}_usage.log.
+
+    Returns:
+        contextvars.Token: Pass to `reset_log_ticker` when the pipeline finishes.
+    """
+    configure_logging()
+    return set_log_ticker(stock_name)
 
 def log_agent_usage(agent_name: str, agent_obj):
     actual = agent_obj.get_actual_usage()
     total = agent_obj.get_total_usage()
-    logging.info(f"[{agent_name}] Actual Usage (no cache): {actual}")
-    logging.info(f"[{agent_name}] Total  Usage (with cache): {total}")
+    logger.info(f"[{agent_name}] Actual Usage (no cache): {actual}")
+    logger.info(f"[{agent_name}] Total  Usage (with cache): {total}")
+    stats = getattr(agent_obj, "_llm_call_stats", None)
+    if stats and stats["prompt_tokens"]:
+        ratio = stats["cached_tokens"] / stats["prompt_tokens"]
+        logger.info(f"[{agent_name}] Provider-cached prompt tokens: {stats['cached_tokens']}/{stats['prompt_tokens']} ({ratio:.1%})")
+
+
+def log_debate_tokens(debate_manager, record: dict):
+    """
+    Report the debate's per-turn prompt size (after transcript compaction) on the stage record.
+    """
+    turns = debate_turn_tokens(debate_manager)
+    if not turns:
+        return
+    record["turn_prompt_tokens"] = [t["tokens_after"] for t in turns]
+    record["uncompacted_prompt_tokens"] = sum(t["tokens_before"] for t in turns)
+    logger.info(
+        f"Debate prompt tokens per turn: {record['turn_prompt_tokens']} "
+        f"(total {sum(record['turn_prompt_tokens'])}, uncompacted {record['uncompacted_prompt_tokens']})"
+    )
+
+
+def log_memory_usage(telemetry_record: dict, agents):
+    logger.info(
+        f"Memory: {retained_message_count(agents)} retained messages | "
+        f"RSS {telemetry_record['rss_mb']} MB ({telemetry_record['rss_growth_mb']:+} MB this run)"
+    )
+
+
+def pipeline_agents(agents: dict, debate_manager) -> dict:
+    """
+    All LLM agents of a pipeline by name, including the debate-only ones (calculator, summary).
+    """
+    all_agents = {agent.name: agent for agent in agents.values()}
+    for agent in debate_manager.groupchat.agents:
+        all_agents.setdefault(agent.name, agent)
+    return all_agents
+
+
+MANAGER_HINTS = [
+    "",  # 第一次不加任何提示
+    "\n[Reminder: Respond with EXECUTE_TRADE or DO_NOT_EXECUTE and provide reasons.]",
+    "\n[Your reply must begin with EXECUTE_TRADE or DO_NOT_EXECUTE.]",
+    "\n[Please clearly state EXECUTE_TRADE or DO_NOT_EXECUTE at the beginning of your response.]",
+    "\n[Format reminder: Response should contain EXECUTE_TRADE or DO_NOT_EXECUTE plus justification.]"
+]
+
+MANAGER_MAX_RETRIES = 5
+
+
+def strip_terminate(prompt: str) -> str:
+    # Prevent upstream TERMINATE markers from ending the next conversation early
+    return re.sub(r"(?i)terminate", "", prompt)
+
+
+# Prompts put their static instructions first and the ticker-day data last, so every prompt
+# of a stage starts with the same bytes and Azure/OpenAI prefix caching can reuse it.
+DEBATE_INSTRUCTIONS = (
+    "You are now in a team discussion. \n"
+    "Bullish researcher: explain why this stock is promising.\n"
+    "Bearish researcher: explain the risks and why it might not be a good investment.\n"
+    "Calculator agent: focus on function call caculation and not giving any idea output.\n"
+    "Summary agent: only work when neither of Bullish researcher/Bearish researcher has any further arguments, make summaries for both sides.\n"
+)
+
+TRADER_INSTRUCTIONS = "Based on the team discussion below, please make a BUY or SELL decision with reasoning.\n"
+
+RISK_INSTRUCTIONS = "Evaluate if the trader's decision below aligns with risk preferences. Approve or reject.\n"
+
+MANAGER_INSTRUCTIONS = "Should we execute the trade below? Decide based on the trader's and the Risk Management Team's decisions.\n"
+
+
+def build_analyst_prompt(stock_name: str, today_date: str) -> str:
+    return f"Today is {today_date}. Please collect stock data for {stock_name}."
+
+
+def build_debate_prompt(stock_data_response: str, market_brief: str = "") -> str:
+    # The per-date market context is shared by every ticker of the day, so it precedes the stock data
+    prompt = DEBATE_INSTRUCTIONS + "\n" + market_brief + "The following stock data is available:\n" + stock_data_response
+    return strip_terminate(prompt)
+
+
+def collect_debate_summary(debate_manager) -> str:
+    debate_summary = "\n--- Debate Summary ---\n"
+    for msg in debate_manager.groupchat.messages:
+        if msg['name'] == "summary_agent":
+            debate_summary += f"{msg['name']}: {msg['content']}\n"
+    return debate_summary
+
+
+def build_trader_prompt(debate_prompt: str, debate_summary: str) -> str:
+    trader_prompt = (
+        f"{TRADER_INSTRUCTIONS}\n"
+        f"{debate_prompt}\n"
+        f"{debate_summary}\n"
+    )
+    return strip_terminate(trader_prompt)
+
+
+def build_risk_prompt(debate_prompt: str, debate_summary: str, trader_decision: str, risk_profile: str) -> str:
+    risk_prompt = (
+        f"{RISK_INSTRUCTIONS}\n"
+        f"Current Risk Profile: {risk_profile}\n\n"
+        f"{debate_prompt}\n\n"
+        f"{debate_summary}\n"
+        f"Trader's Decision:\n{trader_decision}\n"
+    )
+    return strip_terminate(risk_prompt)
+
+
+def build_manager_prompt(trader_decision: str, risk_decision: str, hint: str = "") -> str:
+    manager_prompt = (
+        f"{MANAGER_INSTRUCTIONS}\n"
+        f"Trader's Decision:\n{trader_decision}\n\n"
+        f"Risk Management Team's Decision:\n{risk_decision}\n" + hint
+    )
+    return strip_terminate(manager_prompt)
+
+
+def finalize_decisions(trader_decision: str, risk_decision: str, manager_agent_decision: str, today_date: str) -> dict:
+    decision_text = trader_decision + risk_decision + manager_agent_decision
+    decisions = extract_trade_decisions(decision_text)
+    decisions["date"] = today_date
+    print(decisions)
+    logger.info(f"Decision {decisions}")
+    logger.info(f"Tool cache {get_tool_cache_stats()}")
+    return decisions
 
 
 def run_stock_recommendation(
@@ -34,7 +161,8 @@ def run_stock_recommendation(
     user_proxy,
     debate_manager,
     risk_profile: str,
-    today_date: str
+    today_date: str,
+    run_record: dict = None
 ) -> None:
     """
     Orchestrates the stock recommendation pipeline.
@@ -45,131 +173,497 @@ def run_stock_recommendation(
         user_proxy: The UserProxyAgent that handles function execution.
         debate_manager: GroupChatManager for bullish/bearish debate.
         risk_profile (str): The user's risk preference (e.g., 'Neutral').
+        run_record (dict, optional): If given, filled with the run's "stages" texts,
+            per-agent token "usage", "latency_s" and the stage "telemetry".
     """
-    setup_agent_logger(stock_name)
-    logging.info(f"[{stock_name}]  Date {today_date}")
+    with _pipeline_run(stock_name, agents, user_proxy, debate_manager, risk_profile, today_date, run_record) as (stages, telemetry):
+        return _run_stock_recommendation(stock_name, agents, user_proxy, debate_manager, risk_profile, today_date, stages, telemetry)
 
-    print("\n=== Step 1: Analyst collects data ===")
-    analyst_prompt = f"Today is {today_date}. Please collect stock data for {stock_name}."
-    user_proxy.initiate_chat(agents["analyst_agent"], message=analyst_prompt)
 
-    log_agent_usage("analyst_agent", agents["analyst_agent"])
+@contextmanager
+def _pipeline_run(stock_name, agents, user_proxy, debate_manager, risk_profile, today_date, run_record=None):
+    """
+    Setup and teardown of one ticker-day run, shared by the sync and async pipelines: the
+    log ticker, as-of date, fresh conversations and telemetry. On exit, also when the run
+    failed, the telemetry is written and `run_record` filled.
 
+    Yields:
+        tuple: (stages, telemetry)
+    """
+    log_token = setup_agent_logger(stock_name)
+    logger.info(f"[{stock_name}]  Date {today_date}")
+    as_of_token = set_as_of_date(today_date)
+    all_agents = pipeline_agents(agents, debate_manager)
+    reset_conversations([user_proxy, *all_agents.values()], debate_manager)
+    telemetry = PipelineTelemetry(stock_name, today_date, risk_profile, all_agents)
+    telemetry_token = current_telemetry.set(telemetry)
+    start = time.perf_counter()
+    usage_before = snapshot_usage(all_agents)
+    stages = {}
+    try:
+        yield stages, telemetry
+    finally:
+        reset_as_of_date(as_of_token)
+        current_telemetry.reset(telemetry_token)
+        telemetry_record = telemetry.write()
+        log_memory_usage(telemetry_record, [user_proxy, *all_agents.values()])
+        if run_record is not None:
+            run_record["stages"] = stages
+            run_record["usage"] = diff_usage(usage_before, snapshot_usage(all_agents))
+            run_record["latency_s"] = round(time.perf_counter() - start, 3)
+            run_record["telemetry"] = telemetry_record["stages"]
+        reset_log_ticker(log_token)
+
+
+def _collect_reply(agents, agent_name: str, stages: dict, stage_key: str) -> str:
+    """
+    Last reply of `agent_name`, stored as stages[stage_key] after logging the agent's usage.
+    """
+    reply = get_last_reply_from(agents[agent_name])
+    stages[stage_key] = reply
+    log_agent_usage(agent_name, agents[agent_name])
+    return reply
 
-    stock_data_response = get_last_reply_from(agents["analyst_agent"])
-    # print("Raw analyst response:", stock_data_response)
 
-    pass_data_to_analyze_prompt = "The following stock data is available:\n" + stock_data_response + "You are now in a team discussion. \nBullish researcher: explain why this stock is promising.\nBearish researcher: explain the risks and why it might not be a good investment.\nCalculator agent: focus on function call caculation and not giving any idea output.\nSummary agent: only work when neither of Bullish researcher/Bearish researcher has any further arguments, make summaries for both sides."
-    pass_data_to_analyze_prompt = re.sub(r"(?i)terminate", "", pass_data_to_analyze_prompt)
+def _collect_debate(agents, debate_manager, stages, record) -> str:
+    debate_summary = collect_debate_summary(debate_manager)
+    stages["debate_summary"] = debate_summary
+    log_debate_tokens(debate_manager, record)
 
+    log_agent_usage("bullish_agent", agents["bullish_agent"])
+    log_agent_usage("bearish_agent", agents["bearish_agent"])
+    return debate_summary
 
-    print("\n=== Step 2: Bullish vs Bearish Debate ===")
-    user_proxy.initiate_chat(debate_manager, message=pass_data_to_analyze_prompt)
 
-    debate_summary = "\n--- Debate Summary ---\n"
-    for msg in debate_manager.groupchat.messages:
-        if msg['name'] == "summary_agent":
-            debate_summary += f"{msg['name']}: {msg['content']}\n"
+def _manager_attempts(trader_decision: str, risk_decision: str, stage_record: dict):
+    """
+    Prompts of the manager's attempts, each with a stronger format hint than the last; the
+    caller breaks out once the manager gives a decision.
 
-    log_agent_usage("bullish_agent", agents["bullish_agent"])
-    log_agent_usage("bearish_agent", agents["bearish_agent"])
+    Yields:
+        tuple: (attempt, manager_prompt)
+    """
+    for attempt in range(MANAGER_MAX_RETRIES):
+        stage_record["retries"] = attempt
+        hint = MANAGER_HINTS[attempt] if attempt < len(MANAGER_HINTS) else MANAGER_HINTS[-1]
+        yield attempt, build_manager_prompt(trader_decision, risk_decision, hint)
 
 
-    print("\n=== Step 3: Trader makes a decision ===")
-    trader_prompt = (
-        f"{pass_data_to_analyze_prompt}\n"
-        f"{debate_summary}\n"
-        "Based on the above, please make a BUY or SELL decision with reasoning.\n"
+def _manager_outcome(manager_agent_decision, trader_decision, risk_decision, stages, label: str = ""):
+    """
+    Falls back to DO_NOT_EXECUTE when every manager attempt failed.
+
+    Returns:
+        tuple: (manager_agent_decision, manager_fail, fail_content)
+    """
+    manager_fail = False
+    fail_content = None
+    if manager_agent_decision is None:
+        print(f"[Warning] {label}Manager agent failed after retries. Using fallback.")
+        manager_agent_decision = "DO_NOT_EXECUTE\nReason: Unable to determine due to repeated failures."
+        manager_fail = True
+        fail_content = trader_decision + risk_decision
+
+    stages["manager"] = manager_agent_decision
+    return manager_agent_decision, manager_fail, fail_content
+
+
+def _run_stock_recommendation(stock_name, agents, user_proxy, debate_manager, risk_profile, today_date, stages, telemetry):
+    pass_data_to_analyze_prompt, debate_summary, trader_decision = _run_shared_stages(
+        stock_name, agents, user_proxy, debate_manager, today_date, stages, telemetry
+    )
+    return _run_risk_and_manager(
+        agents, risk_profile, today_date, pass_data_to_analyze_prompt, debate_summary, trader_decision, stages, telemetry
     )
-    trader_prompt = re.sub(r"(?i)terminate", "", trader_prompt)
 
-    agents["spokesperson_agent"].initiate_chat(agents["trader_agent"], message=trader_prompt)
-    trader_decision = get_last_reply_from(agents["trader_agent"])
 
-    log_agent_usage("trader_agent", agents["trader_agent"])
+def _run_shared_stages(stock_name, agents, user_proxy, debate_manager, today_date, stages, telemetry):
+    """
+    Data, debate and trader stages; they don't depend on the risk profile.
+
+    Returns:
+        tuple: (debate_prompt, debate_summary, trader_decision)
+    """
+    pass_data_to_analyze_prompt = _run_data_stage(stock_name, agents, user_proxy, today_date, stages, telemetry)
+    debate_summary = _run_debate_stage(agents, user_proxy, debate_manager, pass_data_to_analyze_prompt, stages, telemetry)
+    trader_decision = _run_trader_stage(agents, pass_data_to_analyze_prompt, debate_summary, stages, telemetry)
+    return pass_data_to_analyze_prompt, debate_summary, trader_decision
+
+
+def _run_data_stage(stock_name, agents, user_proxy, today_date, stages, telemetry) -> str:
+    print("\n=== Step 1: Analyst collects data ===")
+    with telemetry.stage("data"):
+        stock_data_response = _run_analyst(stock_name, agents, user_proxy, today_date, stages)
+        return build_debate_prompt(stock_data_response, market_context_brief(today_date))
+
+
+def _run_analyst(stock_name, agents, user_proxy, today_date, stages) -> str:
+    """
+    The analyst's data collection alone; the StageDAG runs it as its "data" stage and builds
+    the market brief and debate prompt in separate stages.
+    """
+    user_proxy.initiate_chat(agents["analyst_agent"], message=build_analyst_prompt(stock_name, today_date))
+    # print("Raw analyst response:", stock_data_response)
+    return _collect_reply(agents, "analyst_agent", stages, "analyst")
 
 
+def _run_debate_stage(agents, user_proxy, debate_manager, pass_data_to_analyze_prompt, stages, telemetry) -> str:
+    print("\n=== Step 2: Bullish vs Bearish Debate ===")
+    with telemetry.stage("debate") as record:
+        reset_debate_compaction(debate_manager)
+        user_proxy.initiate_chat(debate_manager, message=pass_data_to_analyze_prompt)
+        return _collect_debate(agents, debate_manager, stages, record)
+
+
+def _run_trader_stage(agents, pass_data_to_analyze_prompt, debate_summary, stages, telemetry) -> str:
+    print("\n=== Step 3: Trader makes a decision ===")
+    with telemetry.stage("trader"):
+        trader_prompt = build_trader_prompt(pass_data_to_analyze_prompt, debate_summary)
+
+        agents["spokesperson_agent"].initiate_chat(agents["trader_agent"], message=trader_prompt)
+        trader_decision = _collect_reply(agents, "trader_agent", stages, "trader")
 
     print("Trader Decision:\n", trader_decision)
+    return trader_decision
+
 
+def _run_risk_and_manager(agents, risk_profile, today_date, pass_data_to_analyze_prompt, debate_summary, trader_decision, stages, telemetry):
+    """
+    Risk and manager stages for one risk profile.
+
+    Returns:
+        tuple: (decisions, manager_fail, fail_content)
+    """
+    risk_decision = _run_risk_stage(agents, risk_profile, pass_data_to_analyze_prompt, debate_summary, trader_decision, stages, telemetry)
+    manager_agent_decision, manager_fail, fail_content = _run_manager_stage(agents, trader_decision, risk_decision, stages, telemetry)
+
+    # agents["completeness_checker"].initiate_chat(agents["manager_agent"], message=manager_prompt)
+    # manager_agent_decision = get_last_reply_from(agents["manager_agent"])
+    # manager_agent_decision = "EXECUTE_TRADE"
+
+    # print(trader_decision, '\n', risk_decision, '\n', manager_agent_decision, '\n')
+    decisions = finalize_decisions(trader_decision, risk_decision, manager_agent_decision, today_date)
+    return decisions, manager_fail, fail_content
+
+
+def _run_risk_stage(agents, risk_profile, pass_data_to_analyze_prompt, debate_summary, trader_decision, stages, telemetry) -> str:
     print("\n=== Step 4: Risk Management Team reviews ===")
-    risk_prompt = (
-        f"{pass_data_to_analyze_prompt}\n\n"
-        f"{debate_summary}\n"
-        f"Trader's Decision:\n{trader_decision}\n\n"
-        f"Current Risk Profile: {risk_profile}\n"
-        "Evaluate if this decision aligns with risk preferences. Approve or reject."
-    )
-    risk_prompt = re.sub(r"(?i)terminate", "", risk_prompt)
+    with telemetry.stage("risk"):
+        risk_prompt = build_risk_prompt(pass_data_to_analyze_prompt, debate_summary, trader_decision, risk_profile)
 
-    agents["trade_recommender_agent"].initiate_chat(agents["risk_manager_agent"], message=risk_prompt)
-    risk_decision = get_last_reply_from(agents["risk_manager_agent"])
+        agents["trade_recommender_agent"].initiate_chat(agents["risk_manager_agent"], message=risk_prompt)
+        risk_decision = _collect_reply(agents, "risk_manager_agent", stages, "risk")
     print("Risk Manager Decision:\n", risk_decision)
+    return risk_decision
 
+
+def _run_manager_stage(agents, trader_decision, risk_decision, stages, telemetry):
+    """
+    Returns:
+        tuple: (manager_agent_decision, manager_fail, fail_content)
+    """
     print("\n=== Step 5: Manager makes final decision ===")
-    manager_prompt = (
-        f"Trader's Decision:\n{trader_decision}\n\n"
-        f"Risk Management Team's Decision:\n{risk_decision}\n\n"
-        "Should we execute the trade?"
-    )
-    manager_prompt = re.sub(r"(?i)terminate", "", manager_prompt)
+    manager_agent_decision = None
 
+    with telemetry.stage("manager") as stage_record:
+        for attempt, current_prompt in _manager_attempts(trader_decision, risk_decision, stage_record):
+            try:
+                agents["completeness_checker"].initiate_chat(agents["manager_agent"], message=current_prompt)
+                manager_agent_decision = get_last_reply_from(agents["manager_agent"])
 
+                if manager_agent_decision:
+                    break  # 成功就退出循环
 
-    hints = [
-        "",  # 第一次不加任何提示
-        "\n[Reminder: Respond with EXECUTE_TRADE or DO_NOT_EXECUTE and provide reasons.]",
-        "\n[Your reply must begin with EXECUTE_TRADE or DO_NOT_EXECUTE.]",
-        "\n[Please clearly state EXECUTE_TRADE or DO_NOT_EXECUTE at the beginning of your response.]",
-        "\n[Format reminder: Response should contain EXECUTE_TRADE or DO_NOT_EXECUTE plus justification.]"
-    ]
+            except Exception as e:
+                print(f"[Retry {attempt + 1}/{MANAGER_MAX_RETRIES}] Manager agent failed: {e}")
 
-    max_retries = 5
-    manager_agent_decision = None
-    manager_fail = False
-    fail_content = None
+                # time.sleep(1)
+
+        log_agent_usage("manager_agent", agents["manager_agent"])
+
+    return _manager_outcome(manager_agent_decision, trader_decision, risk_decision, stages)
 
-    for attempt in range(max_retries):
+
+def _profile_run_record(run_record, stages, shared_record, profile_telemetry, usage, latency_s):
+    run_record["stages"] = stages
+    run_record["usage"] = usage
+    run_record["shared_usage"] = shared_record["usage"]
+    run_record["latency_s"] = round(latency_s, 3)
+    run_record["telemetry"] = shared_record["telemetry"] + profile_telemetry["stages"]
+
+
+def run_multi_profile_recommendation(
+    stock_name: str,
+    agents: dict,
+    user_proxy,
+    debate_manager,
+    profile_agents: dict,
+    today_date: str,
+    run_records: dict = None
+) -> dict:
+    """
+    Run the data, debate and trader stages once, then the risk and manager stages for
+    every risk profile in parallel threads.
+
+    Args:
+        stock_name (str): The target stock name.
+        agents (dict): Agents for the shared stages (see `build_pipeline`).
+        user_proxy: The UserProxyAgent that handles function execution.
+        debate_manager: GroupChatManager for bullish/bearish debate.
+        profile_agents (dict): {risk_profile: agents} from `build_profile_agents`; profiles
+            must not share agents since they run at the same time.
+        today_date (str): Trading day, 'YYYY-MM-DD'.
+        run_records (dict, optional): Filled with {risk_profile: run_record}. Each record is
+            like `run_stock_recommendation`'s, with "usage" covering only the profile's own
+            stages and "shared_usage" the stages run once for all profiles.
+
+    Returns:
+        dict: {risk_profile: (decisions, manager_fail, fail_content) or the exception it raised}
+    """
+    log_token = setup_agent_logger(stock_name)
+    logger.info(f"[{stock_name}]  Date {today_date} | profiles {list(profile_agents)}")
+    as_of_token = set_as_of_date(today_date)
+    start = time.perf_counter()
+    try:
+        shared_agents = pipeline_agents(agents, debate_manager)
+        reset_conversations([user_proxy, *shared_agents.values()], debate_manager)
+        shared_telemetry = PipelineTelemetry(stock_name, today_date, "shared", shared_agents)
+        telemetry_token = current_telemetry.set(shared_telemetry)
+        usage_before = snapshot_usage(shared_agents)
+        shared_stages = {}
         try:
-            hint = hints[attempt] if attempt < len(hints) else hints[-1]
+            shared = _run_shared_stages(stock_name, agents, user_proxy, debate_manager, today_date, shared_stages, shared_telemetry)
+        finally:
+            current_telemetry.reset(telemetry_token)
+            shared_record = {
+                "usage": diff_usage(usage_before, snapshot_usage(shared_agents)),
+                "telemetry": shared_telemetry.write()["stages"]
+            }
+        shared_latency = time.perf_counter() - start
+
+        def run_profile(risk_profile):
+            own_agents = {agent.name: agent for agent in profile_agents[risk_profile].values()}
+            reset_conversations(own_agents.values())
+            telemetry = PipelineTelemetry(stock_name, today_date, risk_profile, own_agents)
+            profile_telemetry_token = current_telemetry.set(telemetry)
+            profile_start = time.perf_counter()
+            profile_usage_before = snapshot_usage(own_agents)
+            stages = dict(shared_stages)
+            try:
+                return _run_risk_and_manager(profile_agents[risk_profile], risk_profile, today_date, *shared, stages, telemetry)
+            finally:
+                current_telemetry.reset(profile_telemetry_token)
+                telemetry_record = telemetry.write()
+                if run_records is not None:
+                    run_records[risk_profile] = {}
+                    _profile_run_record(
+                        run_records[risk_profile], stages, shared_record, telemetry_record,
+                        diff_usage(profile_usage_before, snapshot_usage(own_agents)),
+                        shared_latency + time.perf_counter() - profile_start
+                    )
+
+        with ThreadPoolExecutor(max_workers=len(profile_agents), thread_name_prefix="risk-profile") as executor:
+            # Each profile gets its own context copy so its telemetry stays separate
+            futures = {
+                risk_profile: executor.submit(contextvars.copy_context().run, run_profile, risk_profile)
+                for risk_profile in profile_agents
+            }
+        results = {}
+        for risk_profile, future in futures.items():
+            try:
+                results[risk_profile] = future.result()
+            except Exception as e:
+                results[risk_profile] = e
+        return results
+    finally:
+        reset_as_of_date(as_of_token)
+        reset_log_ticker(log_token)
+
+
+async def _arun_shared_stages(stock_name, agents, user_proxy, debate_manager, today_date, stages, telemetry):
+    with telemetry.stage("data"):
+        await user_proxy.a_initiate_chat(agents["analyst_agent"], message=build_analyst_prompt(stock_name, today_date), silent=True)
+        stock_data_response = _collect_reply(agents, "analyst_agent", stages, "analyst")
+        # The brief may fetch market data on a cache miss; keep that off the event loop
+        market_brief = await asyncio.to_thread(market_context_brief, today_date)
+        pass_data_to_analyze_prompt = build_debate_prompt(stock_data_response, market_brief)
+
+    with telemetry.stage("debate") as record:
+        reset_debate_compaction(debate_manager)
+        await user_proxy.a_initiate_chat(debate_manager, message=pass_data_to_analyze_prompt, silent=True)
+        debate_summary = _collect_debate(agents, debate_manager, stages, record)
+
+    with telemetry.stage("trader"):
+        trader_prompt = build_trader_prompt(pass_data_to_analyze_prompt, debate_summary)
+        await agents["spokesperson_agent"].a_initiate_chat(agents["trader_agent"], message=trader_prompt, silent=True)
+        trader_decision = _collect_reply(agents, "trader_agent", stages, "trader")
+
+    return pass_data_to_analyze_prompt, debate_summary, trader_decision
+
+
+async def _arun_risk_and_manager(stock_name, agents, risk_profile, today_date, pass_data_to_analyze_prompt, debate_summary, trader_decision, stages, telemetry):
+    with telemetry.stage("risk"):
+        risk_prompt = build_risk_prompt(pass_data_to_analyze_prompt, debate_summary, trader_decision, risk_profile)
+        await agents["trade_recommender_agent"].a_initiate_chat(agents["risk_manager_agent"], message=risk_prompt, silent=True)
+        risk_decision = _collect_reply(agents, "risk_manager_agent", stages, "risk")
 
-            current_prompt = (
-                f"Trader's Decision:\n{trader_decision}\n\n"
-                f"Risk Management Team's Decision:\n{risk_decision}\n\n"
-                "Should we execute the trade?" + hint
-            )
+    manager_agent_decision = None
+    with telemetry.stage("manager") as stage_record:
+        for attempt, current_prompt in _manager_attempts(trader_decision, risk_decision, stage_record):
+            try:
+                await agents["completeness_checker"].a_initiate_chat(agents["manager_agent"], message=current_prompt, silent=True)
+                manager_agent_decision = get_last_reply_from(agents["manager_agent"])
 
-            current_prompt = re.sub(r"(?i)terminate", "", current_prompt)
+                if manager_agent_decision:
+                    break
 
-            agents["completeness_checker"].initiate_chat(agents["manager_agent"], message=current_prompt)
-            manager_agent_decision = get_last_reply_from(agents["manager_agent"])
+            except Exception as e:
+                print(f"[{stock_name} {today_date}] [Retry {attempt + 1}/{MANAGER_MAX_RETRIES}] Manager agent failed: {e}")
 
-            if manager_agent_decision:
-                break  # 成功就退出循环
+        log_agent_usage("manager_agent", agents["manager_agent"])
 
-        except Exception as e:
-            print(f"[Retry {attempt + 1}/{max_retries}] Manager agent failed: {e}")
-            
-            # time.sleep(1)
+    manager_agent_decision, manager_fail, fail_content = _manager_outcome(
+        manager_agent_decision, trader_decision, risk_decision, stages, label=f"[{stock_name} {today_date}] "
+    )
+    decisions = finalize_decisions(trader_decision, risk_decision, manager_agent_decision, today_date)
+    return decisions, manager_fail, fail_content
 
-    if manager_agent_decision is None:
-        print("[Warning] Manager agent failed after retries. Using fallback.")
-        manager_agent_decision = "DO_NOT_EXECUTE\nReason: Unable to determine due to repeated failures."
-        manager_fail = True
-        fail_content = trader_decision + risk_decision
 
+async def arun_stock_recommendation(
+    stock_name: str,
+    agents: dict,
+    user_proxy,
+    debate_manager,
+    risk_profile: str,
+    today_date: str,
+    run_record: dict = None
+):
+    """
+    Async version of `run_stock_recommendation` built on `a_initiate_chat`.
 
+    The agents passed in must not be shared with another in-flight pipeline,
+    since autogen keeps conversation state on the agent objects.
 
+    Args:
+        stock_name (str): The target stock name.
+        agents (dict): Dictionary of all agents (see `build_pipeline`).
+        user_proxy: The UserProxyAgent that handles function execution.
+        debate_manager: GroupChatManager for bullish/bearish debate.
+        risk_profile (str): The user's risk preference (e.g., 'Neutral').
+        today_date (str): Trading day, 'YYYY-MM-DD'.
+        run_record (dict, optional): Filled like in `run_stock_recommendation`.
 
+    Returns:
+        tuple: (decisions, manager_fail, fail_content), same as the sync version.
+    """
+    with _pipeline_run(stock_name, agents, user_proxy, debate_manager, risk_profile, today_date, run_record) as (stages, telemetry):
+        shared = await _arun_shared_stages(stock_name, agents, user_proxy, debate_manager, today_date, stages, telemetry)
+        return await _arun_risk_and_manager(stock_name, agents, risk_profile, today_date, *shared, stages, telemetry)
 
-    # agents["completeness_checker"].initiate_chat(agents["manager_agent"], message=manager_prompt)
-    # manager_agent_decision = get_last_reply_from(agents["manager_agent"])
-    # manager_agent_decision = "EXECUTE_TRADE"
-         
-    # print(trader_decision, '\n', risk_decision, '\n', manager_agent_decision, '\n')
-    decision_text = trader_decision + risk_decision + manager_agent_decision
-    decisions = extract_trade_decisions(decision_text)
-    decisions["date"] = today_date
-    print(decisions)
-    logging.info(f"Decision {decisions}")
-    return decisions, manager_fail, fail_content
\ No newline at end of file
+
+async def arun_multi_profile_recommendation(
+    stock_name: str,
+    agents: dict,
+    user_proxy,
+    debate_manager,
+    profile_agents: dict,
+    today_date: str,
+    run_records: dict = None
+) -> dict:
+    """
+    Async version of `run_multi_profile_recommendation`; the per-profile risk and manager
+    stages run concurrently on the event loop.
+
+    Returns:
+        dict: {risk_profile: (decisions, manager_fail, fail_content) or the exception it raised}
+    """
+    log_token = setup_agent_logger(stock_name)
+    logger.info(f"[{stock_name}]  Date {today_date} | profiles {list(profile_agents)}")
+    as_of_token = set_as_of_date(today_date)
+    start = time.perf_counter()
+    try:
+        shared_agents = pipeline_agents(agents, debate_manager)
+        reset_conversations([user_proxy, *shared_agents.values()], debate_manager)
+        shared_telemetry = PipelineTelemetry(stock_name, today_date, "shared", shared_agents)
+        telemetry_token = current_telemetry.set(shared_telemetry)
+        usage_before = snapshot_usage(shared_agents)
+        shared_stages = {}
+        try:
+            shared = await _arun_shared_stages(stock_name, agents, user_proxy, debate_manager, today_date, shared_stages, shared_telemetry)
+        finally:
+            current_telemetry.reset(telemetry_token)
+            shared_record = {
+                "usage": diff_usage(usage_before, snapshot_usage(shared_agents)),
+                "telemetry": shared_telemetry.write()["stages"]
+            }
+        shared_latency = time.perf_counter() - start
+
+        async def run_profile(risk_profile):
+            own_agents = {agent.name: agent for agent in profile_agents[risk_profile].values()}
+            reset_conversations(own_agents.values())
+            telemetry = PipelineTelemetry(stock_name, today_date, risk_profile, own_agents)
+            profile_telemetry_token = current_telemetry.set(telemetry)
+            profile_start = time.perf_counter()
+            profile_usage_before = snapshot_usage(own_agents)
+            stages = dict(shared_stages)
+            try:
+                return await _arun_risk_and_manager(
+                    stock_name, profile_agents[risk_profile], risk_profile, today_date, *shared, stages, telemetry
+                )
+            finally:
+                current_telemetry.reset(profile_telemetry_token)
+                telemetry_record = telemetry.write()
+                if run_records is not None:
+                    run_records[risk_profile] = {}
+                    _profile_run_record(
+                        run_records[risk_profile], stages, shared_record, telemetry_record,
+                        diff_usage(profile_usage_before, snapshot_usage(own_agents)),
+                        shared_latency + time.perf_counter() - profile_start
+                    )
+
+        # gather runs each profile in its own task (and context copy)
+        results = await asyncio.gather(*(run_profile(p) for p in profile_agents), return_exceptions=True)
+        return dict(zip(profile_agents, results))
+    finally:
+        reset_as_of_date(as_of_token)
+        reset_log_ticker(log_token)
+
+
+async def arun_stock_recommendations(
+    jobs,
+    pipeline_factory,
+    risk_profile: str = "Neutral",
+    max_concurrency: int = 64
+) -> list:
+    """
+    Run many (ticker, date) pipelines concurrently on the current event loop.
+
+    Each in-flight pipeline gets its own agent set from `pipeline_factory`, built
+    only once the job acquires the semaphore, so at most `max_concurrency` agent
+    sets are alive at a time no matter how many jobs are queued.
+
+    Args:
+        jobs (iterable): (stock_name, today_date) pairs.
+        pipeline_factory (callable): No-arg callable returning (agents, user_proxy, debate_mgr),
+            e.g. `functools.partial(build_pipeline, llm_config, use_async_tools=True)`.
+        risk_profile (str): The user's risk preference (e.g., 'Neutral').
+        max_concurrency (int): Max number of pipelines in flight at once.
+
+    Returns:
+        list: One entry per job, in job order. Each entry is the
+            (decisions, manager_fail, fail_content) tuple, or the exception the job raised.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(stock_name, today_date):
+        async with semaphore:
+            agents, user_proxy, debate_mgr = pipeline_factory()
+            return await arun_stock_recommendation(
+                stock_name, agents, user_proxy, debate_mgr,
+                risk_profile=risk_profile, today_date=today_date
+            )
+
+    return await asyncio.gather(
+        *(run_one(stock_name, today_date) for stock_name, today_date in jobs),
+        return_exceptions=True
+    )
@@ -0,0 +1,51 @@
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.fundamentals_planner import FundamentalsRefreshPlanner
+from data_collection.ingest_manifest import OK, IngestManifest
+
+TODAY = date(2024, 8, 10)
+EARNINGS = {"quarterlyEarnings": [
+    {"fiscalDateEnding": "2024-06-30", "reportedDate": "2024-07-25", "reportedEPS": "1.1"},
+    {"fiscalDateEnding": "2024-03-31", "reportedDate": "2024-04-25", "reportedEPS": "1.0"},
+]}
+
+
+def statement(latest_quarter: str) -> dict:
+    return {"annualReports": [], "quarterlyReports": [{"fiscalDateEnding": latest_quarter}]}
+
+
+def store(tmp_path, overview_quarter: str, overview_fetched_at: str) -> FundamentalsRefreshPlanner:
+    manifest = IngestManifest(tmp_path / "manifest.sqlite")
+    output_dir = tmp_path / "fundamental_jsons"
+    payloads = {
+        "OVERVIEW": {"Symbol": "TEST", "LatestQuarter": overview_quarter},
+        "EARNINGS": EARNINGS,
+        "DIVIDENDS": {"data": [{"ex_dividend_date": "2024-05-01"}]},
+        **{dataset: statement("2024-06-30") for dataset in ("INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW")},
+    }
+    for dataset, payload in payloads.items():
+        manifest.commit("TEST", dataset, "", payload, output_dir / "TEST" / f"{dataset}.json")
+        fetched_at = overview_fetched_at if dataset == "OVERVIEW" else "2024-08-01T00:00:00"
+        manifest.record("TEST", dataset, "", OK, fetched_at=fetched_at)
+    return FundamentalsRefreshPlanner(output_dir, manifest, today=TODAY, overview_max_age_days=30)
+
+
+def test_overview_is_not_refetched_weekly(tmp_path):
+    planner = store(tmp_path, "2024-06-30", "2024-07-20T00:00:00")
+    assert planner.probes(["TEST"]) == []
+    assert planner.updates(["TEST"]) == []
+
+
+def test_overview_is_refetched_once_a_new_quarter_is_reported(tmp_path):
+    planner = store(tmp_path, "2024-03-31", "2024-07-20T00:00:00")
+    assert planner.probes(["TEST"]) == []
+    assert planner.updates(["TEST"]) == [("TEST", "OVERVIEW", "reported")]
+
+
+def test_overview_past_max_age_is_probed(tmp_path):
+    planner = store(tmp_path, "2024-06-30", "2024-07-01T00:00:00")
+    assert planner.probes(["TEST"]) == [("TEST", "OVERVIEW", "max_age")]
@@ -0,0 +1,57 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.fundemental import NOT_AVAILABLE, LocalFilingSource, FilingCache, get_company_filings, sections_from_document
+
+FILINGS_DIR = Path(__file__).resolve().parent / "fixtures" / "sec_filings"
+CIK = "0000000001"
+
+
+def fetch(form: str) -> dict:
+    source = LocalFilingSource(FILINGS_DIR)
+    meta = next(m for m in source.list_filings(CIK, 4) if m["form"] == form)
+    return source.fetch(meta, cache=None)
+
+
+def test_10q_sections_come_from_the_right_part():
+    sections = fetch("10-Q")
+    # Part I Item 2 is MD&A; Part II Item 2 (longer) is unregistered equity sales
+    assert sections["mdna"].startswith("Item 2. Management")
+    assert "Revenue grew 8%" in sections["mdna"]
+    assert "repurchased" not in sections["mdna"]
+    # Part I Item 1 is the financials; Part II Item 1 (longer) is legal proceedings
+    assert "total assets 1,200" in sections["financials"]
+    assert "litigation" not in sections["financials"]
+    assert sections["risk_factors"].startswith("Item 1A. Risk Factors")
+    assert "Unregistered" not in sections["risk_factors"]
+
+
+def test_10k_sections_skip_toc_and_cross_references():
+    sections = fetch("10-K")
+    assert "Competition could reduce our margins." in sections["risk_factors"]
+    assert sections["mdna"].startswith("Item 7. Management")
+    assert "Operating income rose" in sections["mdna"]
+    # The cross-reference paragraph starting with "Item 7." stays inside Item 8
+    assert "Consolidated statements of operations" in sections["financials"]
+    assert "refer to that discussion" in sections["financials"]
+    assert "Notes to consolidated financial statements." in sections["financials"]
+    assert "Changes in and Disagreements" not in sections["financials"]
+
+
+def test_document_without_part_headings_matches_items_alone():
+    document = "Item 1A. Risk Factors\nrisky\nItem 7. MD&A\ndiscussion\nItem 8. Financial Statements\nnumbers"
+    sections = sections_from_document("10-K", document, is_html=False)
+    assert sections["risk_factors"] == "Item 1A. Risk Factors\nrisky"
+    assert sections["mdna"] == "Item 7. MD&A\ndiscussion"
+    assert sections["financials"] == "Item 8. Financial Statements\nnumbers"
+    assert sections_from_document("10-K", "no items here", is_html=False)["mdna"] == NOT_AVAILABLE
+
+
+def test_extracted_sections_are_cached_by_accession(tmp_path):
+    cache = FilingCache(tmp_path / "cache", compression="gzip")
+    first = get_company_filings(CIK, 4, LocalFilingSource(FILINGS_DIR), cache)
+    assert [f["form"] for f in first] == ["10-Q", "10-K"]
+    assert cache.get_sections(first[0]["accession_no"]) == first[0]
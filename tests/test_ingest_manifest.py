@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.ingest_manifest import EMPTY, FAILED, OK, IngestManifest, validate_payload
+from data_collection.storage import find_variant, write_logical_json
+
+
+def test_validate_payload_classifies_api_responses():
+    assert validate_payload("OVERVIEW", {"Symbol": "TEST"}) == (OK, None)
+    assert validate_payload("OVERVIEW", None) == (FAILED, "fetch_failed")
+    assert validate_payload("OVERVIEW", {"TEST": None}) == (FAILED, "fetch_failed")
+    assert validate_payload("OVERVIEW", {"Note": "Our standard API call frequency is 5 calls per minute"}) == (FAILED, "rate_limited")
+    assert validate_payload("OVERVIEW", {"Error Message": "Invalid API call."}) == (FAILED, "api_error")
+    assert validate_payload("OVERVIEW", {"foo": "bar"}) == (FAILED, "unexpected_schema")
+    assert validate_payload("EARNINGS_CALL_TRANSCRIPT", {"symbol": "TEST", "transcript": []}) == (EMPTY, "empty")
+    assert validate_payload("EARNINGS_CALL_TRANSCRIPT", {}) == (EMPTY, "empty")
+
+
+def test_rate_limit_payload_is_recorded_but_never_written(tmp_path):
+    manifest = IngestManifest(tmp_path / "manifest.sqlite")
+    path = tmp_path / "TEST" / "OVERVIEW.json"
+    status = manifest.commit("TEST", "OVERVIEW", "", {"Information": "Thank you for using Alpha Vantage! rate limit"}, path)
+    assert status == FAILED
+    assert find_variant(path) is None
+    entry = manifest.get("TEST", "OVERVIEW")
+    assert entry["error_class"] == "rate_limited" and entry["attempts"] == 1
+    assert manifest.needs_fetch("TEST", "OVERVIEW", "", path)
+
+    assert manifest.commit("TEST", "OVERVIEW", "", {"Symbol": "TEST"}, path) == OK
+    assert manifest.get("TEST", "OVERVIEW")["attempts"] == 2
+    assert not manifest.needs_fetch("TEST", "OVERVIEW", "", path)
+
+
+def test_reconcile_finds_rate_limit_notes_saved_as_data(tmp_path):
+    manifest = IngestManifest(tmp_path / "manifest.sqlite")
+    good, bad = tmp_path / "A" / "OVERVIEW.json", tmp_path / "B" / "OVERVIEW.json"
+    write_logical_json(good, {"Symbol": "A"})
+    write_logical_json(bad, {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute"})
+
+    assert not manifest.needs_fetch("A", "OVERVIEW", "", good)
+    assert manifest.get("A", "OVERVIEW")["status"] == OK
+    assert manifest.needs_fetch("B", "OVERVIEW", "", bad)
+    assert manifest.get("B", "OVERVIEW")["error_class"] == "rate_limited"
+
+
+def test_missing_file_or_stale_entry_needs_fetch(tmp_path):
+    manifest = IngestManifest(tmp_path / "manifest.sqlite")
+    path = tmp_path / "TEST" / "EARNINGS.json"
+    manifest.commit("TEST", "EARNINGS", "", {"quarterlyEarnings": [{"fiscalDateEnding": "2024-06-30"}]}, path)
+    assert not manifest.needs_fetch("TEST", "EARNINGS", "", path, max_age_days=1)
+
+    manifest.record("TEST", "EARNINGS", "", OK, fetched_at="2000-01-01T00:00:00")
+    assert manifest.needs_fetch("TEST", "EARNINGS", "", path, max_age_days=1)
+
+    os.remove(find_variant(path))
+    assert manifest.needs_fetch("TEST", "EARNINGS", "", path)
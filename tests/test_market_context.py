@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from functions.market_context import get_market_context
+from functions.stock_data import tool_cache
+from utils.telemetry import PipelineTelemetry, current_telemetry
+
+
+def test_market_context_is_cached_per_date_without_tool_telemetry():
+    telemetry = PipelineTelemetry("TEST", "2025-01-02", "risk_profile", {})
+    token = current_telemetry.set(telemetry)
+    try:
+        with telemetry.stage("market"):
+            first = get_market_context("2025-01-02")
+            hits = tool_cache.hits
+            assert get_market_context("20250102") == first
+            assert tool_cache.hits == hits + 1
+    finally:
+        current_telemetry.reset(token)
+
+    assert [(r["stage"], r["tool_calls"], r["tool_cache_hits"]) for r in telemetry.stages] == [("market", 0, 0)]
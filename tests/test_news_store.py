@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.news_store import NewsStore, fetch_feed_since
+
+
+def article(n: int, time_published: str) -> dict:
+    return {"url": f"https://example.com/{n}", "title": f"Article {n}", "time_published": time_published}
+
+
+class PagedFeed:
+    """
+    Stand-in for AlphaVantageNewsFetcher: serves `articles` newest first, `limit` per page,
+    up to and including the minute of `time_to`.
+    """
+    def __init__(self, articles: list, limit: int, time_from: str = "20240101T0000"):
+        self.articles = sorted(articles, key=lambda a: a["time_published"], reverse=True)
+        self.limit = limit
+        self.time_from = time_from
+        self.requests = []
+
+    async def fetch_feed(self, time_to: str = None, **filters) -> list:
+        self.requests.append(time_to)
+        page = [a for a in self.articles if time_to is None or a["time_published"][:13] <= time_to]
+        return page[:self.limit]
+
+
+def test_pages_back_and_dedupes_the_boundary_minute():
+    feed = PagedFeed([article(n, f"20240102T{10 + n:02d}0000") for n in range(5)], limit=2)
+    articles, pages, covered_from = asyncio.run(fetch_feed_since(feed))
+    assert sorted(a["url"] for a in articles) == [f"https://example.com/{n}" for n in range(5)]
+    assert len(articles) == 5
+    assert covered_from == feed.time_from
+    assert feed.requests == [None, "20240102T1300", "20240102T1200", "20240102T1100", "20240102T1000"]
+
+
+def test_full_page_within_one_minute_steps_back_instead_of_repeating():
+    same_minute = [article(n, f"20240102T1200{n:02d}") for n in range(3)]
+    feed = PagedFeed(same_minute + [article(9, "20240102T110000")], limit=2)
+    articles, pages, _ = asyncio.run(fetch_feed_since(feed, max_pages=10))
+    assert feed.requests == [None, "20240102T1200", "20240102T1159"]
+    assert pages == 3
+    assert len({a["url"] for a in articles}) == len(articles)
+    assert "https://example.com/9" in {a["url"] for a in articles}
+
+
+def test_append_dedupes_redelivered_articles_by_url(tmp_path):
+    store = NewsStore(tmp_path, overlap_minutes=60, compression=None)
+    assert store.next_time_from("TEST", "20240101T0000") == "20240101T0000"
+    assert store.append("TEST", [article(1, "20240102T100000"), article(2, "20240102T110000")]) == 2
+    assert store.watermark("TEST") == "20240102T110000"
+    assert store.next_time_from("TEST", "20240101T0000") == "20240102T1000"
+
+    # The next fetch overlaps the last hour: article 2 comes back, article 3 is new
+    assert store.append("TEST", [article(2, "20240102T110000"), article(3, "20240102T120000"), article(3, "20240102T120000")]) == 1
+    assert [a["url"] for a in store.load("TEST")] == [f"https://example.com/{n}" for n in (1, 2, 3)]
+
+
+def test_late_indexed_article_inside_overlap_is_sorted_in(tmp_path):
+    store = NewsStore(tmp_path, overlap_minutes=120, compression=None)
+    store.append("TEST", [article(1, "20240102T100000"), article(3, "20240102T120000")])
+    assert store.append("TEST", [article(2, "20240102T110000")]) == 1
+    assert [a["time_published"] for a in store.load("TEST")] == ["20240102T100000", "20240102T110000", "20240102T120000"]
+    # Older than the overlap window: covered by an earlier fetch, ignored
+    assert store.append("TEST", [article(0, "20240102T090000")]) == 0
+    assert store.watermark("TEST") == "20240102T120000"
+
+
+def test_state_is_rebuilt_from_the_data_file(tmp_path):
+    store = NewsStore(tmp_path, overlap_minutes=60, compression=None)
+    store.append("TEST", [article(1, "20240102T100000"), article(2, "20240102T110000")])
+    (tmp_path / "_state" / "TEST.json").unlink()
+
+    reopened = NewsStore(tmp_path, overlap_minutes=60, compression=None)
+    assert reopened.watermark("TEST") == "20240102T110000"
+    assert reopened.append("TEST", [article(2, "20240102T110000")]) == 0
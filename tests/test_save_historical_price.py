@@ -0,0 +1,44 @@
+import os
+import sys
+from datetime import date
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.alvan_localsave.save_historical_price import COMPACT_MAX_GAP_DAYS, merge_compact, plan_refresh
+
+
+def bar(adjusted_close: float, dividend: float = 0.0, split: float = 1.0) -> dict:
+    return {
+        "4. close": str(adjusted_close),
+        "5. adjusted close": str(adjusted_close),
+        "7. dividend amount": str(dividend),
+        "8. split coefficient": str(split),
+    }
+
+
+STORED = {"2024-06-03": bar(100.0), "2024-06-04": bar(101.0), "2024-06-05": bar(102.0)}
+
+
+def test_plan_refresh():
+    assert plan_refresh(None, date(2024, 6, 6)) == "full"
+    assert plan_refresh(STORED, date(2024, 6, 5)) == "skip"
+    assert plan_refresh(STORED, date(2024, 6, 6)) == "compact"
+    assert plan_refresh(STORED, date(2024, 6, 6), force_full=True) == "full"
+    assert plan_refresh(STORED, date.fromordinal(date(2024, 6, 5).toordinal() + COMPACT_MAX_GAP_DAYS)) == "full"
+
+
+def test_merge_compact_appends_new_rows():
+    compact = {"2024-06-05": bar(102.0), "2024-06-06": bar(103.0), "2024-06-07": bar(104.0)}
+    merged, new_rows = merge_compact(STORED, compact)
+    assert new_rows == 2
+    assert sorted(merged) == ["2024-06-03", "2024-06-04", "2024-06-05", "2024-06-06", "2024-06-07"]
+
+
+def test_merge_compact_falls_back_to_full_on_corporate_actions():
+    # Dividend or split in the new rows: every earlier adjusted close changes
+    assert merge_compact(STORED, {"2024-06-05": bar(102.0), "2024-06-06": bar(103.0, dividend=0.5)}) == (None, 0)
+    assert merge_compact(STORED, {"2024-06-05": bar(102.0), "2024-06-06": bar(51.5, split=2.0)}) == (None, 0)
+    # Adjusted close on the overlap no longer matches the stored one
+    assert merge_compact(STORED, {"2024-06-05": bar(101.5), "2024-06-06": bar(103.0)}) == (None, 0)
+    # No overlap with the stored history
+    assert merge_compact(STORED, {"2024-06-07": bar(104.0)}) == (None, 0)
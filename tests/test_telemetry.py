@@ -0,0 +1,57 @@
+import contextvars
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.telemetry import PipelineTelemetry, current_telemetry, record_tool_call
+
+
+def test_parallel_stages_record_their_own_tool_calls():
+    """
+    Two stages open at the same time in different threads (as StageDAG runs "data" and
+    "market") each get exactly their own tool calls.
+    """
+    telemetry = PipelineTelemetry("TEST", "2025-01-02", "risk_profile", {})
+    token = current_telemetry.set(telemetry)
+    both_open = threading.Barrier(2)
+
+    def run_stage(name, tool_name, n_calls):
+        with telemetry.stage(name):
+            both_open.wait(timeout=5)
+            for _ in range(n_calls):
+                record_tool_call(tool_name, 0.01, cache_hit=False)
+            both_open.wait(timeout=5)
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, run_stage, "data", "get_price", 3),
+                executor.submit(contextvars.copy_context().run, run_stage, "market", "get_news", 2),
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        current_telemetry.reset(token)
+
+    stages = {record["stage"]: record for record in telemetry.stages}
+    assert stages["data"]["tool_calls"] == 3
+    assert stages["data"]["tools"] == {"get_price": 3}
+    assert stages["market"]["tool_calls"] == 2
+    assert stages["market"]["tools"] == {"get_news": 2}
+
+
+def test_tool_calls_outside_a_stage_are_ignored():
+    telemetry = PipelineTelemetry("TEST", "2025-01-02", "risk_profile", {})
+    token = current_telemetry.set(telemetry)
+    try:
+        record_tool_call("get_price", 0.01, cache_hit=True)
+        with telemetry.stage("data"):
+            record_tool_call("get_price", 0.01, cache_hit=True)
+        record_tool_call("get_price", 0.01, cache_hit=True)
+    finally:
+        current_telemetry.reset(token)
+
+    assert [(r["stage"], r["tool_calls"], r["tool_cache_hits"]) for r in telemetry.stages] == [("data", 1, 1)]
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data_collection.alvan_dc.client import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("data_collection.alvan_dc.client.time.monotonic", clock)
+    return clock
+
+
+def test_burst_then_paced_at_the_minute_rate(clock):
+    bucket = TokenBucket(requests_per_minute=60, burst=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0.0
+    # Idle time refills up to the burst, not beyond
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)][-1] == pytest.approx(1.0)
+
+
+def test_daily_quota_limits_even_with_minute_tokens_left(clock):
+    bucket = TokenBucket(requests_per_minute=600, requests_per_day=2, burst=10)
+    assert [bucket.try_acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(86400 / 2)
+
+
+def test_drain_empties_the_minute_bucket(clock):
+    bucket = TokenBucket(requests_per_minute=120, burst=10)
+    bucket.drain()
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_acquire_paces_concurrent_callers():
+    bucket = TokenBucket(requests_per_minute=1200, burst=1)
+
+    async def acquire_all():
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+        return time.monotonic() - start
+
+    # 1 from the burst, then one every 50 ms
+    assert 0.18 <= asyncio.run(acquire_all()) < 1.0
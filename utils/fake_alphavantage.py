@@ -0,0 +1,510 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from aiohttp import web
+
+from config.api_config import fake_alphavantage_config
+from data_collection.storage import find_variant, iter_jsonl, load_json
+
+FUNDAMENTAL_FUNCTIONS = ("OVERVIEW", "INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW", "EARNINGS", "DIVIDENDS")
+SUPPORTED_FUNCTIONS = FUNDAMENTAL_FUNCTIONS + ("NEWS_SENTIMENT", "TIME_SERIES_DAILY_ADJUSTED", "EARNINGS_CALL_TRANSCRIPT")
+
+NOTE_TEXT = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is 75 requests per minute. "
+    "Please subscribe to any of the premium plans to instantly remove all daily rate limits."
+)
+INFORMATION_TEXT = (
+    "We have detected your API key and our standard API rate limit is 75 requests per minute. "
+    "Please subscribe to any of the premium plans to instantly remove all daily rate limits."
+)
+PRICE_ANCHOR = date(2015, 1, 2)
+NEWS_TOPICS = ("Earnings", "Technology", "Financial Markets", "Economy - Macro", "Mergers & Acquisitions")
+
+
+def _quarter_end(year: int, quarter: int) -> date:
+    return date(year, 3 * quarter, 31 if quarter in (1, 4) else 30)
+
+
+class SyntheticData:
+    def __init__(self, as_of: date = None, seed: int = 0, news_days: int = 30, articles_per_day: int = 3):
+        """
+        Deterministic Alpha Vantage-shaped payloads: the same (seed, function, parameters,
+        as_of) always gives the same response, so ingest results can be checked exactly.
+        Quarters are "reported" 25-45 days after they end, relative to `as_of`, so moving
+        `as_of` forward makes new earnings appear.
+
+        Args:
+            as_of (date, optional): The stand-in's "today"; defaults to the real date.
+            seed (int): Varies every generated value.
+            news_days (int): Synthetic news exists for this many days before `as_of`.
+            articles_per_day (int): Articles per ticker per day.
+        """
+        self.as_of = as_of or date.today()
+        self.seed = seed
+        self.news_days = news_days
+        self.articles_per_day = articles_per_day
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random("|".join(str(k) for k in (self.seed,) + key))
+
+    # Earnings calendar
+    def reported_date(self, symbol: str, fiscal_end: date) -> date:
+        return fiscal_end + timedelta(days=self._rng("reported", symbol, fiscal_end).randint(25, 45))
+
+    def reported_quarters(self, symbol: str, n: int = 8) -> list:
+        """
+        Returns:
+            list: (fiscal_date_ending, reported_date) of the last `n` quarters reported by as_of, newest first.
+        """
+        quarters = []
+        year, quarter = self.as_of.year, (self.as_of.month - 1) // 3 + 1
+        while len(quarters) < n:
+            fiscal_end = _quarter_end(year, quarter)
+            reported = self.reported_date(symbol, fiscal_end)
+            if reported <= self.as_of:
+                quarters.append((fiscal_end, reported))
+            year, quarter = (year, quarter - 1) if quarter > 1 else (year - 1, 4)
+        return quarters
+
+    # Fundamentals
+    def overview(self, symbol: str) -> dict:
+        rng = self._rng("overview", symbol)
+        latest = self.reported_quarters(symbol, 1)[0][0]
+        return {
+            "Symbol": symbol,
+            "AssetType": "Common Stock",
+            "Name": f"{symbol} Holdings Inc",
+            "Exchange": rng.choice(["NYSE", "NASDAQ"]),
+            "Currency": "USD",
+            "Sector": rng.choice(["TECHNOLOGY", "HEALTHCARE", "FINANCIAL SERVICES", "ENERGY", "INDUSTRIALS"]),
+            "FiscalYearEnd": "December",
+            "LatestQuarter": latest.isoformat(),
+            "MarketCapitalization": str(rng.randint(10, 3000) * 10 ** 9),
+            "PERatio": f"{rng.uniform(8, 60):.2f}",
+            "EPS": f"{rng.uniform(0.5, 12):.2f}",
+            "DividendYield": f"{rng.uniform(0, 0.04):.4f}",
+            "Beta": f"{rng.uniform(0.5, 2):.3f}",
+        }
+
+    def earnings(self, symbol: str) -> dict:
+        quarterly = []
+        for fiscal_end, reported in self.reported_quarters(symbol):
+            rng = self._rng("eps", symbol, fiscal_end)
+            estimated = rng.uniform(0.5, 3)
+            actual = estimated * rng.uniform(0.85, 1.15)
+            quarterly.append({
+                "fiscalDateEnding": fiscal_end.isoformat(),
+                "reportedDate": reported.isoformat(),
+                "reportedEPS": f"{actual:.2f}",
+                "estimatedEPS": f"{estimated:.2f}",
+                "surprise": f"{actual - estimated:.2f}",
+                "surprisePercentage": f"{(actual / estimated - 1) * 100:.4f}",
+                "reportTime": rng.choice(["pre-market", "post-market"]),
+            })
+        annual = [
+            {"fiscalDateEnding": q["fiscalDateEnding"], "reportedEPS": q["reportedEPS"]}
+            for q in quarterly if q["fiscalDateEnding"].endswith("-12-31")
+        ]
+        return {"symbol": symbol, "annualEarnings": annual, "quarterlyEarnings": quarterly}
+
+    def statement(self, symbol: str, function: str) -> dict:
+        fields = {
+            "INCOME_STATEMENT": ("totalRevenue", "grossProfit", "operatingIncome", "netIncome"),
+            "BALANCE_SHEET": ("totalAssets", "totalLiabilities", "totalShareholderEquity", "cashAndCashEquivalentsAtCarryingValue"),
+            "CASH_FLOW": ("operatingCashflow", "capitalExpenditures", "dividendPayout", "netIncome"),
+        }[function]
+
+        def report(fiscal_end: date, scale: int) -> dict:
+            rng = self._rng(function, symbol, fiscal_end)
+            return {
+                "fiscalDateEnding": fiscal_end.isoformat(),
+                "reportedCurrency": "USD",
+                **{field: str(rng.randint(1, 500) * scale * 10 ** 6) for field in fields},
+            }
+
+        quarters = [fiscal_end for fiscal_end, _ in self.reported_quarters(symbol)]
+        return {
+            "symbol": symbol,
+            "annualReports": [report(q, 4) for q in quarters if q.month == 12],
+            "quarterlyReports": [report(q, 1) for q in quarters],
+        }
+
+    def dividends(self, symbol: str) -> dict:
+        data = []
+        for fiscal_end, reported in self.reported_quarters(symbol):
+            rng = self._rng("dividend", symbol, fiscal_end)
+            data.append({
+                "ex_dividend_date": (reported + timedelta(days=14)).isoformat(),
+                "declaration_date": reported.isoformat(),
+                "record_date": (reported + timedelta(days=15)).isoformat(),
+                "payment_date": (reported + timedelta(days=30)).isoformat(),
+                "amount": f"{rng.uniform(0.1, 1.5):.2f}",
+            })
+        return {"symbol": symbol, "data": data}
+
+    def transcript(self, symbol: str, quarter: str) -> dict:
+        try:
+            year, q = int(quarter[:4]), int(quarter[-1])
+            fiscal_end = _quarter_end(year, q)
+        except (ValueError, IndexError):
+            return {"Error Message": f"Invalid API call. Invalid quarter: {quarter}"}
+        if self.reported_date(symbol, fiscal_end) > self.as_of:
+            # The call hasn't happened yet: Alpha Vantage answers with an empty transcript
+            return {"symbol": symbol, "quarter": quarter, "transcript": []}
+        rng = self._rng("transcript", symbol, quarter)
+        words = "we delivered strong results this quarter and expect continued momentum in demand and margins".split()
+        speakers = [("Operator", "Operator"), ("Jane Doe", "CEO"), ("John Roe", "CFO"), ("Analyst", "Analyst")]
+        turns = []
+        for i in range(rng.randint(20, 40)):
+            speaker, title = speakers[i % len(speakers)] if i else speakers[0]
+            turns.append({
+                "speaker": speaker,
+                "title": title,
+                "content": " ".join(rng.choices(words, k=rng.randint(30, 120))),
+                "sentiment": f"{rng.uniform(-0.2, 0.8):.1f}",
+            })
+        return {"symbol": symbol, "quarter": quarter, "transcript": turns}
+
+    # Prices
+    def daily_adjusted(self, symbol: str, outputsize: str = "compact") -> dict:
+        rng = self._rng("prices", symbol)
+        close = rng.uniform(20, 500)
+        series = {}
+        day = PRICE_ANCHOR
+        while day <= self.as_of:
+            if day.weekday() < 5:
+                prev, close = close, max(1.0, close * (1 + rng.gauss(0.0003, 0.018)))
+                high, low = max(prev, close) * (1 + rng.uniform(0, 0.01)), min(prev, close) * (1 - rng.uniform(0, 0.01))
+                series[day.isoformat()] = {
+                    "1. open": f"{prev:.4f}",
+                    "2. high": f"{high:.4f}",
+                    "3. low": f"{low:.4f}",
+                    "4. close": f"{close:.4f}",
+                    "5. adjusted close": f"{close:.4f}",
+                    "6. volume": str(rng.randint(10 ** 5, 10 ** 8)),
+                    "7. dividend amount": "0.0000",
+                    "8. split coefficient": "1.0",
+                }
+            day += timedelta(days=1)
+        dates = sorted(series, reverse=True)
+        if outputsize != "full":
+            dates = dates[:100]
+        return {
+            "Meta Data": {
+                "1. Information": "Daily Time Series with Splits and Dividend Events",
+                "2. Symbol": symbol,
+                "3. Last Refreshed": dates[0] if dates else None,
+                "4. Output Size": "Full size" if outputsize == "full" else "Compact",
+                "5. Time Zone": "US/Eastern",
+            },
+            "Time Series (Daily)": {d: series[d] for d in dates},
+        }
+
+    # News
+    def _ticker_articles(self, ticker: str, universe: list, day: date) -> list:
+        """
+        The day's articles about `ticker`; some also mention the next ticker of `universe`.
+        """
+        articles = []
+        for j in range(self.articles_per_day):
+            rng = self._rng("news", ticker, day, j)
+            published = datetime.combine(day, datetime.min.time()) + timedelta(seconds=rng.randint(0, 86399))
+            mentions = [ticker]
+            if ticker in universe and len(universe) > 1 and rng.random() < 0.3:
+                mentions.append(universe[(universe.index(ticker) + 1) % len(universe)])
+            score = rng.uniform(-0.6, 0.6)
+            label = "Bullish" if score > 0.35 else "Somewhat-Bullish" if score > 0.15 else "Bearish" if score < -0.35 else "Somewhat-Bearish" if score < -0.15 else "Neutral"
+            articles.append({
+                "title": f"{ticker} {rng.choice(['beats', 'misses', 'guides', 'expands', 'cuts'])} {rng.choice(['estimates', 'outlook', 'margins', 'capex'])}",
+                "url": f"https://news.example.com/{ticker}/{day:%Y%m%d}/{j}",
+                "time_published": published.strftime("%Y%m%dT%H%M%S"),
+                "authors": [],
+                "summary": f"Synthetic article {j} about {', '.join(mentions)}.",
+                "source": rng.choice(["Reuters", "Benzinga", "Motley Fool", "Zacks"]),
+                "topics": [{"topic": rng.choice(NEWS_TOPICS), "relevance_score": f"{rng.uniform(0.3, 1):.6f}"}],
+                "overall_sentiment_score": round(score, 6),
+                "overall_sentiment_label": label,
+                "ticker_sentiment": [
+                    {"ticker": t, "relevance_score": f"{rng.uniform(0.2, 1):.6f}", "ticker_sentiment_score": f"{score:.6f}", "ticker_sentiment_label": label}
+                    for t in mentions
+                ],
+            })
+        return articles
+
+    def news(self, universe: list, tickers: str = None, topics: str = None, time_from: str = None, time_to: str = None, sort: str = "LATEST", limit: int = 50) -> dict:
+        """
+        NEWS_SENTIMENT: `tickers` (comma-separated) matches articles mentioning all of them;
+        no `tickers` returns the whole `universe`'s feed. Times are YYYYMMDDTHHMM, inclusive.
+        """
+        wanted = [t for t in (tickers or "").split(",") if t]
+        universe = sorted(set(universe) | set(wanted))
+        if wanted:
+            # Articles of a ticker or of its universe predecessor (the only possible co-mention)
+            sources = {t for w in wanted for t in (w, universe[universe.index(w) - 1])}
+        else:
+            sources = set(universe)
+        first = self.as_of - timedelta(days=self.news_days)
+        if time_from:
+            first = max(first, datetime.strptime(time_from[:8], "%Y%m%d").date())
+        last = min(self.as_of, datetime.strptime(time_to[:8], "%Y%m%d").date()) if time_to else self.as_of
+
+        feed = []
+        day = first
+        while day <= last:
+            for ticker in sorted(sources):
+                feed.extend(self._ticker_articles(ticker, universe, day))
+            day += timedelta(days=1)
+        topic_filter = {t.strip().lower() for t in (topics or "").split(",") if t.strip()}
+        feed = [
+            a for a in feed
+            if (not time_from or a["time_published"][:13] >= time_from[:13])
+            and (not time_to or a["time_published"][:13] <= time_to[:13])
+            and all(w in {s["ticker"] for s in a["ticker_sentiment"]} for w in wanted)
+            and (not topic_filter or any(t["topic"].lower() in topic_filter for t in a["topics"]))
+        ]
+        feed.sort(key=lambda a: a["time_published"], reverse=sort != "EARLIEST")
+        feed = feed[:int(limit or 50)]
+        return {"items": str(len(feed)), "sentiment_score_definition": "x <= -0.35: Bearish; ...", "feed": feed}
+
+    def payload(self, function: str, params: dict, universe: list = ()) -> dict:
+        """
+        The synthetic response of one query (what an ingest run should have stored).
+        """
+        symbol = params.get("symbol")
+        if function == "NEWS_SENTIMENT":
+            return self.news(list(universe), params.get("tickers"), params.get("topics"), params.get("time_from"),
+                             params.get("time_to"), params.get("sort", "LATEST"), min(int(params.get("limit") or 50), 1000))
+        if not symbol:
+            return {"Error Message": f"Invalid API call. Please retry or visit the documentation for {function}."}
+        if function == "OVERVIEW":
+            return self.overview(symbol)
+        if function == "EARNINGS":
+            return self.earnings(symbol)
+        if function == "DIVIDENDS":
+            return self.dividends(symbol)
+        if function in ("INCOME_STATEMENT", "BALANCE_SHEET", "CASH_FLOW"):
+            return self.statement(symbol, function)
+        if function == "EARNINGS_CALL_TRANSCRIPT":
+            return self.transcript(symbol, params.get("quarter", ""))
+        if function == "TIME_SERIES_DAILY_ADJUSTED":
+            return self.daily_adjusted(symbol, params.get("outputsize", "compact"))
+        return {"Error Message": f"Invalid API call. Unsupported function {function}."}
+
+
+class RecordedData:
+    def __init__(self, data_dir):
+        """
+        Responses recorded by the save_* scripts under `data_dir` (the repo's Data layout).
+        """
+        self.data_dir = Path(data_dir)
+
+    def payload(self, function: str, params: dict):
+        """
+        Returns:
+            dict: The recorded response, or None if nothing was recorded for the query.
+        """
+        symbol = params.get("symbol")
+        if function in FUNDAMENTAL_FUNCTIONS and symbol:
+            path = find_variant(self.data_dir / "fundamental_jsons" / symbol / f"{function}.json")
+        elif function == "EARNINGS_CALL_TRANSCRIPT" and symbol:
+            path = find_variant(self.data_dir / "ec_transcripts_jsons" / symbol / f"{params.get('quarter')}.json")
+        elif function == "TIME_SERIES_DAILY_ADJUSTED" and symbol:
+            path = find_variant(self.data_dir / "hist_price_jsons" / f"{symbol}_hp.json")
+            if path is None:
+                return None
+            series = next(iter(load_json(path).values()), None) or {}
+            dates = sorted(series, reverse=True)[:None if params.get("outputsize") == "full" else 100]
+            return {"Meta Data": {"2. Symbol": symbol}, "Time Series (Daily)": {d: series[d] for d in dates}}
+        elif function == "NEWS_SENTIMENT" and params.get("tickers") and "," not in params["tickers"]:
+            path = find_variant(self.data_dir / "news_jsons" / "news_store" / f"{params['tickers']}.jsonl")
+            if path is None:
+                return None
+            feed = [
+                a for a in iter_jsonl(path)
+                if (not params.get("time_from") or a["time_published"][:13] >= params["time_from"][:13])
+                and (not params.get("time_to") or a["time_published"][:13] <= params["time_to"][:13])
+            ]
+            feed.sort(key=lambda a: a["time_published"], reverse=params.get("sort") != "EARLIEST")
+            feed = feed[:min(int(params.get("limit") or 50), 1000)]
+            return {"items": str(len(feed)), "feed": feed}
+        else:
+            return None
+        return load_json(path) if path is not None else None
+
+
+class FakeAlphaVantageServer:
+    def __init__(
+        self,
+        host: str = fake_alphavantage_config["host"],
+        port: int = fake_alphavantage_config["port"],
+        latency_s: float = fake_alphavantage_config["latency_s"],
+        latency_jitter_s: float = fake_alphavantage_config["latency_jitter_s"],
+        tail_rate: float = fake_alphavantage_config["tail_rate"],
+        tail_latency_s: float = fake_alphavantage_config["tail_latency_s"],
+        error_rate: float = fake_alphavantage_config["error_rate"],
+        note_rate: float = fake_alphavantage_config["note_rate"],
+        requests_per_minute: float = fake_alphavantage_config["requests_per_minute"],
+        note_style: str = fake_alphavantage_config["note_style"],
+        news_universe: list = (),
+        recordings_dir=None,
+        as_of: date = None,
+        seed: int = fake_alphavantage_config["seed"],
+        news_days: int = fake_alphavantage_config["news_days"],
+        articles_per_day: int = fake_alphavantage_config["articles_per_day"]
+    ):
+        """
+        Local HTTP stand-in for https://www.alphavantage.co/query, so ingest code can be run
+        and tuned without spending API quota. Serves NEWS_SENTIMENT,
+        TIME_SERIES_DAILY_ADJUSTED, the fundamentals functions and EARNINGS_CALL_TRANSCRIPT,
+        from `recordings_dir` when a recorded response exists, else synthetic (SyntheticData).
+
+        Faults are injected per request in this order: latency (plus a slow tail), HTTP 503
+        with `error_rate`, the quota check (a "Note"/"Information" body once an API key has
+        made `requests_per_minute` calls in the last 60 s, like the real service), then a
+        random "Note" with `note_rate`.
+
+        Args:
+            port (int): 0 picks a free port (see `base_url` after `start`).
+            news_universe (list): Tickers in the market-wide NEWS_SENTIMENT feed.
+            recordings_dir (optional): Data directory with recorded responses.
+            as_of (date, optional): "Today" of the synthetic data.
+        """
+        self.host = host
+        self.port = port
+        self.latency_s = latency_s
+        self.latency_jitter_s = latency_jitter_s
+        self.tail_rate = tail_rate
+        self.tail_latency_s = tail_latency_s
+        self.error_rate = error_rate
+        self.note_rate = note_rate
+        self.requests_per_minute = requests_per_minute
+        self.note_style = note_style
+        self.news_universe = list(news_universe)
+        self.synthetic = SyntheticData(as_of, seed, news_days, articles_per_day)
+        self.recorded = RecordedData(recordings_dir) if recordings_dir else None
+        self.stats = Counter()
+        self._rng = random.Random(seed)
+        self._calls = {}
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/query"
+
+    def payload(self, function: str, params: dict) -> dict:
+        """
+        The fault-free response of a query: recorded if available, else synthetic.
+        """
+        if self.recorded is not None:
+            recorded = self.recorded.payload(function, params)
+            if recorded is not None:
+                return recorded
+        return self.synthetic.payload(function, params, self.news_universe)
+
+    def _over_quota(self, api_key: str) -> bool:
+        if not self.requests_per_minute:
+            return False
+        now = time.monotonic()
+        calls = self._calls.setdefault(api_key, deque())
+        while calls and now - calls[0] >= 60:
+            calls.popleft()
+        if len(calls) >= self.requests_per_minute:
+            return True
+        calls.append(now)
+        return False
+
+    def _note(self) -> dict:
+        return {"Information": INFORMATION_TEXT} if self.note_style == "information" else {"Note": NOTE_TEXT}
+
+    async def handle_query(self, request: web.Request) -> web.Response:
+        params = dict(request.query)
+        function = params.pop("function", "")
+        api_key = params.pop("apikey", "")
+        self.stats["requests"] += 1
+        self.stats[f"requests:{function}"] += 1
+
+        delay = self.latency_s + self._rng.uniform(0, self.latency_jitter_s)
+        if self.tail_rate and self._rng.random() < self.tail_rate:
+            delay += self.tail_latency_s
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats["http_503"] += 1
+            return web.Response(status=503, text="Service Unavailable")
+        if self._over_quota(api_key) or (self.note_rate and self._rng.random() < self.note_rate):
+            self.stats["notes"] += 1
+            return web.json_response(self._note())
+        if not api_key:
+            return web.json_response({"Error Message": "the parameter apikey is invalid or missing."})
+        if function not in SUPPORTED_FUNCTIONS:
+            self.stats["unsupported"] += 1
+            return web.json_response({"Error Message": f"This API function ({function}) does not exist."})
+        self.stats["ok"] += 1
+        return web.json_response(self.payload(function, params))
+
+    async def start(self) -> str:
+        """
+        Start serving on the running event loop.
+
+        Returns:
+            str: Base URL to pass to AlphaVantageClient(base_url=...) or ALPHAVANTAGE_BASE_URL.
+        """
+        app = web.Application()
+        app.router.add_get("/query", self.handle_query)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+async def _serve(server: FakeAlphaVantageServer):
+    print(f"Fake Alpha Vantage serving at {await server.start()}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Alpha Vantage stand-in (set ALPHAVANTAGE_BASE_URL to the printed URL)")
+    parser.add_argument("--port", type=int, default=fake_alphavantage_config["port"])
+    parser.add_argument("--latency", type=float, default=fake_alphavantage_config["latency_s"])
+    parser.add_argument("--jitter", type=float, default=fake_alphavantage_config["latency_jitter_s"])
+    parser.add_argument("--error_rate", type=float, default=fake_alphavantage_config["error_rate"])
+    parser.add_argument("--note_rate", type=float, default=fake_alphavantage_config["note_rate"])
+    parser.add_argument("--rpm", type=float, default=fake_alphavantage_config["requests_per_minute"], help="Server-side quota per API key")
+    parser.add_argument("--recordings", help="Serve recorded responses from this Data directory when available")
+    parser.add_argument("--as_of", help="YYYY-MM-DD 'today' of the synthetic data")
+    parser.add_argument("--universe", nargs="+", default=[], help="Tickers of the market-wide news feed")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(FakeAlphaVantageServer(
+            port=args.port, latency_s=args.latency, latency_jitter_s=args.jitter, error_rate=args.error_rate,
+            note_rate=args.note_rate, requests_per_minute=args.rpm, recordings_dir=args.recordings,
+            news_universe=args.universe, as_of=date.fromisoformat(args.as_of) if args.as_of else None
+        )))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,252 @@
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall, Function
+from openai.types.completion_usage import CompletionUsage, PromptTokensDetails
+
+FAKE_MODEL_CLIENT = "FakeModelClient"
+
+_DATE_TICKER_PATTERN = re.compile(r"Today is (\d{4}-\d{2}-\d{2})\. Please collect stock data for ([^\s.]+)")
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for relative prompt-budget comparisons
+    return max(1, len(text or "") // 4)
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    if message.get("tool_calls"):
+        content += json.dumps(message["tool_calls"])
+    return content
+
+
+class PrefixCacheSimulator:
+    def __init__(self, min_tokens: int = 1024, block_tokens: int = 128, max_entries: int = 200000):
+        """
+        Emulates Azure/OpenAI automatic prompt caching: once a prompt prefix of at least
+        `min_tokens` has been seen, later prompts sharing it get it back as cached tokens,
+        in `block_tokens` increments. Shared by all fake clients of the process.
+        """
+        self.min_chars = min_tokens * 4
+        self.block_chars = block_tokens * 4
+        self.max_entries = max_entries
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def lookup_and_store(self, text: str) -> int:
+        """
+        Returns:
+            int: Estimated cached tokens for `text`; its prefixes are remembered afterwards.
+        """
+        digest = hashlib.md5()
+        prefix_hashes = []
+        for end in range(self.block_chars, len(text) + 1, self.block_chars):
+            digest.update(text[end - self.block_chars:end].encode("utf-8"))
+            if end >= self.min_chars:
+                prefix_hashes.append((end, digest.copy().hexdigest()))
+
+        cached_chars = 0
+        with self._lock:
+            for end, prefix_hash in prefix_hashes:
+                if prefix_hash not in self._seen:
+                    break
+                cached_chars = end
+            if len(self._seen) > self.max_entries:
+                self._seen.clear()
+            self._seen.update(h for _, h in prefix_hashes)
+        return cached_chars // 4
+
+
+prefix_cache = PrefixCacheSimulator()
+
+
+def _serialize_prompt(messages: list) -> str:
+    return "".join(f"<{m.get('role')}:{m.get('name', '')}>{_message_text(m)}" for m in messages)
+
+
+def _default_analyst_reply(messages: list, tool_names: list):
+    if messages and messages[-1].get("role") == "tool":
+        return {"content": "Collected price history and fundamentals; data looks consistent with recent trading.\nTERMINATE"}
+
+    today, ticker = "2024-01-02", "TSLA"
+    for message in messages:
+        match = _DATE_TICKER_PATTERN.search(_message_text(message))
+        if match:
+            today, ticker = match.groups()
+    arguments = {
+        "fetch_stock_price_history": {"ticker": ticker, "today_date": today},
+        "fetch_stock_fundamental_data": {"ticker": ticker, "today": today},
+        "fetch_single_news": {"ticker": ticker, "time_from": f"{today}T0000", "time_to": f"{today}T2359", "sort": "RELEVANCE"},
+    }
+    return {
+        "content": None,
+        "tool_calls": [{"name": name, "arguments": arguments.get(name, {"ticker": ticker})} for name in tool_names]
+    }
+
+
+def _default_reply(agent_name: str, messages: list, rng: random.Random, tool_names: list):
+    """
+    Scripted replies in the formats the pipeline parses (BUY/SELL, APPROVED/REJECTED, EXECUTE_TRADE).
+    """
+    if agent_name == "analyst_agent":
+        return _default_analyst_reply(messages, tool_names)
+    if agent_name == "bullish_research_agent":
+        return {"content": "Revenue growth and margin expansion support upside. No further arguments."}
+    if agent_name == "bearish_research_agent":
+        return {"content": "Valuation is stretched and volume is fading. No further arguments."}
+    if agent_name == "calculator_agent":
+        return {"content": "No calculation requested."}
+    if agent_name == "summary_agent":
+        return {"content": "** Summary of Arguments **\n\n** Bullish Perspective:**\n1. **Growth:** strong.\n\n** Bearish Perspective:**\n1. **Valuation:** stretched.\n\n** Conclusion:** balanced.\nTERMINATE"}
+    if agent_name == "trader_agent":
+        return {"content": f"**{rng.choice(['BUY', 'SELL'])}**\nJustification: weighed both sides of the debate."}
+    if agent_name == "spokesperson_agent":
+        return {"content": "TERMINATE. Your decision reflects our team's analysis. You may stop here."}
+    if agent_name == "risk_manager_agent":
+        return {"content": rng.choice(["APPROVED (Neutral)", "APPROVED (Aggressive)", "REJECTED (reason: too volatile)"])}
+    if agent_name == "trade_recommender_agent":
+        return {"content": "TERMINATE"}
+    if agent_name == "manager_agent":
+        return {"content": f"**{rng.choice(['EXECUTE_TRADE', 'DO_NOT_EXECUTE'])}**\nReason: consistent with trader and risk review."}
+    if agent_name == "completeness_check_agent":
+        return {"content": "FINISHED"}
+    return {"content": "OK. TERMINATE"}
+
+
+class FakeModelClient:
+    def __init__(self, config: dict, agent_name: str = None, **kwargs):
+        """
+        Offline stand-in for the Azure/OpenAI client, registered on an agent through
+        `agent.register_model_client(FakeModelClient, agent_name=...)` (see `register_fake_llm`).
+
+        Replies come from, in order of preference:
+          1. a replay file (`replay_path` in the config entry): JSONL lines of
+             {"agent": name, "content": str, "tool_calls": [{"name", "arguments"}]},
+             cycled per agent;
+          2. built-in scripted replies per agent, seeded by the prompt so a given
+             ticker-day always gets the same decisions.
+
+        Config entry keys (besides "model" and "model_client_cls"):
+            latency_s (float): Artificial latency per call.
+            latency_jitter_s (float): Uniform random extra latency.
+            latency_per_1k_prompt_tokens_s (float): Extra latency per 1k uncached prompt tokens,
+                so prompt-budget and prompt-layout changes show up in throughput.
+            prefix_cache (bool): Emulate provider prefix caching (default True); cached
+                tokens are reported in usage.prompt_tokens_details like the real API.
+            tool_calls (list): Tool names the scripted analyst calls; defaults to the
+                local-file tools so no network is needed.
+            price (list): [prompt, completion] USD per 1k tokens, used for cost.
+            replay_path (str): Recorded responses to replay.
+        """
+        self.model = config.get("model", "fake-model")
+        self.agent_name = agent_name
+        self.latency_s = config.get("latency_s", 0.0)
+        self.latency_jitter_s = config.get("latency_jitter_s", 0.0)
+        self.latency_per_1k_prompt_tokens_s = config.get("latency_per_1k_prompt_tokens_s", 0.0)
+        self.tool_names = config.get("tool_calls", ["fetch_stock_price_history", "fetch_stock_fundamental_data"])
+        self.price = config.get("price", [0.0025, 0.01])
+        self.prefix_cache = config.get("prefix_cache", True)
+        self._replay = None
+        self._lock = threading.Lock()
+        if config.get("replay_path"):
+            with open(config["replay_path"], "r", encoding="utf-8") as f:
+                recorded = [json.loads(line) for line in f if line.strip()]
+            own = [r for r in recorded if r.get("agent") == agent_name]
+            if own:
+                self._replay = itertools.cycle(own)
+
+    def _next_reply(self, messages: list) -> dict:
+        if self._replay is not None:
+            with self._lock:
+                return next(self._replay)
+        prompt_text = "".join(_message_text(m) for m in messages)
+        seed = int(hashlib.md5(prompt_text[:2000].encode("utf-8")).hexdigest()[:8], 16)
+        return _default_reply(self.agent_name, messages, random.Random(seed), self.tool_names)
+
+    def create(self, params: dict) -> ChatCompletion:
+        messages = params.get("messages", [])
+        reply = self._next_reply(messages)
+        prompt_tokens = sum(_estimate_tokens(_message_text(m)) for m in messages)
+        cached_tokens = min(prefix_cache.lookup_and_store(_serialize_prompt(messages)), prompt_tokens) if self.prefix_cache else 0
+
+        delay = (
+            self.latency_s
+            + random.uniform(0, self.latency_jitter_s)
+            + self.latency_per_1k_prompt_tokens_s * (prompt_tokens - cached_tokens) / 1000
+        )
+        if delay > 0:
+            time.sleep(delay)
+
+        tool_calls = None
+        if reply.get("tool_calls"):
+            tool_calls = [
+                ChatCompletionMessageToolCall(
+                    id=f"call_{uuid.uuid4().hex[:12]}",
+                    type="function",
+                    function=Function(name=call["name"], arguments=json.dumps(call.get("arguments", {})))
+                )
+                for call in reply["tool_calls"]
+            ]
+        message = ChatCompletionMessage(role="assistant", content=reply.get("content"), tool_calls=tool_calls)
+
+        completion_tokens = _estimate_tokens(_message_text({"content": reply.get("content"), "tool_calls": reply.get("tool_calls")}))
+        return ChatCompletion(
+            id=f"fake-{uuid.uuid4().hex[:12]}",
+            choices=[Choice(finish_reason="tool_calls" if tool_calls else "stop", index=0, message=message)],
+            created=int(time.time()),
+            model=self.model,
+            object="chat.completion",
+            usage=CompletionUsage(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+                prompt_tokens_details=PromptTokensDetails(cached_tokens=cached_tokens)
+            )
+        )
+
+    def message_retrieval(self, response: ChatCompletion) -> list:
+        return [
+            choice.message if choice.message.tool_calls else choice.message.content
+            for choice in response.choices
+        ]
+
+    def cost(self, response: ChatCompletion) -> float:
+        usage = response.usage
+        return (usage.prompt_tokens * self.price[0] + usage.completion_tokens * self.price[1]) / 1000
+
+    @staticmethod
+    def get_usage(response: ChatCompletion) -> dict:
+        return {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "total_tokens": response.usage.total_tokens,
+            "cost": getattr(response, "cost", 0.0),
+            "model": response.model,
+        }
+
+
+def uses_fake_llm(llm_config) -> bool:
+    if not llm_config:
+        return False
+    return any(c.get("model_client_cls") == FAKE_MODEL_CLIENT for c in llm_config.get("config_list", []))
+
+
+def register_fake_llm(agents) -> None:
+    """
+    Attach FakeModelClient to every agent whose llm_config selects it.
+    autogen requires this for any config entry that names a `model_client_cls`.
+    """
+    for agent in agents:
+        if uses_fake_llm(getattr(agent, "llm_config", None)):
+            agent.register_model_client(model_client_cls=FakeModelClient, agent_name=agent.name)
@@ -263,8 +263,13 @@ def generate_trading_days(start, end, ticker="AMZN"):
 #     return date_list
 
 
-def run_portfolio_simulation(tickers, start, end, agents, user_proxy, debate_mgr, risk_profile="Neutral"):
+def run_portfolio_simulation(tickers, start, end, agents=None, user_proxy=None, debate_mgr=None, risk_profile="Neutral", llm_config=None):
     from orchestrator.stock_recommendation_workflow import run_stock_recommendation
+    if agents is None:
+        # build_pipeline also attaches the offline client when llm_config is fake_llm_config
+        from config.api_config import llm_config as default_llm_config
+        from orchestrator.pipeline_factory import build_pipeline
+        agents, user_proxy, debate_mgr = build_pipeline(llm_config or default_llm_config, risk_profile=risk_profile)
     trading_days = generate_trading_days(start, end)
     
     # Step 1: Run agent decisions for each day and each stock
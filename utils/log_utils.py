@@ -0,0 +1,135 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+from config.agent_config import agent_settings
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+
+# Logger for pipeline stage messages; its level is the configurable "stage_level"
+pipeline_logger = logging.getLogger("finllm.pipeline")
+
+# Ticker of the pipeline running in the current thread / asyncio task
+current_log_ticker = contextvars.ContextVar("current_log_ticker", default=None)
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def set_log_ticker(ticker: str):
+    """
+    Tag every log record emitted in the current context with `ticker`.
+
+    Returns:
+        contextvars.Token: Pass to `reset_log_ticker` when the pipeline finishes.
+    """
+    return current_log_ticker.set(ticker)
+
+
+def reset_log_ticker(token):
+    current_log_ticker.reset(token)
+
+
+class TickerContextFilter(logging.Filter):
+    """
+    Copy the context's ticker onto records that don't carry one (e.g. httpx/openai logs).
+    """
+    def filter(self, record):
+        if getattr(record, "ticker", None) is None:
+            record.ticker = current_log_ticker.get()
+        return True
+
+
+class TickerFileHandler(logging.Handler):
+    def __init__(self, log_dir: str = "logs", max_open_files: int = 64, fallback_name: str = "pipeline"):
+        """
+        Write each record to logs/{ticker}_usage.log based on its `ticker` attribute.
+
+        Files stay open between records (closing the least recently used one beyond
+        `max_open_files`), so a ticker-day doesn't reopen its log file.
+
+        Args:
+            log_dir (str): Directory for the log files.
+            max_open_files (int): Max file handles kept open at once.
+            fallback_name (str): File stem for records without a ticker.
+        """
+        super().__init__()
+        self.log_dir = log_dir
+        self.max_open_files = max_open_files
+        self.fallback_name = fallback_name
+        self._streams = OrderedDict()
+        os.makedirs(log_dir, exist_ok=True)
+
+    def _stream_for(self, name: str):
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = open(os.path.join(self.log_dir, f"{name}_usage.log"), "a", encoding="utf-8")
+            self._streams[name] = stream
+            while len(self._streams) > self.max_open_files:
+                _, oldest = self._streams.popitem(last=False)
+                oldest.close()
+        else:
+            self._streams.move_to_end(name)
+        return stream
+
+    def emit(self, record):
+        try:
+            stream = self._stream_for(getattr(record, "ticker", None) or self.fallback_name)
+            stream.write(self.format(record) + "\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams.clear()
+        finally:
+            self.release()
+        super().close()
+
+
+def configure_logging(log_dir: str = "logs"):
+    """
+    Configure process-wide logging once; later calls are no-ops.
+
+    Records go through a QueueHandler on the root logger, and a QueueListener thread does
+    the file/console I/O, so pipelines never block on disk writes or fight over handlers.
+    Levels come from agent_settings["logging"].
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        settings = agent_settings.get("logging", {})
+        formatter = logging.Formatter(LOG_FORMAT)
+
+        handlers = [TickerFileHandler(log_dir, max_open_files=settings.get("max_open_files", 64))]
+        if settings.get("console", True):
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(TickerContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(settings.get("level", "INFO"))
+        root.addHandler(queue_handler)
+
+        pipeline_logger.setLevel(settings.get("stage_level", "INFO"))
+        for name in ("httpx", "httpcore", "openai"):
+            logging.getLogger(name).setLevel(settings.get("http_level", "WARNING"))
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -1,7 +1,66 @@
+from config.agent_config import agent_settings
+
+
+def _record_last_reply(sender, message, recipient, silent):
+    # process_message_before_send hook: remember what the agent last said, for O(1) lookup
+    content = message.get("content") if isinstance(message, dict) else message
+    if isinstance(content, str):
+        sender._last_reply = content
+    return message
+
+
+def track_last_replies(agents):
+    """
+    Keep each agent's latest outgoing text message on `agent._last_reply`, so
+    `get_last_reply_from` doesn't have to scan the conversation history. Idempotent.
+    """
+    for agent in agents:
+        if hasattr(agent, "_last_reply") or not hasattr(agent, "register_hook"):
+            continue
+        agent._last_reply = None
+        agent.register_hook("process_message_before_send", _record_last_reply)
+
+
 def get_last_reply_from(cur_agent):
     # get cur_agent's last reply to others
+    if hasattr(cur_agent, "_last_reply"):
+        return cur_agent._last_reply
     for msg_list in cur_agent.chat_messages.values():
         for msg in reversed(msg_list):
             if msg.get("role") == "assistant" and msg.get("name") == cur_agent.name:
                 return msg["content"]
-    return None
\ No newline at end of file
+    return None
+
+
+def retained_message_count(agents) -> int:
+    """
+    Messages currently held in the agents' conversation histories (diagnostic).
+    """
+    return sum(len(msgs) for agent in agents for msgs in agent.chat_messages.values())
+
+
+def reset_conversations(agents, debate_manager=None):
+    """
+    Bound conversation memory before a new ticker-day, per agent_settings["conversation_memory"]:
+    either clear every history (default), or keep only the last `max_messages_per_partner`
+    messages per conversation partner. Last-reply tracking is reset either way so a stale
+    reply from a previous day is never returned.
+    """
+    settings = agent_settings.get("conversation_memory", {})
+    keep = settings.get("max_messages_per_partner")
+    agents = list(agents)
+    if debate_manager is not None:
+        agents.append(debate_manager)
+
+    for agent in agents:
+        if settings.get("reset_between_runs", True):
+            agent.clear_history()
+        elif keep is not None:
+            for msgs in agent.chat_messages.values():
+                del msgs[:-keep or None]
+        if hasattr(agent, "_last_reply"):
+            agent._last_reply = None
+
+    if debate_manager is not None:
+        # collect_debate_summary reads the whole transcript, so it never outlives a run
+        debate_manager.groupchat.reset()
@@ -0,0 +1,231 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config.agent_config import agent_settings
+
+# Telemetry of the pipeline running in the current thread / asyncio task
+current_telemetry = contextvars.ContextVar("current_telemetry", default=None)
+# (telemetry, stage record) open in the current thread / asyncio task; stages of one pipeline
+# can run in parallel threads (StageDAG), so the active stage can't live on the telemetry object
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+_write_lock = threading.Lock()
+
+
+def cached_prompt_tokens(response) -> tuple:
+    """
+    (prompt_tokens, cached_tokens) of a chat completion; cached_tokens is the part of the
+    prompt served from the provider's prefix cache (0 when the API doesn't report it).
+    """
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    return usage.prompt_tokens or 0, getattr(details, "cached_tokens", 0) or 0
+
+
+def install_llm_call_counter(agent):
+    """
+    Count LLM calls, their wall time and provider-cached prompt tokens on `agent` by wrapping
+    its OpenAIWrapper.create. Counters live on the agent (not in a context variable) because
+    autogen may run the call in an executor thread. Idempotent; agents without an LLM client
+    are skipped.
+    """
+    client = getattr(agent, "client", None)
+    if client is None or hasattr(agent, "_llm_call_stats"):
+        return
+    stats = {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "cached_tokens": 0}
+    lock = threading.Lock()
+    original_create = client.create
+
+    def counted_create(**config):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = original_create(**config)
+            return response
+        finally:
+            prompt_tokens, cached_tokens = cached_prompt_tokens(response)
+            with lock:
+                stats["calls"] += 1
+                stats["seconds"] += time.perf_counter() - start
+                stats["prompt_tokens"] += prompt_tokens
+                stats["cached_tokens"] += cached_tokens
+
+    client.create = counted_create
+    agent._llm_call_stats = stats
+
+
+def record_tool_call(tool_name: str, seconds: float, cache_hit: bool):
+    """
+    Attribute one tool call to the current stage of the active pipeline telemetry (if any).
+    """
+    telemetry = current_telemetry.get()
+    if telemetry is not None:
+        telemetry.record_tool_call(tool_name, seconds, cache_hit)
+
+
+def current_rss_mb() -> float:
+    """
+    Resident set size of this process in MB (psutil if installed, else /proc, else peak RSS).
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def usage_totals(agent) -> dict:
+    """
+    Cumulative actual (non-cached) usage of one agent, summed over models.
+    """
+    totals = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost": 0.0}
+    usage = agent.get_actual_usage() if hasattr(agent, "get_actual_usage") else None
+    for model, model_usage in (usage or {}).items():
+        if model == "total_cost" or not isinstance(model_usage, dict):
+            continue
+        for field in totals:
+            totals[field] += model_usage.get(field, 0) or 0
+    return totals
+
+
+def snapshot_usage(agents_by_name: dict) -> dict:
+    """
+    Returns:
+        dict: {agent_name: {"prompt_tokens", "completion_tokens", "total_tokens", "cost"}}
+    """
+    return {name: usage_totals(agent) for name, agent in agents_by_name.items()}
+
+
+def diff_usage(before: dict, after: dict) -> dict:
+    """
+    Usage spent between two `snapshot_usage` calls, per agent (agents with no usage are dropped).
+    """
+    delta = {}
+    for name, totals in after.items():
+        prev = before.get(name, {})
+        spent = {field: value - prev.get(field, 0) for field, value in totals.items()}
+        if spent["total_tokens"] or spent["cost"]:
+            delta[name] = spent
+    return delta
+
+
+class PipelineTelemetry:
+    def __init__(self, stock_name: str, today_date: str, risk_profile: str, agents_by_name: dict):
+        """
+        Per ticker-day telemetry: wall time, token usage, LLM calls/time and tool calls per stage.
+
+        Args:
+            stock_name (str): Ticker.
+            today_date (str): Trading day.
+            risk_profile (str): Risk profile of the run.
+            agents_by_name (dict): All LLM agents of the pipeline (see `pipeline_agents`).
+        """
+        self.stock_name = stock_name
+        self.today_date = today_date
+        self.risk_profile = risk_profile
+        self.agents_by_name = agents_by_name
+        self.stages = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._start_rss = current_rss_mb()
+        for agent in agents_by_name.values():
+            install_llm_call_counter(agent)
+
+    def _snapshot(self) -> dict:
+        tokens = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cost": 0.0}
+        llm = {"llm_calls": 0, "llm_s": 0.0, "llm_prompt_tokens": 0, "cached_tokens": 0}
+        for agent in self.agents_by_name.values():
+            for field, value in usage_totals(agent).items():
+                tokens[field] += value
+            stats = getattr(agent, "_llm_call_stats", None)
+            if stats:
+                llm["llm_calls"] += stats["calls"]
+                llm["llm_s"] += stats["seconds"]
+                llm["llm_prompt_tokens"] += stats["prompt_tokens"]
+                llm["cached_tokens"] += stats["cached_tokens"]
+        return {"tokens": tokens, **llm}
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measure everything that happens inside the block as stage `name`. Tool calls are
+        attributed through a context variable, so stages running in parallel threads (each in
+        its own copied context) each get their own tool calls.
+        """
+        before = self._snapshot()
+        record = {"stage": name, "tool_calls": 0, "tool_cache_hits": 0, "tool_s": 0.0, "tools": {}, "retries": 0}
+        stage_token = _current_stage.set((self, record))
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            after = self._snapshot()
+            record["duration_s"] = round(time.perf_counter() - start, 3)
+            record["llm_calls"] = after["llm_calls"] - before["llm_calls"]
+            record["llm_s"] = round(after["llm_s"] - before["llm_s"], 3)
+            record["cached_tokens"] = after["cached_tokens"] - before["cached_tokens"]
+            prompt_tokens = after["llm_prompt_tokens"] - before["llm_prompt_tokens"]
+            record["cached_ratio"] = round(record["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0.0
+            record["tool_s"] = round(record["tool_s"], 3)
+            record["tokens"] = {
+                field: after["tokens"][field] - before["tokens"][field]
+                for field in before["tokens"]
+            }
+            _current_stage.reset(stage_token)
+            with self._lock:
+                self.stages.append(record)
+
+    def record_tool_call(self, tool_name: str, seconds: float, cache_hit: bool):
+        telemetry, record = _current_stage.get() or (None, None)
+        if telemetry is not self:
+            return
+        with self._lock:
+            record["tool_calls"] += 1
+            record["tool_cache_hits"] += int(cache_hit)
+            record["tool_s"] += seconds
+            record["tools"][tool_name] = record["tools"].get(tool_name, 0) + 1
+
+    def to_record(self) -> dict:
+        rss = current_rss_mb()
+        return {
+            "stock": self.stock_name,
+            "date": self.today_date,
+            "risk_profile": self.risk_profile,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "total_s": round(time.perf_counter() - self._start, 3),
+            "rss_mb": round(rss, 1),
+            "rss_growth_mb": round(rss - self._start_rss, 1),
+            "stages": self.stages
+        }
+
+    def write(self, path: str = None) -> dict:
+        """
+        Append this ticker-day's record to the telemetry JSONL file (agent_settings["telemetry"]["path"]).
+        """
+        settings = agent_settings.get("telemetry", {})
+        record = self.to_record()
+        if not settings.get("enabled", True):
+            return record
+        path = path or settings.get("path", os.path.join("logs", "telemetry.jsonl"))
+        line = json.dumps(record, ensure_ascii=False)
+        with _write_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return record